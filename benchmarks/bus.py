@@ -0,0 +1,63 @@
+"""
+Benchmark of real-time event bus
+
+Events of 1,500 codes are published in turn while strategies watch 50 codes each, and the
+number of events per second is reported for a single slot that branches by code in Python
+and for subscribers of Kiwoom.bus.
+
+Usage
+>>  python benchmarks/bus.py [number of events]
+"""
+import sys
+from time import perf_counter
+
+from PyQt5.QtWidgets import QApplication
+
+from kiwoom import Kiwoom
+
+
+def run(api, events, n):
+    fn = api.on_receive_real_data
+    begin = perf_counter()
+    for i in range(n):
+        fn(*events[i % len(events)])
+    return n / (perf_counter() - begin)
+
+
+def main(n=10 ** 6, ncodes=1500, nwatch=50):
+    codes = [str(i).zfill(6) for i in range(ncodes)]
+    events = [(code, '주식체결', '') for code in codes]
+
+    print(f'Events per second with {n:,} calls of {ncodes:,} codes, {nwatch} codes watched by each strategy\n')
+    print(f"{'strategies':<12}{'slot':>14}{'bus':>14}{'speedup':>10}")
+    for nstrategy in (1, 10):
+        hits = [0]
+
+        def strategy(code, real_type, real_data):
+            hits[0] += 1
+
+        watches = [set(codes[i * nwatch: (i + 1) * nwatch]) for i in range(nstrategy)]
+
+        # 1) Single slot that receives every event and branches in Python
+        def slot(code, real_type, real_data):
+            if real_type == '주식체결':
+                for watch in watches:
+                    if code in watch:
+                        strategy(code, real_type, real_data)
+
+        api = Kiwoom()
+        api.connect('on_receive_real_data', slot=slot)
+        before = run(api, events, n)
+
+        # 2) Subscribers of the bus
+        api = Kiwoom()
+        for watch in watches:
+            api.subscribe(strategy, '주식체결', sorted(watch))
+        after = run(api, events, n)
+
+        print(f'{nstrategy:<12}{before:>14,.0f}{after:>14,.0f}{after / before:>9.1f}x')
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 6)
@@ -0,0 +1,57 @@
+"""
+Benchmark of decoding real-time data
+
+Events of '주식체결' are decoded into values of 13 FIDs, and the number of events per
+second is reported for GetCommRealData() with a pre-processor for each FID and for
+kiwoom.data.real.Decoder. Note that GetCommRealData() is served by the simulator here,
+which is much cheaper than dynamicCall on the real control.
+
+Usage
+>>  python benchmarks/decode.py [number of events]
+"""
+import sys
+from time import perf_counter
+
+from PyQt5.QtWidgets import QApplication
+
+from kiwoom import Kiwoom
+from kiwoom.config import real
+from kiwoom.data.real import Decoder
+from kiwoom.wrapper.sim import REAL_FIDS, Simulator, attach
+
+
+def main(n=10 ** 5):
+    api = Kiwoom()
+    sim = Simulator(real_rate=0)
+    attach(api, sim)
+
+    # To make the last event that GetCommRealData() serves
+    api.set_real_reg('1000', '005930', ';'.join(map(str, REAL_FIDS)), '0')
+    real_data = list()
+    api.connect('on_receive_real_data', slot=lambda code, real_type, data: real_data.append(data))
+    sim.tick()
+    code, real_data = '005930', real_data[0]
+
+    # 1) GetCommRealData() for each FID
+    parsers = [(fid, real.preper(fid)) for fid in REAL_FIDS]
+    begin = perf_counter()
+    for _ in range(n):
+        before = [fn(api.get_comm_real_data(code, fid)) for fid, fn in parsers]
+    before_rate = n / (perf_counter() - begin)
+
+    # 2) Decoder
+    decoder = Decoder(api, '주식체결', REAL_FIDS)
+    begin = perf_counter()
+    for _ in range(n):
+        after = decoder(code, real_data)
+    after_rate = n / (perf_counter() - begin)
+
+    assert list(after) == before, 'Decoded values are different.'
+    print(f'Events per second with {n:,} events of {len(REAL_FIDS)} FIDs\n')
+    print(f"{'before':>14}{'after':>14}{'speedup':>10}")
+    print(f'{before_rate:>14,.0f}{after_rate:>14,.0f}{after_rate / before_rate:>9.1f}x')
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 5)
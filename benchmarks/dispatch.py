@@ -0,0 +1,81 @@
+"""
+Benchmark of event dispatch by Connector.map
+
+Events are called directly with no-op slots connected, and the number of events per
+second is reported for the compiled dispatch of Connector and for the wrapper used before,
+which looked up the event name, hook, hook index and slot on every call.
+
+Usage
+>>  python benchmarks/dispatch.py [number of events]
+"""
+import sys
+from functools import wraps
+from time import perf_counter
+
+from PyQt5.QtWidgets import QApplication
+
+from kiwoom import Kiwoom
+from kiwoom.core.connector import Connector
+
+
+def legacy(ehandler):
+    # Wrapper of Connector.map before dispatch was compiled
+    @wraps(ehandler)
+    def wrapper(api, *args):
+        event = getattr(ehandler, '__name__')
+        idx = api.get_hook_index(event)
+        hook = api.get_connect_hook(event)
+        args = args[:Connector.nargs[event]]
+
+        ehandler(api, *args)
+        try:
+            key = args[idx] if hook else None
+            slot = api.slot(event, key)
+        except KeyError:
+            return
+        slot(*args)
+    return wrapper
+
+
+class Legacy(Kiwoom):
+    @legacy
+    def on_receive_real_data(self, code, real_type, real_data):
+        pass
+
+    @legacy
+    def on_receive_tr_data(self, scr_no, rq_name, tr_code, record_name, prev_next):
+        pass
+
+
+def rate(api, event, args, n):
+    fn = getattr(api, event)
+    begin = perf_counter()
+    for _ in range(n):
+        fn(*args)
+    return n / (perf_counter() - begin)
+
+
+def main(n=10 ** 6):
+    cases = [
+        ('on_receive_real_data', ('005930', '주식체결', '151515\t+70000\t+500')),
+        ('on_receive_tr_data', ('4000', 'history', 'opt10079', '', '0'))
+    ]
+
+    print(f'Events per second with {n:,} calls\n')
+    print(f"{'event':<24}{'before':>14}{'after':>14}{'speedup':>10}")
+    for event, args in cases:
+        rates = list()
+        for cls in (Legacy, Kiwoom):
+            api = cls()
+            api.throttle.received = lambda key: None  # not to measure the throttle
+            if api.get_connect_hook(event):
+                api.connect(event, slot=lambda *args: None, key=args[api.get_hook_index(event)])
+            else:
+                api.connect(event, slot=lambda *args: None)
+            rates.append(rate(api, event, args, n))
+        print(f'{event:<24}{rates[0]:>14,.0f}{rates[1]:>14,.0f}{rates[1] / rates[0]:>9.1f}x')
+
+
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 6)
@@ -3,6 +3,7 @@ from . import (
     error,
     general,
     history,
+    real,
     screen,
     types
 )
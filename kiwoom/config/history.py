@@ -5,7 +5,10 @@ from pandas import to_datetime
 from kiwoom.config import types
 from kiwoom.config.const import MARKETS, MARKET_GUBUNS
 from kiwoom.config.types import STOCK, SECTOR
-from kiwoom.data.preps import number, string, remove_sign
+from kiwoom.data.preps import (
+    prep, number, string, remove_sign,
+    preps, numbers, strings, remove_signs
+)
 from kiwoom.utils import list_wrapper
 
 
@@ -20,14 +23,49 @@ Global Variables (Int, Dictionary type)
 # Download configuration
 SPEEDING = False
 DISCIPLINED = False
+ADAPTIVE = False
 REQUEST_LIMIT_TIME = 3600
 REQUEST_LIMIT_TRY = float('inf')
 REQUEST_LIMIT_ITEM = float('inf')
 
+# Request limits of Kiwoom server in sliding windows [(count, seconds), ...]
+REQUEST_LIMIT_WINDOWS = [(5, 1), (100, 60), (1000, 3600)]
+REQUEST_LIMIT_RESERVE = 0.1  # portion of the limits reserved for account TRs, see kiwoom.core.scheduler
+ORDER_LIMIT_WINDOWS = [(5, 1)]
+
+# Adaptive request limit, see adapt() and kiwoom.utils.throttle
+ADAPTIVE_LIMIT_TIME = (200, 10000)  # (min, max) interval in ms
+ADAPTIVE_LATENCY = 1000  # response time in ms regarded as slow
+ADAPTIVE_RETRY = 10  # retries of a request rejected by overload
+ADAPTIVE_MESSAGES = ('과부하',)  # words in messages from the server that mean overload
+
+
+# Merge configuration (truncate the tail of existing file and append new data if possible)
+INCREMENTAL_MERGE = True
+INCREMENTAL_MERGE_BLOCK = 2 ** 16  # bytes to read from the end of file at a time
+
+
+# Manifest configuration (sidecar file in each data path that describes downloaded files)
+#  - Opt-in, as it writes 'manifest.json' and its lock file into every data path
+MANIFEST = False
+MANIFEST_HASH = False  # blake2b hash of each file, which needs to read the whole file at every save
+
 
 # Download progress bar divisor
 DOWNLOAD_PROGRESS_DISPLAY = 10
 
+# Number of codes downloaded at once in Bot.histories(), each with its own rq_name and screen
+DOWNLOAD_CONCURRENCY = 1
+
+# Number of codes in a shard and retries of a failed shard in kiwoom.core.shard.Orchestrator
+SHARD_SIZE = 50
+SHARD_RETRIES = 2
+
+# Supervisor of Bot.histories() in kiwoom.core.supervisor (seconds)
+SUPERVISOR_TIMEOUT = 60  # without a beat or an answer to a request before respawning the child
+SUPERVISOR_INTERVAL = 1  # between beats of the child and checks of the supervisor
+SUPERVISOR_REST = 600  # to rest when the child dies without any response from the server
+
 
 # Code lengths for each type
 SECTOR_CODE_LEN = 3
@@ -114,6 +152,13 @@ def is_sector(code):
     return False
 
 
+def is_chart(tr_code):
+    """
+    Returns whether TR code is one of chart TRs for historical data.
+    """
+    return tr_code in _TR_CODE_TO_PERIOD
+
+
 def get_code_type(code):
     """
     Returns whether code belongs to stock or sector.
@@ -170,9 +215,10 @@ def get_datetime_format(period):
 
 
 def boost():
-    global SPEEDING, DISCIPLINED
+    global SPEEDING, DISCIPLINED, ADAPTIVE
     SPEEDING = True
     DISCIPLINED = False
+    ADAPTIVE = False
 
     global REQUEST_LIMIT_TIME, REQUEST_LIMIT_TRY, REQUEST_LIMIT_ITEM
     REQUEST_LIMIT_TIME = 550
@@ -181,9 +227,10 @@ def boost():
 
 
 def regret():
-    global SPEEDING, DISCIPLINED
+    global SPEEDING, DISCIPLINED, ADAPTIVE
     SPEEDING = False
     DISCIPLINED = True
+    ADAPTIVE = False
 
     global REQUEST_LIMIT_TIME, REQUEST_LIMIT_TRY, REQUEST_LIMIT_ITEM
     REQUEST_LIMIT_TIME = 3600
@@ -191,6 +238,45 @@ def regret():
     REQUEST_LIMIT_ITEM = float('inf')
 
 
+def adapt():
+    """
+    Let the request rate be controlled by kiwoom.utils.throttle.Throttle
+
+    The interval between requests starts from REQUEST_LIMIT_TIME and changes within
+    ADAPTIVE_LIMIT_TIME, depending on responses from the server. No restart is needed.
+    """
+    global SPEEDING, DISCIPLINED, ADAPTIVE
+    SPEEDING = False
+    DISCIPLINED = False
+    ADAPTIVE = True
+
+    global REQUEST_LIMIT_TRY, REQUEST_LIMIT_ITEM
+    REQUEST_LIMIT_TRY = float('inf')
+    REQUEST_LIMIT_ITEM = float('inf')
+
+
+def limits():
+    """
+    Returns sliding windows of the server to limit every TR request, [(count, seconds), ...]
+    """
+    return list(REQUEST_LIMIT_WINDOWS)
+
+
+def pace(interval=None):
+    """
+    Returns the window of the minimum interval between requests of bulk downloads
+
+    REQUEST_LIMIT_TIME in ms works as the minimum interval, which applies to requests of
+    Bot.history() only, not to one-off requests such as account inquiries.
+
+    :param interval: float
+        minimum interval in seconds instead of REQUEST_LIMIT_TIME if given
+    """
+    if interval is None:
+        interval = REQUEST_LIMIT_TIME / 1000
+    return [(1, interval)] if interval > 0 else list()
+
+
 def preper(tr_code, otype):
     """
     Returns needed keys to fetch and pre-processor for each key as a tuple
@@ -205,6 +291,23 @@ def preper(tr_code, otype):
     return ((key, _PREP_FOR_OUTPUTS[key]) for key in _OUTPUTS_FOR_TR_CODE[tr_code][otype])
 
 
+def columnar_preper(tr_code, otype):
+    """
+    Returns needed keys to fetch and vectorized pre-processor for each key as a tuple
+
+    Vectorized pre-processor takes a whole column of raw strings and returns numpy.ndarray
+    with the same results as the one from preper(tr_code, otype).
+
+    :param tr_code: str
+        one of TR codes listed in KOA Studio or API Manual Guide
+    :param otype: OutputType
+        type can be either single or multi
+    :return: tuple
+        each element in tuple has key and pre-processor for its key, i.e. ((key1, function1), ...)
+    """
+    return ((key, _COLUMNAR_PREP[fn]) for key, fn in preper(tr_code, otype))
+
+
 def inputs(tr_code, code, unit=None, end=None):
     """
     Returns an iterator of key, val for each TR request
@@ -236,6 +339,18 @@ def inputs(tr_code, code, unit=None, end=None):
     return inputs.items()
 
 
+def layout(tr_code):
+    """
+    Returns names of columns in the order of GetCommDataEx for multi data of TR code
+
+    :param tr_code: str
+        one of TR codes listed in KOA Studio or API Manual Guide
+    :return: list or None
+        None if layout of given TR code is unknown
+    """
+    return _LAYOUT_FOR_TR_CODE.get(tr_code)
+
+
 def outputs(tr_code, otype):
     """
     Returns needed keys to fetch data for each OutputType
@@ -348,6 +463,15 @@ _PREP_FOR_OUTPUTS = defaultdict(
 )
 
 
+# Map pre-processor to its vectorized version
+_COLUMNAR_PREP = {
+    prep: preps,
+    number: numbers,
+    string: strings,
+    remove_sign: remove_signs
+}
+
+
 """
 Configuration for inputs and outputs
 """
@@ -520,3 +644,45 @@ _OUTPUTS_FOR_TR_CODE = {
         ]
     ],
 }
+
+# Columns of multi data in the order of GetCommDataEx for each TR code
+__STOCK_MINUTE_LAYOUT = [
+    '현재가', '거래량', '체결시간',
+    '시가', '고가', '저가',
+    '수정주가구분', '수정비율', '대업종구분',
+    '소업종구분', '종목정보', '수정주가이벤트',
+    '전일종가'
+]
+__STOCK_PERIOD_LAYOUT = [
+    '현재가', '거래량', '거래대금',
+    '일자', '시가', '고가',
+    '저가', '수정주가구분', '수정비율',
+    '대업종구분', '소업종구분', '종목정보',
+    '수정주가이벤트', '전일종가'
+]
+__SECTOR_MINUTE_LAYOUT = [
+    '현재가', '거래량', '체결시간',
+    '시가', '고가', '저가',
+    '대업종구분', '소업종구분', '종목정보',
+    '전일종가'
+]
+__SECTOR_PERIOD_LAYOUT = [
+    '현재가', '거래량', '일자',
+    '시가', '고가', '저가',
+    '거래대금', '대업종구분', '소업종구분',
+    '종목정보', '전일종가'
+]
+_LAYOUT_FOR_TR_CODE = {
+    'opt10079': __STOCK_MINUTE_LAYOUT,  # 주식틱차트조회요청
+    'opt10080': __STOCK_MINUTE_LAYOUT,  # 주식분봉차트조회요청
+    'opt10081': ['종목코드'] + __STOCK_PERIOD_LAYOUT,  # 주식일봉차트조회요청
+    'opt10082': __STOCK_PERIOD_LAYOUT,  # 주식주봉차트조회요청
+    'opt10083': __STOCK_PERIOD_LAYOUT,  # 주식월봉차트조회요청
+    'opt10094': __STOCK_PERIOD_LAYOUT,  # 주식년봉차트조회요청
+    'opt20004': __SECTOR_MINUTE_LAYOUT,  # 업종틱차트조회요청
+    'opt20005': __SECTOR_MINUTE_LAYOUT,  # 업종분봉조회요청
+    'opt20006': __SECTOR_PERIOD_LAYOUT,  # 업종일봉조회요청
+    'opt20007': __SECTOR_PERIOD_LAYOUT,  # 업종주봉조회요청
+    'opt20008': __SECTOR_PERIOD_LAYOUT,  # 업종월봉조회요청
+    'opt20019': __SECTOR_PERIOD_LAYOUT,  # 업종년봉조회요청
+}
@@ -0,0 +1,105 @@
+from kiwoom.data.preps import number, prep, remove_sign, string
+
+
+"""
+Configuration for real-time data
+  - real_data passed into on_receive_real_data is a string of values joined by tab in the
+    order of FIDs listed in KOA Studio for each real type. kiwoom.data.real.Decoder uses
+    the layout to fetch values at once and falls back to GetCommRealData if not matched.
+"""
+# Time to finalize files of real-time data, after the closing auction at 15:30 (HHMMSS)
+MARKET_CLOSE = '153500'
+
+# A tick earlier than the last one by more than this begins a new session (HHMMSS)
+SESSION_GAP = 10000
+
+# FIDs in the order of real_data for each real type
+__STOCK_TRADE_LAYOUT = (
+    20, 10, 11, 12, 27, 28, 15, 13, 14, 16, 17, 18, 25, 26, 29, 30, 31, 32, 228, 311,
+    290, 691, 567, 568, 851, 1890, 1891, 1892, 1030, 1031, 1032, 1071, 1072, 1313,
+    1315, 1316, 1314, 1497, 1498, 620, 732, 852, 9081
+)
+
+# 호가시간, then (매도호가, 매도호가수량, 매도호가직전대비, 매수호가, 매수호가수량, 매수호가직전대비) x 10
+__STOCK_ORDERBOOK_LAYOUT = (21,) + tuple(
+    fid + level for level in range(10) for fid in (41, 61, 81, 51, 71, 91)
+) + (121, 122, 125, 126, 23, 24, 128, 129, 138, 139, 200, 201, 238, 291, 292, 293, 294, 295, 13, 299, 215, 216)
+
+_LAYOUT_FOR_REAL_TYPE = {
+    '주식체결': __STOCK_TRADE_LAYOUT,
+    '주식호가잔량': __STOCK_ORDERBOOK_LAYOUT,
+    '주식우선호가': (27, 28),
+    '장시작시간': (215, 20, 214)
+}
+
+
+# Names of FIDs, which are used as field names of records
+_NAME_FOR_FID = {
+    10: '현재가', 11: '전일대비', 12: '등락율', 13: '누적거래량', 14: '누적거래대금',
+    15: '거래량', 16: '시가', 17: '고가', 18: '저가', 20: '체결시간', 21: '호가시간',
+    23: '예상체결가', 24: '예상체결수량', 25: '전일대비기호', 26: '전일거래량대비',
+    27: '매도호가', 28: '매수호가', 29: '거래대금증감', 30: '전일거래량대비율', 31: '거래회전율',
+    32: '거래비용', 121: '매도호가총잔량', 122: '매도호가총잔량직전대비', 125: '매수호가총잔량',
+    126: '매수호가총잔량직전대비', 128: '순매수잔량', 129: '매수비율', 138: '순매도잔량',
+    139: '매도비율', 214: '장시작예상잔여시간', 215: '장운영구분', 228: '체결강도',
+    290: '장구분', 311: '시가총액', 620: '당일거래평균가', 1030: '매도체결량',
+    1031: '매수체결량', 1032: '순매수체결량', 1071: '매도체결건수', 1072: '매수체결건수',
+    1313: '순간거래대금', 9081: '거래소구분'
+}
+_NAME_FOR_FID.update({41 + i: f'매도호가{i + 1}' for i in range(10)})
+_NAME_FOR_FID.update({51 + i: f'매수호가{i + 1}' for i in range(10)})
+_NAME_FOR_FID.update({61 + i: f'매도호가수량{i + 1}' for i in range(10)})
+_NAME_FOR_FID.update({71 + i: f'매수호가수량{i + 1}' for i in range(10)})
+_NAME_FOR_FID.update({81 + i: f'매도호가직전대비{i + 1}' for i in range(10)})
+_NAME_FOR_FID.update({91 + i: f'매수호가직전대비{i + 1}' for i in range(10)})
+
+
+# How to pre-process for each FID, prep by default
+__PREP_FOR_FIDS = {
+    number: [
+        11, 12, 13, 14, 15, 26, 29, 30, 31, 32, 121, 122, 125, 126, 128, 129, 138, 139,
+        228, 311, 1030, 1031, 1032, 1071, 1072, 1313
+    ] + list(range(61, 81)) + list(range(81, 101)),
+    string: [
+        20, 21, 25, 214, 215, 290, 9081
+    ],
+    remove_sign: [
+        10, 16, 17, 18, 23, 24, 27, 28, 620
+    ] + list(range(41, 61))
+}
+
+# Revert dictionary to be in the form of {fid: function}
+_PREP_FOR_FID = {fid: fn for fn, fids in __PREP_FOR_FIDS.items() for fid in fids}
+
+
+def layout(real_type):
+    """
+    Returns FIDs in the order of real_data for given real type
+
+    :param real_type: str
+        one of real types listed in KOA Studio, ex) '주식체결'
+    :return: tuple or None
+        None if layout of given real type is unknown
+    """
+    return _LAYOUT_FOR_REAL_TYPE.get(real_type)
+
+
+def field(fid):
+    """
+    Returns the name of FID, which can be used as an attribute of record, ex) '현재가'
+
+    :param fid: int
+    :return: str
+        'fid' + number if the name is unknown, ex) 'fid9999'
+    """
+    return _NAME_FOR_FID.get(int(fid), f'fid{int(fid)}')
+
+
+def preper(fid):
+    """
+    Returns pre-processor for given FID
+
+    :param fid: int
+    :return: function
+    """
+    return _PREP_FOR_FID.get(int(fid), prep)
@@ -1,12 +1,38 @@
-from collections import defaultdict
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from math import ceil
 from random import randint
 
 
 MAX_SCREEN_COUNT = 200
 MAX_STOCK_PER_SCREEN = 90
+MAX_REAL_PER_SCREEN = 100  # codes registered by SetRealReg for a screen
+
+# Purposes of screens in the pool and the first screen number of each
+PURPOSES = ('tr', 'real', 'order')
+_BASE_FOR_PURPOSE = {
+    'tr': 1000,
+    'real': 5000,
+    'order': 8000
+}
 
 
 class Screen:
+    """
+    Allocator of screen numbers
+
+    1) Screen(tr_code) & Screen.alloc(tr_code, code)
+        A fixed screen number for each TR code, which is kept until the end.
+
+    2) Screen.acquire(purpose) & Screen.release(scr_no)
+        Screen numbers are pooled with a free list for each purpose, i.e. 'tr', 'real'
+        and 'order', so that released ones are reused first. Screen.hold(purpose) does
+        the same as a context manager, and Screen.reserve(key) keeps one for the key
+        until released. Screen.usage() returns metrics of the pool.
+
+    Note that Kiwoom.disconnect_real_data(scr_no) should be called before releasing a
+    screen that received any data, so that the next user doesn't get stale events.
+    """
     def __init__(self):
         self.config = {
             'opt10079': '4000',  # Stock tick
@@ -25,6 +51,14 @@ class Screen:
         self._used = set()  # assigned screen numbers to TR code
         self._alloc = defaultdict(dict)  # assigned screen number to stock
         self._count = defaultdict(lambda: 0)  # assigned number of stocks to screen number
+        self._reserved = dict()  # screen number used only by the key
+        self._owners = dict()  # key that reserved the screen number
+
+        # Pool of screen numbers
+        self._free = {purpose: deque() for purpose in PURPOSES}  # released screen numbers
+        self._next = dict(_BASE_FOR_PURPOSE)  # next new screen number for each purpose
+        self._purpose = dict()  # purpose of screen numbers acquired from the pool
+        self._metrics = defaultdict(int)
 
     def __call__(self, tr_code):
         if tr_code in self:
@@ -49,6 +83,126 @@ class Screen:
         self._used.remove(tr_code)
         del self.config[tr_code]
 
+    def acquire(self, purpose='tr'):
+        """
+        Returns a screen number not in use, reusing the ones released first.
+
+        :param purpose: str
+            one of 'tr', 'real' and 'order'
+        :return: str
+        """
+        if purpose not in PURPOSES:
+            raise ValueError(f"Purpose of screen must be one of {PURPOSES}, not '{purpose}'.")
+
+        # Released ones may have been taken by Screen(tr_code) in the meantime
+        free = self._free[purpose]
+        while free and free[0] in self._used:
+            free.popleft()
+
+        if free:
+            scr_no = free.popleft()
+            self._metrics['reused'] += 1
+        else:
+            if len(self._used) >= MAX_SCREEN_COUNT:
+                raise RuntimeError(f'The number of screen exceeds maximum limit {MAX_SCREEN_COUNT}.')
+
+            scr_no = str(self._next[purpose]).zfill(4)
+            while scr_no in self._used or scr_no in self.config.values():
+                self._next[purpose] += 1
+                scr_no = str(self._next[purpose]).zfill(4)
+            if self._next[purpose] > 9999:
+                raise RuntimeError(f"No screen number is available for '{purpose}'.")
+            self._next[purpose] += 1
+
+        self._used.add(scr_no)
+        self._purpose[scr_no] = purpose
+        self._metrics['acquired'] += 1
+        self._metrics['peak'] = max(self._metrics['peak'], len(self._used))
+        return scr_no
+
+    def release(self, scr_no):
+        """
+        Returns the screen number to the pool, or the one reserved by the key.
+
+        :param scr_no: str
+            screen number, or key given to Screen.reserve()
+
+        :return: str or None
+            screen number released, None if it wasn't in use
+        """
+        if scr_no in self._reserved:
+            scr_no = self._reserved.pop(scr_no)
+            del self._owners[scr_no]
+        elif scr_no in self._owners:
+            del self._reserved[self._owners.pop(scr_no)]
+
+        if scr_no not in self._used:
+            return None
+
+        self._used.discard(scr_no)
+        self._metrics['released'] += 1
+        if scr_no in self._purpose:
+            self._free[self._purpose.pop(scr_no)].append(scr_no)
+        return scr_no
+
+    @contextmanager
+    def hold(self, purpose='tr'):
+        """
+        Context manager that acquires a screen number and releases it at the end.
+
+        >>  with scr.hold() as scr_no:
+        >>      ...
+
+        :param purpose: str
+            one of 'tr', 'real' and 'order'
+        """
+        scr_no = self.acquire(purpose)
+        try:
+            yield scr_no
+        finally:
+            self.release(scr_no)
+
+    def reserve(self, key, purpose='tr'):
+        """
+        Returns the screen number for the key, acquired from the pool at the first call.
+
+        Requests in flight at the same time must not share a screen number, so each of
+        them reserves one by its own key, ex) rq_name, until released.
+
+        :param key: hashable
+        :param purpose: str
+            one of 'tr', 'real' and 'order'
+        :return: str
+        """
+        if key not in self._reserved:
+            scr_no = self.acquire(purpose)
+            self._reserved[key] = scr_no
+            self._owners[scr_no] = key
+        return self._reserved[key]
+
+    def usage(self):
+        """
+        Returns metrics of screen numbers.
+
+        :return: dict
+            used     : number of screens in use, including the ones of TR codes
+            free     : {purpose: number of released screens to reuse}
+            reserved : number of screens reserved by keys
+            acquired : total number of screens acquired from the pool
+            reused   : total number of released screens acquired again
+            released : total number of screens released
+            peak     : maximum number of screens in use at a time
+        """
+        return {
+            'used': len(self._used),
+            'free': {purpose: len(free) for purpose, free in self._free.items()},
+            'reserved': len(self._reserved),
+            'acquired': self._metrics['acquired'],
+            'reused': self._metrics['reused'],
+            'released': self._metrics['released'],
+            'peak': self._metrics['peak']
+        }
+
     def update(self, tr_code, scr_no):
         self.config[tr_code] = scr_no
 
@@ -71,3 +225,151 @@ class Screen:
         self._alloc[tr_code][code] = scr_no
         self._count[scr_no] += 1
         return self(tr_code)
+
+
+class RealScreen:
+    """
+    Deterministic allocator of screen numbers for real-time data by SetRealReg
+
+    Codes are packed into screens acquired from Screen for 'real' purpose, filling the
+    lowest screen with room first, so that N codes take ceil(N / size) screens. Adding and
+    removing codes calls SetRealReg, SetRealRemove and DisconnectRealData only for the
+    screens that changed. Holes left by removals are filled by later additions, and
+    RealScreen.compact() packs them into the minimum number of screens.
+
+    Usage example
+    >>  real = RealScreen(api, '20;10;15;13', bot.scr)
+    >>  real.add(codes)  # 2,000 codes in 20 screens
+    >>  real.remove(['005930'])  # SetRealRemove('5000', '005930') only
+    >>  real['000660']  # '5000'
+
+    :param api: kiwoom.Kiwoom
+    :param fids: str or list of int
+        FIDs to register for all codes, ex) '20;10;15;13' or [20, 10, 15, 13]
+    :param screen: kiwoom.config.screen.Screen, optional
+        pool of screens to share MAX_SCREEN_COUNT with, ex) Bot.scr. New one if None.
+    :param size: int
+        maximum number of codes for a screen
+    """
+    def __init__(self, api, fids, screen=None, size=MAX_REAL_PER_SCREEN):
+        if not 0 < int(size) <= MAX_REAL_PER_SCREEN:
+            raise ValueError(f'Size must be in range of [1, {MAX_REAL_PER_SCREEN}], not {size}.')
+
+        self.api = api
+        self.fids = fids if isinstance(fids, str) else ';'.join(str(fid) for fid in fids)
+        self.screen = Screen() if screen is None else screen
+        self.size = int(size)
+        self._scr = dict()  # {code: scr_no}
+        self._codes = dict()  # {scr_no: {code: None}} in order of registration
+
+    def __contains__(self, code):
+        return code in self._scr
+
+    def __getitem__(self, code):
+        return self._scr[code]
+
+    def __len__(self):
+        return len(self._scr)
+
+    def screens(self):
+        """
+        Returns codes registered for each screen in order of screen numbers.
+
+        :return: dict
+            {scr_no: [code, ...]}
+        """
+        return {scr_no: list(self._codes[scr_no]) for scr_no in sorted(self._codes)}
+
+    def add(self, codes):
+        """
+        Registers codes for real-time data, only on the screens with new codes.
+
+        :param codes: str or list of str
+        :return: dict
+            {scr_no: [code, ...]} of codes newly registered
+        """
+        codes = [code for code in dict.fromkeys(self._list(codes)) if code not in self._scr]
+        added = defaultdict(list)
+
+        # To fill screens with room first in order of screen numbers
+        i = 0
+        for scr_no in sorted(self._codes):
+            room = self.size - len(self._codes[scr_no])
+            if room > 0 and i < len(codes):
+                added[scr_no].extend(codes[i:i + room])
+                i += room
+
+        while i < len(codes):
+            scr_no = self._open()
+            added[scr_no].extend(codes[i:i + self.size])
+            i += self.size
+
+        for scr_no, new in added.items():
+            self._codes[scr_no].update(dict.fromkeys(new))
+            self._scr.update(dict.fromkeys(new, scr_no))
+            # '1' to keep codes registered before, while '0' removes them
+            self.api.set_real_reg(scr_no, ';'.join(new), self.fids, '1')
+        return dict(added)
+
+    def remove(self, codes):
+        """
+        Unregisters codes, only on the screens that had them.
+
+        Screens with no code left are disconnected and become available again.
+
+        :param codes: str or list of str
+        :return: dict
+            {scr_no: [code, ...]} of codes unregistered
+        """
+        removed = defaultdict(list)
+        for code in dict.fromkeys(self._list(codes)):
+            scr_no = self._scr.pop(code, None)
+            if scr_no is not None:
+                del self._codes[scr_no][code]
+                removed[scr_no].append(code)
+
+        for scr_no, old in removed.items():
+            if self._codes[scr_no]:
+                for code in old:
+                    self.api.set_real_remove(scr_no, code)
+            else:
+                self.api.disconnect_real_data(scr_no)
+                self._close(scr_no)
+        return dict(removed)
+
+    def compact(self):
+        """
+        Moves codes from the least filled screens into holes of the others, until codes
+        take the minimum number of screens.
+
+        :return: dict
+            {scr_no: [code, ...]} of codes moved into each screen
+        """
+        moved = defaultdict(list)
+        while len(self._codes) > ceil(len(self._scr) / self.size):
+            # The least filled screen, and the highest number among them
+            scr_no = min(self._codes, key=lambda scr: (len(self._codes[scr]), -int(scr)))
+            codes = list(self._codes[scr_no])
+            self.remove(codes)
+            for scr, new in self.add(codes).items():
+                moved[scr].extend(new)
+        return dict(moved)
+
+    def clear(self):
+        """
+        Unregisters all codes and disconnects all screens.
+        """
+        self.remove(list(self._scr))
+
+    def _open(self):
+        scr_no = self.screen.acquire('real')
+        self._codes[scr_no] = dict()
+        return scr_no
+
+    def _close(self, scr_no):
+        del self._codes[scr_no]
+        self.screen.release(scr_no)
+
+    @staticmethod
+    def _list(codes):
+        return [codes] if isinstance(codes, str) else list(codes)
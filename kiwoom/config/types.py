@@ -24,6 +24,7 @@ class ExitType(Enum):
     # Return codes
     SUCCESS = 0
     FAILURE = -1
+    RESTART = 1  # pending jobs remain in the queue
     # Hidden config
     IMPOSSIBLE = 712
 
@@ -31,6 +32,17 @@ class ExitType(Enum):
         return self.value
 
 
+class PriorityType(Enum):
+    # Lower value is scheduled first
+    URGENT = 0  # orders
+    INTERACTIVE = 1  # account inquiries and requests while trading
+    NORMAL = 2
+    BULK = 3  # background downloads
+
+    def __int__(self):
+        return self.value
+
+
 # Global variables
 STOCK = CodeType.STOCK
 SECTOR = CodeType.SECTOR
@@ -41,3 +53,8 @@ MULTI = OutputType(1)
 SUCCESS = ExitType.SUCCESS
 FAILURE = ExitType.FAILURE
 IMPOSSIBLE = ExitType.IMPOSSIBLE
+
+URGENT = PriorityType.URGENT
+INTERACTIVE = PriorityType.INTERACTIVE
+NORMAL = PriorityType.NORMAL
+BULK = PriorityType.BULK
@@ -1,11 +1,21 @@
 from . import (
+    aio,
     bot,
+    bus,
     connector,
     kiwoom,
-    server
+    scheduler,
+    server,
+    shard,
+    supervisor
 )
 
+from .aio import AsyncKiwoom
 from .bot import Bot
+from .bus import Bus
 from .connector import Connector
 from .kiwoom import Kiwoom
+from .scheduler import Scheduler
 from .server import Server
+from .shard import Orchestrator
+from .supervisor import Supervisor
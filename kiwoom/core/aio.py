@@ -0,0 +1,443 @@
+"""
+asyncio bridge of Kiwoom
+
+Kiwoom.loop() blocks by running a nested QEventLoop, so that only one request can wait
+for its response at a time. Instead, asyncio event loop can run on top of Qt event loop,
+and every response resolves an asyncio.Future by Kiwoom.observe(). Then many requests
+can be in flight at once without nested loops, and workflows can be composed with
+asyncio.gather(), asyncio.wait_for() and so on.
+
+QtEventLoop
+    asyncio event loop that waits in a QEventLoop instead of select(). Sockets of asyncio
+    are watched by QSocketNotifier and the wait ends at the next asyncio timer by QTimer,
+    or as soon as any Qt event schedules a callback, ex) a response resolving a Future.
+    Hence, nothing is polled and the process sleeps while there's no event.
+
+1) AsyncKiwoom.login()
+    Awaits on_event_connect and returns the error code.
+
+2) AsyncKiwoom.request(tr_code, inputs, rq_name)
+    Awaits on_receive_tr_data of the rq_name and returns Response. Since data must be
+    fetched inside the event, keys of single and multi data are to be given in advance.
+
+3) AsyncKiwoom.events(event) & AsyncKiwoom.real(codes, real_type, fids)
+    Async iterators over events such as on_receive_real_data and on_receive_chejan_data.
+
+Note that blocking methods such as Bot.history() still work in coroutines, since events
+are processed in their nested loops, but the other coroutines wait until they return.
+
+Usage example
+>>  async def main(api):
+>>      aio = AsyncKiwoom(api)
+>>      await aio.login()
+>>
+>>      # Two requests in flight at once
+>>      samsung, hynix = await asyncio.gather(
+>>          aio.request('opt10001', {'종목코드': '005930'}, single=['현재가']),
+>>          aio.request('opt10001', {'종목코드': '000660'}, single=['현재가'])
+>>      )
+>>
+>>      api.set_real_reg('1000', '005930', '10;15', '0')
+>>      async for code, real_type, rec in aio.real(real_type='주식체결', fids=[10, 15]):
+>>          print(code, rec.현재가, rec.거래량)
+>>
+>>  app = QApplication(sys.argv)
+>>  run(main(Kiwoom()))
+"""
+import asyncio
+import selectors
+from collections import namedtuple
+from functools import partial
+from itertools import count
+from math import ceil
+
+from PyQt5.QtCore import QEventLoop, QSocketNotifier, Qt, QTimer
+from PyQt5.QtWidgets import QApplication
+
+from kiwoom.config.error import msg
+from kiwoom.config.screen import Screen
+from kiwoom.config.types import NORMAL
+
+
+# Result of AsyncKiwoom.request()
+Response = namedtuple('Response', ['tr_code', 'rq_name', 'prev_next', 'single', 'multi', 'msg'])
+
+
+class QtSelector(selectors.SelectSelector):
+    """
+    Selector that waits for Qt events as well as sockets, used by QtEventLoop.
+
+    Each registered socket is watched by QSocketNotifier, and select() runs a QEventLoop
+    until any socket is ready, the timeout expires or QtSelector.wake() is called.
+    """
+    def __init__(self):
+        super().__init__()
+        self._notifiers = dict()  # {fd: [(event, QSocketNotifier), ...]}
+        self._ready = dict()  # {fd: events}
+        self._qloop = QEventLoop()
+        self._timer = QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self.wake)
+
+    def register(self, fileobj, events, data=None):
+        key = super().register(fileobj, events, data)
+        notifiers = list()
+        for event, kind in ((selectors.EVENT_READ, QSocketNotifier.Read), (selectors.EVENT_WRITE, QSocketNotifier.Write)):
+            if events & event:
+                notifier = QSocketNotifier(key.fd, kind)
+                notifier.activated.connect(partial(self._activated, key.fd, event))
+                notifiers.append((event, notifier))
+        self._notifiers[key.fd] = notifiers
+        return key
+
+    def unregister(self, fileobj):
+        key = super().unregister(fileobj)
+        for _, notifier in self._notifiers.pop(key.fd, list()):
+            notifier.setEnabled(False)
+            notifier.deleteLater()
+        self._ready.pop(key.fd, None)
+        return key
+
+    def select(self, timeout=None):
+        if self._ready or (timeout is not None and timeout <= 0):
+            # Callbacks are ready, so that Qt events are processed without waiting
+            self._qloop.processEvents(QEventLoop.AllEvents)
+        else:
+            if timeout is not None:
+                self._timer.start(ceil(timeout * 1000))
+            self._qloop.exec_()
+            self._timer.stop()
+
+        ready, self._ready = self._ready, dict()
+        lst = list()
+        for fd, events in ready.items():
+            # Notifiers are enabled again, as asyncio reads or writes the socket from now
+            for _, notifier in self._notifiers.get(fd, list()):
+                notifier.setEnabled(True)
+            key = self.get_map().get(fd)
+            if key is not None:
+                lst.append((key, events & key.events))
+        return lst
+
+    def wake(self):
+        """
+        Stops waiting in select(), ex) when a callback is scheduled by a Qt event.
+        """
+        if self._qloop.isRunning():
+            self._qloop.quit()
+
+    def close(self):
+        for fd in list(self._notifiers):
+            for _, notifier in self._notifiers.pop(fd):
+                notifier.setEnabled(False)
+                notifier.deleteLater()
+        self._timer.stop()
+        super().close()
+
+    def _activated(self, fd, event, *args):
+        # Disabled until asyncio handles it, not to be fired again while the socket is ready
+        self._ready[fd] = self._ready.get(fd, 0) | event
+        for evt, notifier in self._notifiers.get(fd, list()):
+            if evt == event:
+                notifier.setEnabled(False)
+        self.wake()
+
+
+class QtEventLoop(asyncio.SelectorEventLoop):
+    """
+    asyncio event loop running on Qt event loop, see QtSelector.
+
+    QApplication must be created first, and the loop must run in the main thread.
+    """
+    def __init__(self):
+        if QApplication.instance() is None:
+            raise RuntimeError('QApplication must be created first. Try app = QApplication(sys.argv).')
+        super().__init__(QtSelector())
+
+    def call_soon(self, callback, *args, context=None):
+        # Callbacks scheduled by Qt events, such as set_result(), end the wait at once
+        handle = super().call_soon(callback, *args, context=context)
+        self._selector.wake()
+        return handle
+
+    def call_at(self, when, callback, *args, context=None):
+        # The wait must end earlier for a new timer scheduled by Qt events
+        handle = super().call_at(when, callback, *args, context=context)
+        self._selector.wake()
+        return handle
+
+
+def run(coro):
+    """
+    Runs the coroutine in a new QtEventLoop, just like asyncio.run().
+
+    :param coro: coroutine
+    :return: any
+        return of the coroutine
+    """
+    loop = QtEventLoop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(coro)
+
+    finally:
+        try:
+            # To cancel tasks left, such as async iterators not closed
+            tasks = [task for task in asyncio.all_tasks(loop) if not task.done()]
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+
+class AsyncKiwoom:
+    """
+    Awaitable wrapper of Kiwoom on asyncio event loop
+
+    Requests are sent as soon as Kiwoom.limiter allows, without blocking. If a scheduler
+    is given, requests are submitted to it instead, so that they are dispatched in order
+    with the requests of the bot, ex) AsyncKiwoom(bot.api, bot.scheduler, bot.scr).
+
+    :param api: kiwoom.Kiwoom
+    :param scheduler: kiwoom.core.scheduler.Scheduler, optional
+    :param screen: kiwoom.config.screen.Screen, optional
+        pool of screens to share with the bot, new one if None
+    """
+    def __init__(self, api, scheduler=None, screen=None):
+        self.api = api
+        self.scheduler = scheduler
+        self.scr = Screen() if screen is None else screen
+
+        self._seq = count()
+        self._logins = list()
+        self._pending = dict()  # {rq_name: (future, single, multi)}
+        self._msgs = dict()  # {rq_name: last message}
+
+        self._observers = {
+            'on_event_connect': self._on_event_connect,
+            'on_receive_msg': self._on_receive_msg,
+            'on_receive_tr_data': self._on_receive_tr_data
+        }
+        for event, fn in self._observers.items():
+            api.observe(event, fn)
+
+    def close(self):
+        """
+        Stops observing events and cancels all requests waiting for responses.
+        """
+        for event, fn in self._observers.items():
+            self.api.unobserve(event, fn)
+        for fut in self._logins + [fut for fut, _, _ in self._pending.values()]:
+            fut.cancel()
+        self._logins.clear()
+        self._pending.clear()
+
+    async def login(self, timeout=None):
+        """
+        Requests login and waits for on_event_connect.
+
+        :param timeout: float, optional
+            seconds to wait for the response
+        :return: int
+            error code passed into on_event_connect, 0 if succeeded
+        """
+        fut = asyncio.get_running_loop().create_future()
+        self._logins.append(fut)
+        self.api.comm_connect()
+        return await asyncio.wait_for(fut, timeout)
+
+    async def request(
+            self,
+            tr_code,
+            inputs,
+            rq_name=None,
+            single=None,
+            multi=None,
+            prev_next='0',
+            scr_no=None,
+            priority=NORMAL,
+            lane='quote',
+            timeout=None
+    ):
+        """
+        Sends a TR request and waits for on_receive_tr_data of the rq_name.
+
+        Values in Response are raw strings from the server, pre-processing is needed.
+
+        :param tr_code: str
+        :param inputs: dict
+            {id: value} to be set by Kiwoom.set_input_value() before the request
+        :param rq_name: str, optional
+            unique name among requests in flight, generated if not given
+        :param single: list of str, optional
+            keys of single data to fetch, ex) ['현재가', '거래량']
+        :param multi: list of str, optional
+            keys of multi data to fetch as columns by Kiwoom.get_comm_data_columns()
+        :param prev_next: str
+            '2' to request the next page, '0' otherwise
+        :param scr_no: str, optional
+            screen number, acquired from the pool for the request if not given
+        :param priority: kiwoom.config.types.PriorityType
+            priority in the scheduler, if given
+        :param lane: str
+            lane in the scheduler, if given
+        :param timeout: float, optional
+            seconds to wait for the response
+        :return: Response
+        """
+        rq_name = f'aio{next(self._seq)}' if rq_name is None else rq_name
+        if rq_name in self._pending:
+            raise KeyError(f"Request with rq_name, '{rq_name}', is already in flight.")
+        acquired = scr_no is None
+        scr_no = self.scr.acquire('tr') if acquired else scr_no
+
+        def send():
+            for key, val in inputs.items():
+                self.api.set_input_value(key, val)
+            return self.api.comm_rq_data(rq_name, tr_code, prev_next, scr_no)
+
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending[rq_name] = (fut, list(single or []), list(multi or []))
+        try:
+            ret = await self._send(send, priority, lane)
+            if ret != 0:
+                raise RuntimeError(f"Request of '{tr_code}' with rq_name '{rq_name}' failed.\n  * {msg(ret)}")
+            return await asyncio.wait_for(fut, timeout)
+
+        finally:
+            if self._pending.get(rq_name, (None,))[0] is fut:
+                del self._pending[rq_name]
+            self._msgs.pop(rq_name, None)
+            if acquired:
+                self.api.disconnect_real_data(scr_no)
+                self.scr.release(scr_no)
+
+    async def _send(self, fn, priority, lane):
+        # To wait for the limiter without blocking, then set inputs and send at once
+        if self.scheduler is None:
+            delay = self.api.limiter.wait()
+            while delay > 0:
+                await asyncio.sleep(delay)
+                delay = self.api.limiter.wait()
+            return fn()
+
+        sent = asyncio.get_running_loop().create_future()
+
+        def dispatch():
+            try:
+                sent.set_result(fn())
+            except Exception as err:
+                sent.set_exception(err)
+
+        req = self.scheduler.submit(dispatch, priority=priority, lane=lane)
+        try:
+            return await sent
+        finally:
+            req.cancel()
+
+    async def events(self, event, fetch=None, maxsize=0):
+        """
+        Async iterator over the args of the event.
+
+        Events are observed from the first iteration until the iterator is closed by
+        aclose() or garbage collected. If the queue is full, the oldest one is dropped.
+
+        :param event: str
+            One of the pre-defined event names in string. See kiwoom.config.events.
+        :param fetch: callable, optional
+            function called inside the event with its args, which returns an item to
+            yield or None to skip. Data such as GetChejanData must be fetched in here.
+        :param maxsize: int
+            maximum number of items in the queue, unlimited if 0
+        """
+        queue = asyncio.Queue(maxsize)
+
+        def put(*args):
+            _put(queue, args if fetch is None else fetch(*args))
+
+        self.api.observe(event, put)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self.api.unobserve(event, put)
+
+    async def real(self, codes=None, real_type=None, fids=None, maxsize=0):
+        """
+        Async iterator over on_receive_real_data of given codes and real type.
+
+        Events are filtered by Kiwoom.bus before any Python function is called, see
+        kiwoom.core.bus. The rest is the same as AsyncKiwoom.events().
+
+        :param codes: str or list of str, optional
+            codes to yield, all codes if not given
+        :param real_type: str, optional
+            real type to yield, ex) '주식체결'
+        :param fids: list of int, optional
+            FIDs to decode into a record, raw real_data is yielded if not given.
+            real_type must be given to decode, see kiwoom.data.real.Decoder.
+        :param maxsize: int
+            maximum number of items in the queue, unlimited if 0
+        :return: async iterator
+            (code, real_type, record) or (code, real_type, real_data)
+        """
+        queue = asyncio.Queue(maxsize)
+
+        def put(code, rtype, data):
+            _put(queue, (code, rtype, data))
+
+        self.api.subscribe(put, real_type, codes, fids)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self.api.unsubscribe(put, real_type, codes)
+
+    """
+    Observers
+    """
+    def _on_event_connect(self, err_code):
+        logins, self._logins = self._logins, list()
+        for fut in logins:
+            if not fut.done():
+                fut.set_result(err_code)
+
+    def _on_receive_msg(self, scr_no, rq_name, tr_code, msg):
+        if rq_name in self._pending:
+            self._msgs[rq_name] = msg
+
+    def _on_receive_tr_data(self, scr_no, rq_name, tr_code, record_name, prev_next):
+        if rq_name not in self._pending:
+            return
+
+        fut, single, multi = self._pending.pop(rq_name)
+        if fut.done():
+            return
+
+        # Data is valid only inside of the event
+        try:
+            fut.set_result(Response(
+                tr_code,
+                rq_name,
+                prev_next,
+                {key: self.api.get_comm_data(tr_code, rq_name, 0, key) for key in single},
+                self.api.get_comm_data_columns(tr_code, rq_name, multi) if multi else dict(),
+                self._msgs.pop(rq_name, None)
+            ))
+        except Exception as err:
+            fut.set_exception(err)
+
+
+def _put(queue, item):
+    # To drop the oldest item if the queue is full
+    if item is None:
+        return
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(item)
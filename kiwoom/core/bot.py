@@ -1,19 +1,21 @@
 from os import getcwd
-from os.path import join
 from textwrap import dedent
 from time import time
 from traceback import format_exc
 
-from pandas import read_csv, DateOffset
-from PyQt5.QtTest import QTest
+from pandas import DateOffset
 from PyQt5.QtWidgets import QApplication
 
 from kiwoom import config
 from kiwoom.config import history
 from kiwoom.config.screen import Screen
-from kiwoom.config.types import ExitType
+from kiwoom.config.types import BULK, ExitType
 from kiwoom.core.kiwoom import Kiwoom
+from kiwoom.core.scheduler import Scheduler
 from kiwoom.core.server import Server
+from kiwoom.data import storage
+from kiwoom.data.jobs import DONE, PENDING, JobQueue
+from kiwoom.data.manifest import Manifest
 from kiwoom.data.share import Share
 from kiwoom.utils.general import *
 from kiwoom.utils.manager import Downloader, timer
@@ -24,6 +26,7 @@ class Bot:
         self.api: Kiwoom = Kiwoom()
         self.scr: Screen = Screen()
         self.share: Share = Share()
+        self.scheduler: Scheduler = Scheduler(self.api)
 
         # Connect server as a slot
         self.server: Server = server if issubclass(type(server), Server) else Server()
@@ -81,6 +84,45 @@ class Bot:
                 lst.append(sector.split(',')[1])
             return sorted(lst)
 
+    def codes(self, market=None, sector=None) -> list[str]:
+        """
+        Returns codes to download in the given market or sector, used by Bot.histories()
+
+        Stocks also listed in NXT are replaced by their integrated codes with '_AL', such
+        as '005930_AL', so that trades of both KRX and NXT are downloaded.
+
+        :param market: str
+            one of market code in kiwoom.config.markets
+        :param sector: str
+            one of market_gubun code in kiwoom.config.market_gubuns
+        """
+        if not any([market, sector]) or all([market, sector]):
+            raise RuntimeError("Download target must be either of 'market' or 'sector'.")
+
+        if market is not None:
+            market = market.upper()
+            if market != 'NXT':
+                krx = set(self.stock_list(market))
+                nxt = set(self.stock_list('NXT'))
+                nxt.intersection_update(krx)
+                sor = set([c + '_AL' for c in list(nxt)])
+                lst = (krx - nxt) | sor
+                return sorted(list(lst))
+            return [c + '_AL' for c in self.stock_list(market)]
+
+        return self.sector_list(sector)
+
+    def downloaded(self, code):
+        """
+        Hook called by Bot.histories() whenever an item is successfully downloaded.
+
+        Does nothing by default. Override or assign it to track progress, ex) in workers
+        of kiwoom.core.shard.Orchestrator.
+
+        :param code: str
+        """
+        pass
+
     def history(
             self,
             code,
@@ -91,10 +133,13 @@ class Bot:
             path=None,
             merge=True,
             warning=True,
-            prev_next='0'
+            fmt=None,
+            prev_next='0',
+            rq_name=None,
+            wait=True
     ):
         """
-        Download historical market data of given code and save it as csv to given path
+        Download historical market data of given code and save it as csv (by default) to given path
 
         :param code: str
             unique code of stock or sector
@@ -112,14 +157,20 @@ class Bot:
             whether to merge data with existing file or to overwrite it
         :param warning: bool
             turn on/off the warning message if any
+        :param fmt: str or kiwoom.data.storage.Storage
+            file format to save data, one of 'csv', 'parquet' and 'feather'. 'csv' by default.
         :param prev_next: str
             this param is given by the response from the server. default is '0'
+        :param rq_name: str
+            key of the download in requests and shared data, 'history' by default.
+            downloads at the same time must have different rq_names, see Bot.histories().
+        :param wait: bool
+            whether to wait until downloading is done. if False, this returns right after
+            submitting the request, and Share.get_single(rq_name, ...) tells the status.
         """
-        # Wait for default request limit, 3600 ms
-        QTest.qWait(history.REQUEST_LIMIT_TIME)
-
         ctype = history.get_code_type(code)  # ctype = 'stock' | 'sector'
         tr_code = history.get_tr_code(period, ctype)
+        rq_name = name() if rq_name is None else rq_name
 
         """
             Setting args just for once.
@@ -130,12 +181,13 @@ class Bot:
                 path = getcwd()
 
             # To share variables with Slot
-            kwargs = effective_args(locals(), remove=['ctype', 'tr_code'])
-            self.share.remove_single(name())
-            self.share.update_single(name(), 'error', False)
-            self.share.update_single(name(), 'restart', False)
-            self.share.update_single(name(), 'complete', False)
-            self.share.update_single(name(), 'impossible', False)
+            kwargs = effective_args(locals(), remove=['ctype', 'tr_code', 'rq_name', 'wait'])
+            self.share.remove_single(rq_name)
+            self.share.update_single(rq_name, 'error', False)
+            self.share.update_single(rq_name, 'restart', False)
+            self.share.update_single(rq_name, 'complete', False)
+            self.share.update_single(rq_name, 'impossible', False)
+            self.share.update_single(rq_name, 'wait', wait)
 
             # To check format of input dates
             if 'start' in kwargs:
@@ -150,21 +202,24 @@ class Bot:
             """
             if merge:
                 try:
-                    file = join(path, code + '.csv')
+                    # Probe only the last timestamp from manifest or file, not to load the whole file
                     col = history.get_datetime_column(period)
-                    df = read_csv(
-                        file,
-                        index_col=[col],
-                        parse_dates=[col],
-                        encoding=config.ENCODING
-                    )
+                    store = storage.get(fmt)
+                    file = store.file(path, code)
+                    entry = Manifest(path).fresh(file) if history.MANIFEST else None
+                    if entry is not None:
+                        last = Timestamp(entry['last']) if entry['last'] else None
+                    else:
+                        last = store.last(file, col)
+                    if last is None:
+                        raise ValueError('No data in the existing file.')
 
                     if period in ['tick', 'min']:
                         # Last tick for stock is 15:30 and for sector is 18:00
                         h, m = (15, 30) if ctype is history.STOCK else (18, 00)  # else for sector
-                        last_day = date(df.index[-1])
-                        last_tick_of_day = Timestamp(df.index[-1]).replace(hour=h, minute=m)
-                        download_completed = last_tick_of_day <= df.index[-1]
+                        last_day = date(last)
+                        last_tick_of_day = Timestamp(last).replace(hour=h, minute=m)
+                        download_completed = last_tick_of_day <= last
 
                         # To push 'start' date further as much as possible. If None, set newly.
                         if 'start' not in kwargs or date(kwargs['start']) <= last_day:
@@ -179,11 +234,11 @@ class Bot:
                         if 'end' in kwargs:
                             if download_completed:
                                 if date(kwargs['end']) <= last_day:
-                                    self.share.update_single(name(), 'complete', True)
+                                    self.share.update_single(rq_name, 'complete', True)
                                     return
 
                     else:  # if period in ['day', 'week', 'month', 'year']
-                        last_day = date(df.index[-1])
+                        last_day = date(last)
                         # To push 'start' date further as much as possible. If None, set newly.
                         if 'start' not in kwargs or date(kwargs['start']) <= last_day:
                             # Start from the last day
@@ -192,12 +247,9 @@ class Bot:
                         # If downloading is not needed, just return
                         if 'end' in kwargs:
                             if date(kwargs['end']) < last_day:
-                                self.share.update_single(name(), 'complete', True)
+                                self.share.update_single(rq_name, 'complete', True)
                                 return
 
-                    # Once read, use later in Server.history_to_csv() to increase efficiency
-                    self.share.update_single(name(), 'file', df)
-
                 # If any exception, just skip
                 except Exception as err:
                     pass
@@ -206,7 +258,7 @@ class Bot:
                 Update and print arguments. 
             """
             # Done arg setting
-            self.share.update_args(name(), kwargs)
+            self.share.update_args(rq_name, kwargs)
 
             # Print args
             f = lambda key: f"'{kwargs[key]}'" if key in kwargs else None
@@ -222,26 +274,94 @@ class Bot:
                 if self.share.get_single('histories', 'nrq') >= history.REQUEST_LIMIT_TRY:
                     # Set back to default configuration
                     if self.share.get_single('histories', 'cnt') == 0:
-                        self.share.update_single(name(), 'impossible', True)
-                    self.share.update_single(name(), 'restart', True)
+                        self.share.update_single(rq_name, 'impossible', True)
+                    self.share.update_single(rq_name, 'restart', True)
                     self.api.unloop()
                     return
 
         # Finally request data to server
-        for key, val in history.inputs(tr_code, code, unit, end):
-            self.api.set_input_value(key, val)
-        scr_no = self.scr.alloc(tr_code, code)
+        if prev_next != '0':
+            # Continued by the slot with the same way of waiting as the first request
+            wait = self.share.get_single(rq_name, 'wait')
+
+        # Downloads at the same time need their own screens, released by the slot when done
+        scr_no = self.scr.reserve(rq_name)
+
+        def request():
+            for key, val in history.inputs(tr_code, code, unit, end):
+                self.api.set_input_value(key, val)
+            return self.api.comm_rq_data(rq_name, tr_code, prev_next, scr_no)
+
+        retry = history.ADAPTIVE_RETRY if history.ADAPTIVE else 0
+        if not wait:
+            # Response will be handled by the slot, while the caller waits for others
+            self._request(rq_name, request, retry)
+            return
+
+        for _ in range(1 + retry):
+            # Requests with higher priority such as account inquiries can go first
+            ret = self.scheduler.run(request, priority=BULK, lane='quote')
+
+            # In adaptive mode, retry after the throttle backs off if overloaded
+            if ret != -200:  # OP_ERR_SISE_OVERFLOW
+                break
 
         # If comm_rq_data returns non-zero error code, restart downloading
-        if self.api.comm_rq_data(name(), tr_code, prev_next, scr_no) != 0:
-            self.share.update_single(name(), 'impossible', True)
-            self.share.update_single(name(), 'restart', True)
+        if ret != 0:
+            self.share.update_single(rq_name, 'impossible', True)
+            self.share.update_single(rq_name, 'restart', True)
+            self._release(rq_name)
             self.api.unloop()
             return
 
         # Wait response from the server
         self.api.loop()
 
+    def _release(self, rq_name):
+        """
+        Releases the screen reserved by Bot.history() for rq_name, if any.
+
+        :param rq_name: str
+        """
+        scr_no = self.scr.release(rq_name)
+        if scr_no is not None:
+            # Not to receive data of the request any more
+            self.api.disconnect_real_data(scr_no)
+
+    def _request(self, rq_name, fn, retry=0):
+        """
+        Submits a request of Bot.history() to the scheduler without waiting.
+
+        If the request fails, the status of rq_name in Share is updated and Kiwoom.unloop()
+        is called, just like when the response is handled by Server.history().
+
+        :param rq_name: str
+        :param fn: callable
+            function that sets inputs and sends a request, returning an error code
+        :param retry: int
+            number of retries when the server is overloaded
+        """
+        def send():
+            try:
+                return fn()
+            except Exception:
+                self.share.update_single(rq_name, 'error', True)
+                self.api.unloop()
+                raise
+
+        def sent(ret):
+            # In adaptive mode, retry after the throttle backs off if overloaded
+            if ret == -200 and retry > 0:  # OP_ERR_SISE_OVERFLOW
+                self._request(rq_name, fn, retry - 1)
+
+            # If comm_rq_data returns non-zero error code, restart downloading
+            elif ret != 0:
+                self.share.update_single(rq_name, 'impossible', True)
+                self.share.update_single(rq_name, 'restart', True)
+                self.api.unloop()
+
+        self.scheduler.submit(send, priority=BULK, lane='quote', callback=sent)
+
     @Downloader.watcher
     def histories(
             self,
@@ -255,10 +375,14 @@ class Bot:
             code=None,
             path=None,
             merge=False,
-            warning=True
+            warning=True,
+            fmt=None,
+            concurrency=None,
+            codes=None,
+            jobs=None
     ):
         """
-        Download historical data of partial or all items in given market/sector and save it as csv file.
+        Download historical data of partial or all items in given market/sector and save it as csv (by default) file.
 
         :param market: str
             one of market type in string
@@ -276,18 +400,31 @@ class Bot:
             path to save downloaded data
         :param slice: tuple of int
             partially download from the whole items in specific market.
-            slice can be one of (from, to), (from, None) or (None, to)
+            slice can be one of (from, to), (from, None) or (None, to), or (from, to, skip)
+            as returned to restart, where indices in skip are already downloaded.
         :param code: str
             unique code of stock or sector to start downloading from.
         :param merge: bool
             whether to merge data with existing file or to overwrite it
         :param warning: bool
             turn on/off the warning message if any
+        :param fmt: str or kiwoom.data.storage.Storage
+            file format to save data, one of 'csv', 'parquet' and 'feather'. 'csv' by default.
+        :param concurrency: int
+            number of items downloaded at once, history.DOWNLOAD_CONCURRENCY by default.
+            requests of all items share the same rate limits, but responses overlap.
+        :param codes: list of str
+            codes to download instead of the ones in market/sector, see Bot.codes().
+        :param jobs: str or kiwoom.data.jobs.JobQueue
+            persistent queue of jobs, or path to its SQLite file. Items of market, sector
+            or codes if given are added as jobs unless already in it, and pending jobs are
+            downloaded in order, so that any restart resumes where it stopped.
 
         :return: int or tuple
             if successfully download all, returns 0 (= ExitCode.success)
             if download failed by local errors, returns -1 (= ExitCode.failure)
-            if download restart is needed, returns slice that can be used in the next run
+            if download restart is needed, returns slice that can be used in the next run,
+            or 1 (= ExitCode.restart) with jobs, where pending jobs remain in the queue.
         """
         if not path:
             path = getcwd()
@@ -302,35 +439,42 @@ class Bot:
             Validate given arguments
         """
         # To decide what to download
-        lst, ctype, mname = None, None, None
-        if not any([market, sector]) or all([market, sector]):
-            raise RuntimeError("Download target must be either of 'market' or 'sector'.")
-        elif market is not None:
-            market = market.upper()
-            ctype, mname = str(history.STOCK).lower(), history.MARKETS[market]
-            if market != 'NXT':
-                krx = set(self.stock_list(market))
-                nxt = set(self.stock_list('NXT'))
-                nxt.intersection_update(krx)
-                sor = set([c + '_AL' for c in list(nxt)])
-                lst = (krx - nxt) | sor
-                lst = sorted(list(lst))
+        if codes is not None:
+            if any([market, sector]):
+                raise RuntimeError("Download target must be one of 'market', 'sector' or 'codes'.")
+            lst = list(codes)
+            ctype = str(history.get_code_type(lst[0])).lower() if lst else str(history.STOCK).lower()
+            mname = 'given codes'
+        elif any([market, sector]) or jobs is None:
+            lst = self.codes(market, sector)
+            if market is not None:
+                ctype, mname = str(history.STOCK).lower(), history.MARKETS[market.upper()]
             else:
-                lst = self.stock_list(market)
-                lst = [c + '_AL' for c in lst]
-        elif sector is not None:
-            ctype, mname = str(history.SECTOR).lower(), history.MARKET_GUBUNS[sector]
-            lst = self.sector_list(sector)
-        
+                ctype, mname = str(history.SECTOR).lower(), history.MARKET_GUBUNS[sector]
+        else:
+            # Only the jobs already in the queue
+            lst, ctype, mname = list(), 'job', None
+
         # Set the portion in download list
-        from_, to_ = 0, None
-        if all([slice, code]):
+        from_, to_, skip = 0, None, ()
+        if jobs is not None:
+            if any([slice, code]):
+                raise RuntimeError("Neither of 'slice' and 'code' is available with 'jobs', which resume by themselves.")
+            if isinstance(jobs, str):
+                jobs = JobQueue(jobs)
+
+            # Jobs left running by the last run that died are to be downloaded again
+            jobs.add(lst, period, unit, start, end)
+            jobs.recover()
+            ctype, mname = 'job', jobs.file
+        elif all([slice, code]):
             raise RuntimeError("Only one option is available: either of 'slice' or 'start_code'.")
         # Option1 - Slice
         elif slice is not None:
             try:
-                from_, to_ = slice
-            except ValueError:
+                from_, to_, *skip = slice
+                from_, skip = from_ or 0, skip[0] if skip else ()
+            except (ValueError, IndexError):
                 raise ValueError(f'Slice must be (from, to), (from, None), or (None, to) not {slice}.')
         # Option2 - Code
         elif code is not None:
@@ -339,6 +483,10 @@ class Bot:
         # Select target in download list
         tot = len(lst)
         lst = lst[from_: to_]
+        if jobs is not None:
+            # Pending jobs are claimed one by one, instead of the list
+            from_, tot = jobs.count(DONE), jobs.count()
+            lst = range(jobs.count(PENDING))
 
         # To print progress bar
         divisor = history.DOWNLOAD_PROGRESS_DISPLAY
@@ -353,64 +501,153 @@ class Bot:
         status = ''
         begin = time()
         print(f'Download Start for {len(lst)} {ctype}s in {mname}.')
-        print(f' - Encoding : {config.ENCODING}\n - DataPath : {path}')
-
-        for i, code in enumerate(lst):
-            if i % divisor == 0:
-                pct = ((from_ + i) / tot) * 100
-                print(f'Downloading ..\t{pct: .1f}% ({from_ + i} of {tot})')
-
-            # Try downloading
-            try:
-                self.history(code, period, unit=unit, start=start, end=end, path=path, merge=merge, warning=warning)
-
-            # 1) Error with starting Bot.history() (at the first call)
-            except Exception:
-                args = unpack_args(self.share.get_args('history'))
-                print(f"\nAn error at Bot.history({args}).\n\n{format_exc()}")
-                return ExitType.FAILURE
-
-            # 2) Error with continuing Signal.history() or Slot.history()
-            if self.share.get_single('history', 'error'):
-                # Note that error message will be printed
-                return ExitType.FAILURE
-
-            # 3) Error with reaching the request limit or error with frozen server
-            elif self.share.get_single('history', 'restart'):
-                # If it's impossible to download with the trick
-                if self.share.get_single('history', 'impossible'):
-                    print(f"\n[{clock()}] The {ctype} {code} can't be downloaded with speeding.")
-                    return ExitType.IMPOSSIBLE
-                break
+        print(f' - Format   : {storage.get(fmt)}\n - Encoding : {config.ENCODING}\n - DataPath : {path}')
+
+        # Each item in flight has its own rq_name, so that its data is kept separately in Share
+        concurrency = history.DOWNLOAD_CONCURRENCY if concurrency is None else concurrency
+        if concurrency < 1:
+            raise ValueError(f"Given concurrency must be a positive integer, not {concurrency}.")
+        rq_names = ['history'] if concurrency == 1 else [f'history{i}' for i in range(concurrency)]
+        for rq_name in rq_names:
+            self.api.connect('on_receive_tr_data', signal=self.history, slot=self.server.history, key=rq_name)
+        self.share.single[name()]['rq_names'] = rq_names
+
+        done = {i - from_ for i in skip}  # indices of items downloaded
+        queue = [(i, code) for i, code in enumerate(lst) if i not in done][::-1]  # items to download
+        active = dict()  # {rq_name: (index, code, job)} of items in flight
+        idle = rq_names[::-1]
+        ecode, stop = None, False
+
+        while active or (queue and not stop):
+            # To start downloading items as many as idle rq_names
+            while idle and queue and not stop:
+                i, code = queue.pop()
+                job = None
+                if jobs is not None:
+                    # To claim the next pending job instead
+                    job = jobs.claim()
+                    if job is None:
+                        queue.clear()
+                        break
+                    code = job.code
 
-            # 4) Unexpected error from Signal.history() or Slot.history()
-            elif not self.share.get_single('history', 'complete'):
-                print(f'\n[{clock()}] Stop downloading due to unexpected error at code {code}.\n')
-                return ExitType.FAILURE
+                rq_name = idle.pop()
+                if i % divisor == 0:
+                    pct = ((from_ + i) / tot) * 100
+                    print(f'Downloading ..\t{pct: .1f}% ({from_ + i} of {tot})')
 
-            """
-                Download completed for one item in the list
-            """
-            # Finally successfully downloaded
-            self.share.single[name()]['cnt'] += 1
-
-            # 5) Successfully downloaded with disciplined, but it's time for speeding again.
-            if history.DISCIPLINED:
-                status = f"[{clock()}] The program needs to be restarted for speeding again."
-                break
-
-            # 6) Successfully downloaded but exceeds request limit items
-            if history.SPEEDING:
-                if self.share.single[name()]['cnt'] >= history.REQUEST_LIMIT_ITEM:
-                    # To check whether items are downloaded by the actual requests to download more if possible
-                    if self.share.single[name()]['nrq'] >= history.REQUEST_LIMIT_ITEM:
-                        break
+                # Try downloading
+                try:
+                    if job is None:
+                        self.history(
+                            code, period, unit=unit, start=start, end=end,
+                            path=path, merge=merge, warning=warning, fmt=fmt,
+                            rq_name=rq_name, wait=False
+                        )
+                    else:
+                        self.history(
+                            code, job.period, unit=job.unit, start=job.start, end=job.end,
+                            path=path, merge=merge, warning=warning, fmt=fmt,
+                            rq_name=rq_name, wait=False
+                        )
+                    active[rq_name] = (i, code, job)
+
+                # 1) Error with starting Bot.history() (at the first call)
+                except Exception:
+                    args = unpack_args(self.share.get_args(rq_name))
+                    print(f"\nAn error at Bot.history({args}).\n\n{format_exc()}")
+                    ecode, stop = ExitType.FAILURE, True
+                    idle.append(rq_name)
+                    self._release(rq_name)
+                    if job is not None:
+                        jobs.fail(job.id, format_exc().strip().splitlines()[-1])
+
+            # Wait until any of items in flight is finished
+            finished = [
+                rq_name for rq_name in active
+                if any(self.share.get_single(rq_name, key) for key in ('error', 'restart', 'complete'))
+            ]
+            if not finished:
+                if active:
+                    self.api.loop()
+                continue
+
+            for rq_name in sorted(finished, key=lambda key: active[key][0]):
+                i, code, job = active.pop(rq_name)
+                idle.append(rq_name)
+                if not self.share.get_single(rq_name, 'complete'):
+                    # The slot releases the screen only when completed
+                    self._release(rq_name)
+
+                # To save the state of the job, even for the ones finished after an error
+                if job is not None:
+                    if self.share.get_single(rq_name, 'error'):
+                        jobs.fail(job.id, 'An error at Bot.history() or Server.history()')
+                    elif self.share.get_single(rq_name, 'restart'):
+                        jobs.release(job.id)
+                    else:
+                        jobs.done(job.id)
+
+                # Items in flight are finished, but no more items are started after an error
+                if ecode is not None:
+                    continue
+
+                # 2) Error with continuing Signal.history() or Slot.history()
+                if self.share.get_single(rq_name, 'error'):
+                    # Note that error message will be printed
+                    ecode, stop = ExitType.FAILURE, True
+                    continue
+
+                # 3) Error with reaching the request limit or error with frozen server
+                elif self.share.get_single(rq_name, 'restart'):
+                    # If it's impossible to download with the trick
+                    if self.share.get_single(rq_name, 'impossible'):
+                        print(f"\n[{clock()}] The {ctype} {code} can't be downloaded with speeding.")
+                        ecode = ExitType.IMPOSSIBLE
+                    stop = True
+                    continue
+
+                """
+                    Download completed for one item in the list
+                """
+                # Finally successfully downloaded
+                done.add(i)
+                self.share.single[name()]['cnt'] += 1
+                self.downloaded(code)
+
+                # 4) Successfully downloaded with disciplined, but it's time for speeding again.
+                if history.DISCIPLINED:
+                    status = f"[{clock()}] The program needs to be restarted for speeding again."
+                    stop = True
+
+                # 5) Successfully downloaded but exceeds request limit items
+                if history.SPEEDING:
+                    if self.share.single[name()]['cnt'] >= history.REQUEST_LIMIT_ITEM:
+                        # To check whether items are downloaded by the actual requests to download more if possible
+                        if self.share.single[name()]['nrq'] >= history.REQUEST_LIMIT_ITEM:
+                            stop = True
+
+        if ecode is not None:
+            return ecode
 
         """
             Close downloading
         """
-        cnt = self.share.get_single(name(), 'cnt')
-        cum = from_ + cnt
+        # Pending jobs are to be downloaded in the next run
+        if jobs is not None:
+            counts = jobs.counts()
+            msg = dedent(
+                f"""
+                Download Done for {counts.get(DONE, 0)} of {sum(counts.values())} jobs in {mname}.
+                Download Time : {(time() - begin) / 60: .1f} minutes (with {self.share.single[name()]['nrq']} requests)\n
+                """
+            ) + status
+            print(msg)
+            return ExitType.RESTART if counts.get(PENDING) else ExitType.SUCCESS
+
+        # Items not downloaded are to be downloaded in the next run, skipping the ones done after them
+        left = [i for i in range(len(lst)) if i not in done]
+        cum = from_ + (left[0] if left else len(lst))
         msg = dedent(
             f"""
             Download Done for {100 * cum / tot if lst else 100: .1f}% ({cum} of {tot}) {ctype}s in {mname}.
@@ -420,10 +657,11 @@ class Bot:
         print(msg)
 
         # If complete
-        if cnt == len(lst):
+        if not left:
             return ExitType.SUCCESS
         # Else return remaining items
-        return cum, to_
+        skip = tuple(from_ + i for i in sorted(done) if i > left[0])
+        return (cum, to_, skip) if skip else (cum, to_)
 
     def exit(self, ecode=0):
         """
@@ -0,0 +1,224 @@
+"""
+Real-time event bus of Kiwoom
+
+on_receive_real_data has no hook, so that a single slot receives every event of every
+code. Bus lets consumers subscribe to specific (real_type, code) pairs instead, and looks
+up subscribers in a two-level table, {real_type: {code: subscribers}}, so that events of
+codes without subscribers never reach any Python slot.
+
+Wildcards
+    None in real_type or code matches any, i.e. (None, '005930') receives every real type
+    of Samsung Electronics and ('주식체결', None) receives trades of all codes.
+
+Subscribers of each (real_type, code) including wildcards are merged once and cached until
+subscriptions change. Bus observes on_receive_real_data only while it has any subscriber.
+
+Fast path
+    When a single subscriber of raw real_data is all there is for a real type, as in the
+    common single-strategy case, the subscriber is bound directly with a check of the real
+    type and a set of codes. Then the table costs no more than a slot that branches by
+    code in Python.
+
+Records
+    If FIDs are given when subscribing, the subscriber receives a record decoded by
+    kiwoom.data.real.Decoder instead of raw real_data. Each event is decoded once for all
+    subscribers of the real type, with the FIDs any of them asked for.
+
+Usage example
+>>  def trade(code, real_type, real_data):
+>>      price = api.get_comm_real_data(code, 10)
+>>
+>>  def quote(code, real_type, rec):
+>>      rec.매도호가, rec.매수호가
+>>
+>>  api.subscribe(trade, '주식체결', ['005930', '000660'])
+>>  api.subscribe(quote, '주식체결', '005930', fids=[27, 28])
+>>  api.set_real_reg('1000', '005930;000660', '10;27;28', '0')
+"""
+from collections import defaultdict
+
+from kiwoom.data.real import Decoder
+
+
+class Bus:
+    """
+    Publisher of real-time events to subscribers of (real_type, code)
+
+    :param api: kiwoom.Kiwoom
+    """
+    event = 'on_receive_real_data'
+
+    def __init__(self, api):
+        self.api = api
+        self._table = defaultdict(dict)  # {real_type: {code: (fn, ...)}}, None for any
+        self._cache = defaultdict(dict)  # {real_type: {code: (raw, decoded)}} merged with wildcards
+        self._fids = dict()  # {(real_type, fn): fids} of subscribers who want records
+        self._decoders = dict()  # {real_type: Decoder}
+
+        # To save attribute lookups for every event
+        self._publish = self._publisher()
+        self._observed = None  # publisher observing on_receive_real_data
+        self.publish = self._publish
+
+    def __len__(self):
+        # Number of subscriptions
+        return sum(len(fns) for codes in self._table.values() for fns in codes.values())
+
+    def subscribe(self, fn, real_type=None, codes=None, fids=None):
+        """
+        Subscribes to real-time events of given real type and codes.
+
+        :param fn: callable
+            function that takes the same args as on_receive_real_data, i.e.
+            fn(code, real_type, real_data). Note that GetCommRealData() is valid in it.
+        :param real_type: str, optional
+            real type such as '주식체결' and '주식호가잔량', any if None
+        :param codes: str or list of str, optional
+            code or codes to subscribe, any if None
+        :param fids: list of int, optional
+            FIDs to decode. If given, fn receives a record instead of real_data, i.e.
+            fn(code, real_type, record), see kiwoom.data.real.Decoder.
+        """
+        if not callable(fn):
+            raise TypeError(f'Given subscriber, {fn}, must be callable.')
+        if fids is not None:
+            if real_type is None:
+                raise ValueError('Real type must be given to decode FIDs.')
+            self._fids[(real_type, fn)] = tuple(int(fid) for fid in fids)
+            self._decoders.pop(real_type, None)
+
+        for code in self._codes(codes):
+            fns = self._table[real_type].get(code, tuple())
+            if fn not in fns:
+                self._table[real_type][code] = fns + (fn,)
+        self._update()
+
+    def unsubscribe(self, fn, real_type=None, codes=None):
+        """
+        Unsubscribes what is subscribed by Bus.subscribe() with the same args.
+
+        :param fn: callable
+        :param real_type: str, optional
+        :param codes: str or list of str, optional
+        """
+        table = self._table.get(real_type, dict())
+        for code in self._codes(codes):
+            fns = tuple(f for f in table.get(code, tuple()) if f != fn)
+            if fns:
+                table[code] = fns
+            else:
+                table.pop(code, None)
+
+        if not table:
+            self._table.pop(real_type, None)
+
+        # To decode only FIDs that remaining subscribers asked for
+        if (real_type, fn) in self._fids:
+            if not any(fn in fns for fns in table.values()):
+                del self._fids[(real_type, fn)]
+            self._decoders.pop(real_type, None)
+        self._update()
+
+    def decoder(self, real_type):
+        """
+        Returns the decoder of FIDs that subscribers to the real type asked for.
+
+        :param real_type: str
+        :return: kiwoom.data.real.Decoder
+        """
+        if real_type not in self._decoders:
+            fids = [fid for (rtype, _), fids in self._fids.items() if rtype == real_type for fid in fids]
+            self._decoders[real_type] = Decoder(self.api, real_type, list(dict.fromkeys(fids)))
+        return self._decoders[real_type]
+
+    def subscribers(self, real_type, code):
+        """
+        Returns subscribers to events of given real type and code including wildcards.
+
+        :param real_type: str
+        :param code: str
+        :return: tuple
+            (subscribers of real_data, subscribers of records)
+        """
+        try:
+            return self._cache[real_type][code]
+        except KeyError:
+            pass
+
+        fns = list()
+        for rtype in (real_type, None):
+            codes = self._table.get(rtype, dict())
+            for key in (code, None):
+                fns.extend(codes.get(key, tuple()))
+
+        # The same subscriber is called once even if it matches several keys
+        fns = tuple(dict.fromkeys(fns))
+        subs = (
+            tuple(fn for fn in fns if (real_type, fn) not in self._fids),
+            tuple(fn for fn in fns if (real_type, fn) in self._fids)
+        )
+        self._cache[real_type][code] = subs
+        return subs
+
+    def _update(self):
+        # To observe the publisher for current subscriptions, only while any subscriber exists
+        self._cache.clear()
+        publish = self._bind() if self._table else None
+        if publish is self._observed:
+            return
+
+        if self._observed is not None:
+            self.api.unobserve(self.event, self._observed)
+        if publish is not None:
+            self.api.observe(self.event, publish)
+        self._observed = publish
+        self.publish = self._publish if publish is None else publish
+
+    def _bind(self):
+        # Returns the subscriber bound directly if it's the only one for a real type, see Fast path
+        if len(self._table) == 1:
+            (real_type, codes), = self._table.items()
+            fns = set(fn for fns in codes.values() for fn in fns)
+            if real_type is not None and len(fns) == 1:
+                fn, = fns
+                if (real_type, fn) not in self._fids:
+                    if None in codes:
+                        def publish(code, rtype, real_data):
+                            if rtype == real_type:
+                                fn(code, rtype, real_data)
+                    else:
+                        keys = frozenset(codes)
+
+                        def publish(code, rtype, real_data):
+                            if rtype == real_type and code in keys:
+                                fn(code, rtype, real_data)
+                    return publish
+        return self._publish
+
+    def _publisher(self):
+        # Returns the function that calls subscribers to given real type and code, which is
+        # called by on_receive_real_data as Bus.publish(code, real_type, real_data).
+        cache, subscribers, decoder = self._cache, self.subscribers, self.decoder
+
+        def publish(code, real_type, real_data):
+            try:
+                raw, decoded = cache[real_type][code]
+            except KeyError:
+                raw, decoded = subscribers(real_type, code)
+
+            for fn in raw:
+                fn(code, real_type, real_data)
+
+            # Decode once for all subscribers who want records
+            if decoded:
+                rec = decoder(real_type)(code, real_data)
+                for fn in decoded:
+                    fn(code, real_type, rec)
+
+        return publish
+
+    @staticmethod
+    def _codes(codes):
+        if codes is None or isinstance(codes, str):
+            return [codes]
+        return list(codes)
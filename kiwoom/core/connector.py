@@ -67,6 +67,13 @@ class Connector:
         self._signals = dict()
         self._slots = dict()
         self._indices = dict()
+        self._observers = dict()
+
+        # Compiled function for each event that forwards args to observers and slot.
+        # It's rebuilt whenever connections change, so that events need no more lookups.
+        self.dispatch = dict()
+        for event in Connector.nargs:
+            self.compile(event)
 
     def signal(self, event, key=None):
         """
@@ -222,6 +229,8 @@ class Connector:
         if not valid:
             raise RuntimeError(f"Unsupported combination of inputs. Please read below.\n\n{self.connect.__doc__}")
 
+        self.compile(event)
+
     def connect_hook(self, event):
         """
         Returns whether a hook is set for the given event.
@@ -274,6 +283,7 @@ class Connector:
         # Initialize structure to get signal/slot method by dic[event][key]
         self._signals[event] = dict()
         self._slots[event] = dict()
+        self.compile(event)
 
     def get_connect_hook(self, event):
         """
@@ -304,6 +314,7 @@ class Connector:
         del self._signals[event]
         del self._slots[event]
         del self._indices[event]
+        self.compile(event)
 
     def get_hook_index(self, event):
         """
@@ -316,6 +327,130 @@ class Connector:
             return self._indices[event]
         return None
 
+    def observe(self, event, fn):
+        """
+        Adds an observer called with the args of the event, regardless of hooks and slots.
+
+        Observers are called after the event handler and before the connected slot. Unlike
+        slots, any number of observers can be added to an event and they don't replace
+        each other, so that they can be used for cross-cutting works such as kiwoom.core.aio.
+
+        :param event: str
+            One of the pre-defined event names in string. See kiwoom.config.EVENTS.
+        :param fn: callable
+            Function that takes the same args as the event
+        """
+        if not valid_event(event):
+            return
+        if not callable(fn):
+            raise TypeError(f'Given observer, {fn}, must be callable.')
+        self._observers[event] = self._observers.get(event, tuple()) + (fn,)
+        self.compile(event)
+
+    def unobserve(self, event, fn):
+        """
+        Removes an observer added by Connector.observe(). If not added, this does nothing.
+
+        :param event: str
+            One of the pre-defined event names in string. See kiwoom.config.EVENTS.
+        :param fn: callable
+        """
+        observers = tuple(obs for obs in self._observers.get(event, tuple()) if obs != fn)
+        if observers:
+            self._observers[event] = observers
+        else:
+            self._observers.pop(event, None)
+        self.compile(event)
+
+    def observers(self, event):
+        """
+        Returns observers added to the event as a tuple.
+
+        :param event: str
+        :return: tuple
+        """
+        return self._observers.get(event, tuple())
+
+    def compile(self, event):
+        """
+        Builds the function that forwards args of the event to observers and connected slot.
+
+        This method is called whenever connections of the event change, i.e. connect(),
+        set_connect_hook(), remove_connect_hook(), observe() and unobserve(). Then every
+        event costs one dict lookup of Connector.dispatch and one call at best, since the
+        connected slot itself is used when no hook and no observer is set.
+
+        :param event: str
+            One of the pre-defined event names in string. See kiwoom.config.EVENTS.
+        :return: function
+            Function that takes the same args as the event
+        """
+        observers = self._observers.get(event, tuple())
+
+        def missing(*args):
+            # Events handled by observers only are fine
+            if not observers:
+                Connector.warn(event, args)
+
+        # If no hook is set, there is only one slot to call
+        if event not in self._hooks:
+            slot = self._slots.get(event, missing)
+            if not observers:
+                fn = slot
+
+            # Observers only, ex) kiwoom.core.bus
+            elif event not in self._slots and len(observers) == 1:
+                fn = observers[0]
+
+            else:
+                def fn(*args):
+                    for obs in observers:
+                        obs(*args)
+                    slot(*args)
+
+        # If hook is set on the event, then key becomes arg that corresponds to the hook
+        # ex) if hook is rq_name for on_receive_tr_data, then key becomes arg passed into rq_name
+        else:
+            slots, idx = self._slots[event], self._indices[event]
+            if not observers:
+                def fn(*args):
+                    slots.get(args[idx], missing)(*args)
+
+            else:
+                def fn(*args):
+                    for obs in observers:
+                        obs(*args)
+                    slots.get(args[idx], missing)(*args)
+
+        self.dispatch[event] = fn
+        return fn
+
+    @staticmethod
+    def warn(event, args):
+        """
+        Prints a warning message that the event is not connected to any slot.
+
+        :param event: str
+        :param args: tuple
+            args passed into the event
+        """
+        if config.MUTE:
+            return
+
+        msg = dedent(
+            f"""
+            kiwoom.{event}({', '.join(map(str, args))}) has been called.
+
+            But the event handler, '{event}', is not connected to any slot.
+            Please try to connect event and slot by using kiwoom.connect() method.
+              >> api.connect('{event}', slot=slot_method)
+
+            This warning message can disappear by the following. 
+              >> kiwoom.config.MUTE = True  # global variable
+            """
+        )
+        print(msg)
+
     @staticmethod
     def map(ehandler):
         """
@@ -328,9 +463,11 @@ class Connector:
         an instance of Kiwoom class. The rest of args depends on which event has been called.
 
         Firstly, execute event handler which is initially an empty method in the module. But
-        this process is needed for when an empty default method is overridden. Then, find the
-        right slot connected to the event. If found, execute it with the same args forwarded
-        from event. If not, just print a warning message. This message can be turned on/off.
+        this process is needed for when an empty default method is overridden, and skipped
+        if the handler is empty. Then, call the function compiled by Connector.compile(),
+        which calls observers added by Connector.observe(), if any, and the right slot
+        connected to the event with the same args forwarded from event. If no slot is found,
+        just print a warning message unless observers exist. This message can be turned on/off.
 
         Usage example
         >>  class Kiwoom(API):
@@ -345,45 +482,26 @@ class Connector:
         :return: function
             Wrapper function that executes a slot method connected to the event.
         """
-        @wraps(ehandler)  # keep docstring of event handler
-        def wrapper(api, *args):
-            # Variables
-            event = getattr(ehandler, '__name__')
-            idx = api.get_hook_index(event)
-            hook = api.get_connect_hook(event)
-            args = args[:Connector.nargs[event]]
-
-            # To execute the default event handler in case of overriding
-            ehandler(api, *args)
-
-            # To find connected slot
-            try:
-                # If hook is set on the event, then key becomes arg that corresponds to the hook
-                # ex) if hook is rq_name for on_receive_tr_data, then key becomes arg passed into rq_name
-                key = args[idx] if hook else None
-                # To retrieve the right slot
-                slot = api.slot(event, key)
-
-            except KeyError:
-                if not config.MUTE:
-                    msg = dedent(
-                        f"""
-                        kiwoom.{event}({', '.join(map(str, args))}) has been called.
-    
-                        But the event handler, '{event}', is not connected to any slot.
-                        Please try to connect event and slot by using kiwoom.connect() method.
-                          >> api.connect('{event}', slot=slot_method)
-    
-                        This warning message can disappear by the following. 
-                          >> kiwoom.config.MUTE = True  # global variable
-                        """
-                    )
-                    print(msg)
-                # To prevent executing slot that does not exist, just return
-                return
+        # Variables fixed for the event
+        event = getattr(ehandler, '__name__')
+        nargs = Connector.nargs[event]
+
+        if ehandler.__code__.co_code == _empty.__code__.co_code:
+            @wraps(ehandler)  # keep docstring of event handler
+            def wrapper(api, *args):
+                if len(args) > nargs:
+                    args = args[:nargs]
+                api._connector.dispatch[event](*args)
+
+        else:
+            @wraps(ehandler)  # keep docstring of event handler
+            def wrapper(api, *args):
+                if len(args) > nargs:
+                    args = args[:nargs]
 
-            # Execute the connected slot
-            slot(*args)
+                # To execute the default event handler in case of overriding
+                ehandler(api, *args)
+                api._connector.dispatch[event](*args)
 
         # Return wrapper function to decorate
         return wrapper
@@ -485,3 +603,7 @@ class Connector:
             raise TypeError(
                 f"Unsupported type, {type(fn)}. Please try with valid args.\n\n{Kiwoom.connect.__doc__}."
             )  # False
+
+
+def _empty(*args):
+    pass
@@ -1,10 +1,16 @@
 import sys
 from inspect import signature
+from math import ceil
 
 from PyQt5.QtCore import QEventLoop
+from PyQt5.QtTest import QTest
 
+from kiwoom.config import history
 from kiwoom.config.error import catch_error
+from kiwoom.core.bus import Bus
 from kiwoom.core.connector import Connector
+from kiwoom.utils.limiter import Limiter
+from kiwoom.utils.throttle import Throttle
 from kiwoom.wrapper.api import API
 
 
@@ -58,6 +64,31 @@ class Kiwoom(API):
     5) @Connector()
         Decorator class that forwards args received from called event into connected slot.
         This class wraps all pre-defined events, and automatically calls connected slots.
+
+    6) Kiwoom.get_comm_data_columns(tr_code, rq_name, keys)
+        Returns multi data received in on_receive_tr_data as columns. If the layout of the
+        multi data is known, the whole matrix is fetched by one GetCommDataEx call instead
+        of GetCommData calls for every cell.
+
+    7) Kiwoom.limiter & Kiwoom.pacer
+        Every TR request by Kiwoom.comm_rq_data() and Kiwoom.comm_kw_rq_data() waits
+        until history.limits() allows, i.e. the sliding windows of the server.
+
+        Requests of bulk downloads by Bot.history() also wait for Kiwoom.pacer, i.e. the
+        minimum interval of history.REQUEST_LIMIT_TIME, in the quote lane of the scheduler.
+        With history.adapt(), the minimum interval is controlled by Kiwoom.throttle
+        instead, which learns from overload errors, messages and response times.
+
+        Orders by Kiwoom.send_order() and its variants wait for Kiwoom.order_limiter
+        instead, i.e. history.ORDER_LIMIT_WINDOWS.
+
+    8) Kiwoom.observe(event, fn) & Kiwoom.unobserve(event, fn)
+        Observers are called with every event in addition to the connected slot. This is
+        how kiwoom.core.aio.AsyncKiwoom resolves awaitable requests without nested loops.
+
+    9) Kiwoom.subscribe(fn, real_type, codes) & Kiwoom.unsubscribe(fn, real_type, codes)
+        Real-time events are published to subscribers of (real_type, code) by Kiwoom.bus.
+        Events of codes without subscribers never reach any Python function.
     """
     # Class variable just for convenience
     map = Connector.map
@@ -68,6 +99,29 @@ class Kiwoom(API):
         self.msg = True
         self._qloop = QEventLoop()
 
+        # To control request rate adaptively, see history.adapt()
+        self.throttle = Throttle(
+            interval=history.REQUEST_LIMIT_TIME / 1000,
+            bounds=tuple(ms / 1000 for ms in history.ADAPTIVE_LIMIT_TIME),
+            latency=history.ADAPTIVE_LATENCY / 1000,
+            keywords=history.ADAPTIVE_MESSAGES
+        )
+
+        # To limit TR requests, waiting with events processed
+        self.limiter = Limiter(history.limits, sleep=lambda sec: QTest.qWait(ceil(sec * 1000)))
+
+        # To keep the minimum interval between requests of bulk downloads
+        self.pacer = Limiter(
+            lambda: history.pace(self.throttle.interval if history.ADAPTIVE else None),
+            sleep=lambda sec: QTest.qWait(ceil(sec * 1000))
+        )
+
+        # To limit orders by SendOrder and its variants
+        self.order_limiter = Limiter(
+            lambda: history.ORDER_LIMIT_WINDOWS,
+            sleep=lambda sec: QTest.qWait(ceil(sec * 1000))
+        )
+
         # To solve the issue that IDE hides error traceback
         def except_hook(cls, exception, traceback):
             sys.__excepthook__(cls, exception, traceback)
@@ -76,6 +130,9 @@ class Kiwoom(API):
         # To connect signals and slots
         self._connector = Connector()
 
+        # To publish real-time events to subscribers of (real_type, code)
+        self.bus = Bus(self)
+
         # To set hooks for each event
         self.set_connect_hook('on_receive_tr_data', param='rq_name')
         self.set_connect_hook('on_receive_tr_condition', param='condition_name')
@@ -286,6 +343,108 @@ class Kiwoom(API):
         """
         return self._connector.get_hook_index(event)
 
+    def observe(self, event, fn):
+        """
+        Adds an observer called with the args of the event, regardless of hooks and slots.
+
+        Unlike Kiwoom.connect(), any number of observers can be added to an event without
+        replacing the connected slot. Observers are called before the slot.
+
+        :param event: str
+            One of the pre-defined event names in string. See kiwoom.config.events.
+        :param fn: callable
+            Function that takes the same args as the event
+        """
+        self._connector.observe(event, fn)
+
+    def unobserve(self, event, fn):
+        """
+        Removes an observer added by Kiwoom.observe(). If not added, this does nothing.
+
+        :param event: str
+            One of the pre-defined event names in string. See kiwoom.config.events.
+        :param fn: callable
+        """
+        self._connector.unobserve(event, fn)
+
+    def observers(self, event):
+        """
+        Returns observers added to the event as a tuple.
+
+        :param event: str
+            One of the pre-defined event names in string. See kiwoom.config.events.
+        :return: tuple
+        """
+        return self._connector.observers(event)
+
+    def subscribe(self, fn, real_type=None, codes=None, fids=None):
+        """
+        Subscribes to real-time events of given real type and codes.
+
+        See kiwoom.core.bus for details.
+
+        :param fn: callable
+            function that takes the same args as on_receive_real_data
+        :param real_type: str, optional
+            real type such as '주식체결' and '주식호가잔량', any if None
+        :param codes: str or list of str, optional
+            code or codes to subscribe, any if None
+        :param fids: list of int, optional
+            FIDs to decode. If given, fn receives a record instead of real_data.
+        """
+        self.bus.subscribe(fn, real_type, codes, fids)
+
+    def unsubscribe(self, fn, real_type=None, codes=None):
+        """
+        Unsubscribes what is subscribed by Kiwoom.subscribe() with the same args.
+
+        :param fn: callable
+        :param real_type: str, optional
+        :param codes: str or list of str, optional
+        """
+        self.bus.unsubscribe(fn, real_type, codes)
+
+    def get_comm_data_columns(self, tr_code, rq_name, keys, layout=None):
+        """
+        Returns multi data of given keys as columns, i.e. {key: [val0, val1, ...], ...}.
+
+        If the layout of multi data is known, the whole matrix is fetched at once by
+        GetCommDataEx and transposed into columns. The first row is cross-checked with
+        GetCommData, so that it falls back to GetCommData for each cell when the layout
+        does not match. Values are raw strings from the server, pre-processing is needed.
+
+        This method must be called inside of on_receive_tr_data event like GetCommData.
+
+        :param tr_code: str
+            TR code passed into on_receive_tr_data
+        :param rq_name: str
+            rq_name passed into on_receive_tr_data
+        :param keys: list of str
+            names of columns to fetch
+        :param layout: list of str, optional
+            names of all columns in the order of GetCommDataEx.
+            If None, kiwoom.config.history.layout(tr_code) is used.
+        :return: dict
+            sequence of raw strings for each key
+        """
+        layout = history.layout(tr_code) if layout is None else layout
+        if layout and set(keys).issubset(layout):
+            matrix = self.get_comm_data_ex(tr_code, rq_name)
+            if matrix:
+                cols = list(zip(*matrix))
+                if len(cols) == len(layout):
+                    data = {key: cols[layout.index(key)] for key in keys}
+                    # To check the layout is valid with the first row
+                    if all(
+                        str(data[key][0]).strip() == self.get_comm_data(tr_code, rq_name, 0, key).strip()
+                        for key in keys
+                    ):
+                        return data
+
+        # Fetch each cell, otherwise
+        cnt = self.get_repeat_cnt(tr_code, rq_name)
+        return {key: [self.get_comm_data(tr_code, rq_name, i, key) for i in range(cnt)] for key in keys}
+
     @staticmethod
     def api_arg_spec(fn):
         """
@@ -315,11 +474,13 @@ class Kiwoom(API):
 
     @map
     def on_receive_msg(self, scr_no, rq_name, tr_code, msg):
-        pass
+        # To back off when the server says it's overloaded
+        self.throttle.message(msg)
 
     @map
     def on_receive_tr_data(self, scr_no, rq_name, tr_code, record_name, prev_next):
-        pass
+        # To speed up when the response comes in time
+        self.throttle.received(rq_name)
 
     @map
     def on_receive_real_data(self, code, real_type, real_data):
@@ -352,18 +513,26 @@ class Kiwoom(API):
     """
     @catch_error
     def comm_rq_data(self, rq_name, tr_code, prev_next, scr_no):
-        return super().comm_rq_data(rq_name, tr_code, prev_next, scr_no)
+        self.limiter.acquire()
+        ret = super().comm_rq_data(rq_name, tr_code, prev_next, scr_no)
+        self.throttle.sent(rq_name, ret)
+        return ret
 
     @catch_error
     def comm_kw_rq_data(self, arr_code, next, code_cnt, type_flag, rq_name, scr_no):
-        return super().comm_kw_rq_data(arr_code, next, code_cnt, type_flag, rq_name, scr_no)
+        self.limiter.acquire()
+        ret = super().comm_kw_rq_data(arr_code, next, code_cnt, type_flag, rq_name, scr_no)
+        self.throttle.sent(rq_name, ret)
+        return ret
 
     @catch_error
     def send_order(self, rq_name, scr_no, acc_no, ord_type, code, qty, price, hoga_gb, org_order_no):
+        self.order_limiter.acquire()
         return super().send_order(rq_name, scr_no, acc_no, ord_type, code, qty, price, hoga_gb, org_order_no)
 
     @catch_error
     def send_order_fo(self, rq_name, scr_no, acc_no, code, ord_kind, sl_by_tp, ord_tp, qty, price, org_ord_no):
+        self.order_limiter.acquire()
         return super().send_order_fo(rq_name, scr_no, acc_no, code, ord_kind, sl_by_tp, ord_tp, qty, price, org_ord_no)
 
     @catch_error
@@ -381,6 +550,7 @@ class Kiwoom(API):
             loan_date,
             org_order_no
     ):
+        self.order_limiter.acquire()
         return super().send_order_credit(
             rq_name,
             scr_no,
@@ -0,0 +1,285 @@
+"""
+Central scheduler of requests to Kiwoom server
+
+Requests are queued with priority and deadline, and dispatched one by one as soon as
+the budget of their lane allows. Higher priority goes first, and the earlier deadline
+goes first among the same priority. Expired requests are dropped without being sent.
+
+Lanes
+    1) quote   : market data TRs such as chart data, limited to (1 - REQUEST_LIMIT_RESERVE)
+                 of Kiwoom.limiter, so that bulk downloads never use up the whole budget,
+                 and paced by the minimum interval of Kiwoom.pacer.
+    2) account : account TRs such as opw00018, limited by Kiwoom.limiter only.
+    3) order   : SendOrder and its variants, limited by Kiwoom.order_limiter, i.e.
+                 ORDER_LIMIT_WINDOWS, which Kiwoom.send_order() waits for anyway.
+
+The budget is reserved by fewer requests in each window, or by longer windows if only one
+request is allowed in them, see reserved().
+
+Note that a request is a function that sets inputs and sends a request at once, so that
+inputs of other requests never get in between. Responses are handled by connected slots
+as usual.
+
+Usage example
+>>  def request():
+>>      api.set_input_value('계좌번호', acc)
+>>      return api.comm_rq_data('balance', 'opw00018', '0', '1001')
+>>
+>>  # Returns immediately, dispatched between requests of bulk downloads
+>>  bot.scheduler.submit(request, priority=INTERACTIVE, lane='account', deadline=5)
+>>
+>>  # Blocks until dispatched and returns the result of the function
+>>  ret = bot.scheduler.run(request, priority=BULK)
+"""
+from itertools import count
+from math import ceil, floor
+from time import monotonic
+from traceback import format_exc
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtTest import QTest
+
+from kiwoom.config import history
+from kiwoom.config.types import NORMAL
+from kiwoom.utils.limiter import Limiter
+
+
+def reserved(windows, reserve):
+    """
+    Returns windows that leave 'reserve' portion of the budget to others.
+
+    A window of n requests allows floor(n * (1 - reserve)) of them, while a window that
+    can't be reduced in count, such as (1, sec), becomes (1, sec / (1 - reserve)).
+
+    :param windows: list of tuple
+        [(count, seconds), ...]
+    :param reserve: float
+        portion of the budget in [0, 1)
+    :return: list of tuple
+    """
+    if reserve <= 0:
+        return list(windows)
+
+    lst = list()
+    for n, sec in windows:
+        m = floor(n * (1 - reserve))
+        lst.append((m, sec) if m > 0 else (n, sec / (1 - reserve)))
+    return lst
+
+
+class Request:
+    """
+    Request queued in Scheduler
+
+    :param fn: callable
+        function that sends a request and returns its error code
+    :param args: tuple
+        arguments for fn
+    :param priority: kiwoom.config.types.PriorityType
+    :param deadline: float or None
+        time by monotonic() until when the request should be sent
+    :param lane: str
+    :param callback: callable or None
+        function called with the return of fn once sent
+    """
+    def __init__(self, fn, args, priority, deadline, lane, callback, seq):
+        self.fn = fn
+        self.args = args
+        self.priority = priority
+        self.deadline = deadline
+        self.lane = lane
+        self.callback = callback
+        self.seq = seq
+
+        self.done = False
+        self.blocking = False  # whether someone waits in Scheduler.run()
+        self.expired = False
+        self.cancelled = False
+        self.result = None
+        self.error = None
+
+    def key(self):
+        deadline = self.deadline if self.deadline is not None else float('inf')
+        return int(self.priority), deadline, self.seq
+
+    def cancel(self):
+        """
+        Cancels the request if not sent yet.
+        """
+        if not self.done:
+            self.done, self.cancelled = True, True
+
+
+class Scheduler:
+    """
+    Priority queue of requests with separate budgets for each lane
+
+    :param api: kiwoom.Kiwoom
+    :param reserve: float
+        portion of Kiwoom.limiter that the quote lane can't use, REQUEST_LIMIT_RESERVE by default
+    """
+    def __init__(self, api, reserve=None):
+        self.api = api
+        self.queue = list()
+        self.clock = monotonic
+
+        reserve = history.REQUEST_LIMIT_RESERVE if reserve is None else reserve
+        quote = Limiter(lambda: reserved(api.limiter.windows, reserve))
+
+        # Limiters to check for each lane. Note that limiters of Kiwoom record by themselves.
+        self.lanes = {
+            'quote': [quote, api.pacer, api.limiter],
+            'account': [api.limiter],
+            'order': [api.order_limiter]
+        }
+
+        self._seq = count()
+        self._pumping = False
+        self._timer = QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.pump)
+
+    def __len__(self):
+        return len(self.queue)
+
+    def submit(self, fn, *args, priority=NORMAL, deadline=None, lane='quote', callback=None):
+        """
+        Queues a request and returns without waiting.
+
+        :param fn: callable
+            function that sets inputs and sends a request, returning an error code
+        :param args: tuple
+            arguments for fn
+        :param priority: kiwoom.config.types.PriorityType
+            one of URGENT, INTERACTIVE, NORMAL and BULK
+        :param deadline: float or None
+            seconds from now until when the request should be sent, else dropped
+        :param lane: str
+            one of 'quote', 'account' and 'order'
+        :param callback: callable or None
+            function called with the return of fn once sent
+        :return: Request
+        """
+        if lane not in self.lanes:
+            raise KeyError(f"Given lane, '{lane}', must be one of {tuple(self.lanes)}.")
+
+        if deadline is not None:
+            deadline = self.clock() + deadline
+        req = Request(fn, args, priority, deadline, lane, callback, next(self._seq))
+        self.queue.append(req)
+
+        # To dispatch once the control goes back to the event loop
+        self._schedule(0)
+        return req
+
+    def run(self, fn, *args, priority=NORMAL, deadline=None, lane='quote'):
+        """
+        Queues a request and blocks until it's sent, processing events meanwhile.
+
+        :return: any
+            return of fn
+        """
+        req = self.submit(fn, *args, priority=priority, deadline=deadline, lane=lane)
+        req.blocking = True
+        while not req.done:
+            self.pump(req)
+            if not req.done:
+                QTest.qWait(max(1, ceil(min(self.wait(), self.expiry()) * 1000)))
+
+        if req.expired:
+            raise TimeoutError(f'Request {fn} expired before being sent.')
+        if req.error is not None:
+            raise req.error
+        return req.result
+
+    def wait(self, lane=None):
+        """
+        Returns seconds until the given lane, or any lane with requests, is available.
+        """
+        if lane is not None:
+            return max([limiter.wait() for limiter in self.lanes[lane]] + [0])
+
+        lanes = set(req.lane for req in self.queue if not req.done)
+        return min([self.wait(lane) for lane in lanes] + [0 if not lanes else float('inf')])
+
+    def expiry(self):
+        """
+        Returns seconds until the earliest deadline of requests in the queue, inf if none.
+        """
+        deadlines = [req.deadline for req in self.queue if not req.done and req.deadline is not None]
+        return max(0, min(deadlines) - self.clock()) if deadlines else float('inf')
+
+    def pump(self, target=None):
+        """
+        Dispatches requests in order as far as their lanes allow.
+
+        Requests waiting in Scheduler.run() are dispatched only by the run() itself, and
+        then it returns at once. Otherwise, the response could be handled while waiting,
+        i.e. before the caller gets into Kiwoom.loop().
+
+        :param target: Request
+            request waiting in Scheduler.run(), if called by it
+        """
+        # Requests may be submitted while dispatching
+        if self._pumping:
+            return
+
+        self._pumping = True
+        try:
+            while True:
+                req = self._next(target)
+                if req is None:
+                    break
+                self._dispatch(req)
+                if req is target:
+                    break
+        finally:
+            self._pumping = False
+
+        # To drop expired requests in time, even if their lanes are not available yet
+        if self.queue:
+            self._schedule(min(self.wait(), self.expiry()))
+
+    def _next(self, target=None):
+        # Returns the first request in order whose lane is available
+        now, blocked = self.clock(), set()
+        for req in sorted(self.queue, key=Request.key):
+            if req.done:
+                self.queue.remove(req)
+                continue
+
+            if req.deadline is not None and now > req.deadline:
+                req.done, req.expired = True, True
+                self.queue.remove(req)
+                continue
+
+            if req.lane in blocked:
+                continue
+            if (req.blocking and req is not target) or self.wait(req.lane) > 0:
+                blocked.add(req.lane)
+                continue
+            return req
+        return None
+
+    def _dispatch(self, req):
+        self.queue.remove(req)
+        for limiter in self.lanes[req.lane]:
+            if limiter is not self.api.limiter and limiter is not self.api.order_limiter:
+                limiter.record()
+
+        try:
+            req.result = req.fn(*req.args)
+        except Exception as err:
+            req.error = err
+            if not req.blocking:
+                print(f'\nAn error at Scheduler with {req.fn}.\n\n{format_exc()}')
+        finally:
+            req.done = True
+
+        if req.callback is not None and req.error is None:
+            req.callback(req.result)
+
+    def _schedule(self, sec):
+        msec = max(0, ceil(sec * 1000))
+        if not self._timer.isActive() or self._timer.remainingTime() > msec:
+            self._timer.start(msec)
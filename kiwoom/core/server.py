@@ -1,19 +1,20 @@
 from os import getcwd, makedirs
-from os.path import exists, join
+from os.path import basename, dirname, exists
 from textwrap import dedent
 from traceback import format_exc
 from warnings import warn
 
 import pandas as pd
 
-from kiwoom import config
 from kiwoom.config import history
 from kiwoom.config.error import msg
 from kiwoom.config.types import MULTI
 from kiwoom.core.kiwoom import Kiwoom
+from kiwoom.data import storage
+from kiwoom.data.manifest import Manifest, digest
 from kiwoom.data.share import Share
-from kiwoom.data.preps import string
-from kiwoom.utils.general import date, name
+from kiwoom.data.preps import datetimes, string
+from kiwoom.utils.general import date
 from kiwoom.utils.manager import Downloader
 
 
@@ -62,7 +63,7 @@ class Server:
     """
     @Downloader.handler
     def history(self, scr_no, rq_name, tr_code, _, prev_next):
-        kwargs = self.share.get_args(name())
+        kwargs = self.share.get_args(rq_name)
         period = history.get_period(tr_code)
 
         rec = history.get_record_name_for_its_name(tr_code)  # record_name = '종목코드' | '업종코드'
@@ -76,12 +77,10 @@ class Server:
         if code != kwargs['code']:
             raise RuntimeError(f"Requested {kwargs['code']}, but the server still sends {code}.")
 
-        # Fetch multi data
-        data = {key: list() for key in history.outputs(tr_code, MULTI)}
-        cnt = self.api.get_repeat_cnt(tr_code, rq_name)
-        for i in range(cnt):
-            for key, fn in history.preper(tr_code, MULTI):
-                data[key].append(fn(self.api.get_comm_data(tr_code, rq_name, i, key)))
+        # Fetch multi data at once
+        data = self.api.get_comm_data_columns(tr_code, rq_name, history.outputs(tr_code, MULTI))
+        for key, fn in history.columnar_preper(tr_code, MULTI):
+            data[key] = fn(data[key])
 
         # Update downloaded data
         for key in data.keys():
@@ -101,66 +100,37 @@ class Server:
         if prev_next == '2':
             try:
                 # Call signal method again, but with prev_next='2'
-                bot = self.api.signal('on_receive_tr_data', name())
-                bot(code, period=period, prev_next=prev_next)
+                bot = self.api.signal('on_receive_tr_data', rq_name)
+                bot(code, period=period, prev_next=prev_next, rq_name=rq_name)
             except Exception as err:
-                args = f"code={code}, period={period}, prev_next={prev_next}"
-                self.share.update_single('history', 'error', True)
+                args = f"code={code}, period={period}, prev_next={prev_next}, rq_name={rq_name}"
+                self.share.update_single(rq_name, 'error', True)
                 print(f"An error at Bot.history({args}).\n\n{format_exc()}")
 
         # Download done
         else:
-            # Sort to chronological order
-            df = pd.DataFrame(self.share.get_history(code))[::-1]
+            # Data is already in chronological order
+            df = pd.DataFrame(self.share.get_history(code))
 
             # To make df have datetime index
             col = history.get_datetime_column(period)
-            fmt = history.get_datetime_format(period)
 
             """
                 Make time-related column as pandas Datetime index
             """
-            # To handle exceptional time and dates
-            if not df.empty \
-               and history.is_sector(code) \
-               and col == '체결시간':
-
+            # To handle exceptional time and dates, i.e. (888888, 999999) to (16:00:00, 18:00:00)
+            replacer, delayed = None, None
+            if history.is_sector(code) and col == '체결시간':
                 # To choose exceptional datetime replacer
                 replacer = history.EXCEPTIONAL_DATETIME_REPLACER
                 if code in history.EXCEPTIONAL_DATETIME_REPLACER_FOR_EXCEPTIONAL_CODE:
                     replacer = history.EXCEPTIONAL_DATETIME_REPLACER_FOR_EXCEPTIONAL_CODE[code]
 
                 # To handle delayed market openings
-                delayed = dict()
-                start = date(df[col].iat[0][:len('YYYYMMDD')])
-                end = date(df[col].iat[-1][:len('YYYYMMDD')])
-                for ymd, hour in history.DELAYED_MARKET_OPENING.items():
-                    if start <= date(ymd) <= end:
-                        delayed_replacer = dict(replacer)
-                        for regex, hhmmss in delayed_replacer.items():
-                            hhmmss = min(int(hhmmss) + (hour * 10000), 180000)
-                            hhmmss = str(hhmmss).zfill(6)
-                            delayed_replacer[regex] = hhmmss
-                        
-                        for regex, hhmmss in delayed_replacer.items():
-                            data = df.loc[df[col].str.match(ymd), col]
-                            target = data.loc[data.str.contains(regex, regex=True)]
-                            target = target.replace(regex={regex: hhmmss})
-                            for idx, tsp in target.items():
-                                delayed[idx] = pd.to_datetime(tsp, format=fmt)
-
-                # Replace inconvertibles (888888, 999999) to (16:00:00, 18:00:00)
-                df[col] = df[col].replace(regex=replacer)
-
-                # To make column as pandas datetime series
-                df[col] = pd.to_datetime(df[col], format=fmt)
-
-                # Handle delayed market openings
-                df.loc[list(delayed.keys()), col] = list(delayed.values())
-
-            # To handle etc.
-            else:
-                df[col] = pd.to_datetime(df[col], format=fmt)
+                delayed = history.DELAYED_MARKET_OPENING
+
+            # To make column as pandas datetime series in one pass
+            df[col] = datetimes(df[col].to_numpy(), replacer, delayed)
 
             # Finally make datetime column as index
             df.set_index(col, inplace=True)
@@ -183,23 +153,36 @@ class Server:
             if not df.index.is_monotonic_increasing:
                 df = df.sort_index(kind='stable')
             
-            # Save data to csv file
-            self.history_to_csv(df, code, kwargs['path'], kwargs['merge'], kwargs['warning'])
+            # Save data to file
+            self.history_to_file(
+                df, code, kwargs['path'], kwargs['merge'], kwargs['warning'],
+                fmt=kwargs.get('fmt'), period=period, unit=kwargs.get('unit')
+            )
 
             # Once common variables are used, delete it
-            self.share.remove_args(name())
+            self.share.remove_args(rq_name)
             self.share.remove_history(code)
 
             # Mark successfully downloaded
-            self.share.update_single(name(), 'complete', True)
+            self.share.update_single(rq_name, 'complete', True)
 
+            # To reuse the screen for the next download
             self.api.disconnect_real_data(scr_no)
+            self.bot.scr.release(scr_no)
             self.api.unloop()
 
     def history_to_csv(self, df, file, path=None, merge=False, warning=True):
         """
         Save historical data of given code at path in .csv format.
 
+        See Server.history_to_file() for details.
+        """
+        self.history_to_file(df, file, path, merge, warning, fmt='csv')
+
+    def history_to_file(self, df, file, path=None, merge=False, warning=True, fmt=None, period=None, unit=None):
+        """
+        Save historical data of given code at path in given format.
+
         Once the data is saved, it will be removed from the memory.
         When merge is True, data will be merged with existing file.
         Data will be overwritten by default, otherwise.
@@ -209,6 +192,12 @@ class Server:
         :param path: str
         :param merge : bool
         :param warning: bool
+        :param fmt: str or kiwoom.data.storage.Storage
+            one of 'csv', 'parquet' and 'feather'. if None, 'csv' by default.
+        :param period: str
+            period of data to be recorded in manifest
+        :param unit: int
+            unit of data to be recorded in manifest
         """
         # In case, path is '' or None
         if not path:
@@ -217,10 +206,14 @@ class Server:
         if not exists(path):
             makedirs(path)
 
-        file = file if file.endswith('.csv') else file + '.csv'
-        file = join(path, file)
+        store = storage.get(fmt)
+        file = store.file(path, file)
 
         if merge:
+            # Rows with missing values are dropped as the ones of existing data below, so that
+            # the tail appended by Server.history_to_file_incrementally() is the same as well
+            df = df.dropna(axis='index')
+
             # No file to merge with
             if not exists(file):
                 # An empty file will be created later
@@ -236,17 +229,22 @@ class Server:
                 if col not in ['일자', '체결시간']:
                     raise ValueError(f"No column matches '일자' or '체결시간'. Merge can't be done.")
 
-                # Existing data
-                if 'file' in self.share.single['history']:
-                    db = self.share.get_single('history', 'file')
-                else:
-                    # Read the existing file from disk
-                    db = pd.read_csv(
-                        file,
-                        index_col=[col],
-                        parse_dates=[col],
-                        encoding=config.ENCODING
-                    )
+                # To append only new data to the end of existing file if possible
+                if history.INCREMENTAL_MERGE:
+                    # Entry must be taken before the file changes, to count rows from it
+                    entry = Manifest(path).fresh(file) if history.MANIFEST else None
+                    dropped = self.history_to_file_incrementally(df, file, store, warning)
+                    if dropped is not None:
+                        if entry is None or entry.get('rows') is None:
+                            first, last, rows = store.summary(file, col)
+                        else:
+                            first = entry['first'] or df.index[0]
+                            last, rows = df.index[-1], entry['rows'] - dropped + len(df)
+                        self.history_to_manifest(file, store, first, last, rows, period, unit)
+                        return
+
+                # Read the existing file from disk
+                db = store.read(file, col)
                 db.dropna(axis='index', inplace=True)
 
                 if not db.empty:
@@ -281,7 +279,7 @@ class Server:
                             start_date = df.index[0].date()
                             if warning:
                                 # The case data may not be time-continuous
-                                if db.loc[db.index == start_date].empty:
+                                if not (db.index.normalize() == pd.Timestamp(start_date)).any():
                                     warn(err_msg)
                             # To slice DB before the date when downloaded data starts from
                             db = db[:start_date]
@@ -306,9 +304,105 @@ class Server:
         # To prevent overwriting
         if not merge and exists(file):
             raise FileExistsError(
-                f'Error at Server.history_to_csv(file={file}, ...)/\n'
+                f'Error at Server.history_to_file(file={file}, ...)/\n'
                 + "File already exists. Set merge=True or move the file to prevent from losing data."
             )
 
-        # Finally write to csv file
-        df.to_csv(file, encoding=config.ENCODING)
+        # Finally write to file
+        store.write(df, file)
+        if not df.empty:
+            self.history_to_manifest(file, store, df.index[0], df.index[-1], len(df), period, unit)
+        else:
+            self.history_to_manifest(file, store, None, None, 0, period, unit)
+
+    def history_to_manifest(self, file, store, first, last, rows, period=None, unit=None):
+        """
+        Record information of given file in the manifest of its path.
+
+        Summary of the file is given by the caller from the data just written, so that
+        the file is not read again unless history.MANIFEST_HASH is True.
+
+        :param file: str
+        :param store: kiwoom.data.storage.Storage
+        :param first: pandas.Timestamp
+            the first timestamp in the file
+        :param last: pandas.Timestamp
+            the last timestamp in the file
+        :param rows: int
+            number of rows in the file
+        :param period: str
+        :param unit: int
+        """
+        if not history.MANIFEST:
+            return
+
+        Manifest(dirname(file)).update(
+            file,
+            code=basename(file)[:-len(store.ext)] if store.ext else basename(file),
+            fmt=store.name,
+            period=period,
+            unit=unit,
+            first=first,
+            last=last,
+            rows=rows,
+            hash=digest(file) if history.MANIFEST_HASH else None
+        )
+
+    def history_to_file_incrementally(self, df, file, store, warning=True):
+        """
+        Merge historical data with existing file by truncating its tail and appending new data.
+
+        Only the tail of the file is read to find where downloaded data starts, and the result
+        is the same as merging the whole file in Server.history_to_file(). Returns None
+        without touching the file if it can't be done, e.g. columns are different or the
+        storage doesn't support it. Then the whole file needs to be merged.
+
+        :param df: pandas.Dataframe
+        :param file: str
+        :param store: kiwoom.data.storage.Storage
+        :param warning: bool
+        :return: int or None
+            number of rows truncated from the existing file, None if not merged
+        """
+        col = df.index.name
+        if store.header(file) != [col] + list(df.columns):
+            return None
+
+        # To find the first line of downloaded data in existing file
+        block = history.INCREMENTAL_MERGE_BLOCK
+        loc = store.locate(file, df.index[0], 'left', block)
+        if loc is None:
+            return None
+
+        offset, equal, last = loc
+        if not equal and last is not None:
+            err_msg = dedent(
+                f"""
+                Data, '{file}', is forced to be merged but it may not be time-continuous.
+                 - The End of the Existing Data : {last}
+                 - The Start of Downloaded Data : {df.index[0]}
+                """
+            )
+            if col == '체결시간':  # tick, min
+                # To truncate existing data from the date when downloaded data starts from
+                start_date = pd.Timestamp(df.index[0].date())
+                loc = store.locate(file, start_date, 'right', block)
+                if loc is None:
+                    return None
+                offset = loc[0]
+
+                # The case data may not be time-continuous, i.e. no existing data on the date
+                if warning:
+                    nxt = store.locate(file, start_date + pd.DateOffset(1), 'left', block)
+                    if nxt is None or nxt[0] <= offset:
+                        warn(err_msg)
+
+            else:  # col == '일자'  # day, week, month, year
+                # Just append if no overlapping period.
+                offset = store.end(file)
+
+                # The case data may not be time-continuous
+                if warning:
+                    warn(err_msg)
+
+        return store.append(df, file, offset)
@@ -0,0 +1,304 @@
+"""
+Sharded downloads of historical data across several logged-in sessions
+
+Bot.histories() downloads items one session at a time, so that an overnight download is
+bounded by the request budget of a single login. Orchestrator splits the codes into
+shards and runs Bot.histories() for each shard in worker processes, each of which has
+its own QApplication, Bot and login, hence its own request budget.
+
+Coordinator
+    Orchestrator.run() assigns a shard to each idle worker and collects the progress of
+    every downloaded code through Bot.downloaded(). If a shard fails or its worker dies,
+    codes not downloaded yet are assigned again to another worker up to 'retries' times.
+    A worker whose session reaches the request limit, i.e. Bot.histories() returns the
+    slice to restart, hands its remaining codes back and exits. They are assigned again
+    without counting as a retry, as the shard didn't fail.
+
+Login
+    Open API+ doesn't take credentials as arguments. Each worker logs in by Bot.login(),
+    or by 'login' function given as login(bot, wid) for each session to choose its own
+    account, ex) by automating the login window or the auto-login setting of the account.
+
+Usage example
+>>  def login(bot, wid):
+>>      ...  # log in with the account of the session 'wid'
+>>
+>>  if __name__ == '__main__':
+>>      orchestrator = Orchestrator(sessions=3, login=login)
+>>      left = orchestrator.run(market='0', period='tick', path='C:/Data/tick')
+"""
+import sys
+from collections import deque
+from multiprocessing import get_context
+from queue import Empty
+from traceback import format_exc
+
+from PyQt5.QtWidgets import QApplication
+
+from kiwoom.config import history
+from kiwoom.config.types import ExitType
+from kiwoom.core.bot import Bot
+from kiwoom.utils.general import clock
+
+
+# Messages between the coordinator and workers
+READY = 'ready'  # (READY, wid, connected)
+CODES = 'codes'  # (CODES, market, sector) & (CODES, wid, codes)
+SHARD = 'shard'  # (SHARD, sid, codes, kwargs)
+PROGRESS = 'progress'  # (PROGRESS, wid, sid, code)
+FINISH = 'finish'  # (FINISH, wid, sid, ecode)
+
+
+def work(wid, factory, login, inbox, outbox):
+    """
+    Main function of a worker process, which runs Bot.histories() for each shard given.
+
+    :param wid: int
+        id of the worker, i.e. the index of the session
+    :param factory: callable
+        function that returns a Bot, ex) Bot or its subclass
+    :param login: callable, optional
+        function that logs in with the account of the session as login(bot, wid)
+    :param inbox: multiprocessing.Queue
+        tasks from the coordinator, None to exit
+    :param outbox: multiprocessing.Queue
+        messages to the coordinator
+    """
+    app = QApplication.instance() or QApplication(sys.argv)
+    bot = factory()
+    try:
+        if login is None:
+            bot.login()
+        else:
+            login(bot, wid)
+        connected = bot.connected()
+    except Exception:
+        print(f'\n[{clock()}] An error at logging in the session {wid}.\n\n{format_exc()}')
+        connected = False
+
+    outbox.put((READY, wid, connected))
+    if not connected:
+        return
+
+    while True:
+        task = inbox.get()
+        if task is None:
+            break
+
+        if task[0] == CODES:
+            _, market, sector = task
+            try:
+                outbox.put((CODES, wid, bot.codes(market, sector)))
+            except Exception:
+                print(f'\n[{clock()}] An error at Bot.codes({market}, {sector}).\n\n{format_exc()}')
+                outbox.put((CODES, wid, None))
+            continue
+
+        _, sid, codes, kwargs = task
+        bot.downloaded = lambda code: outbox.put((PROGRESS, wid, sid, code))
+        try:
+            ret = bot.histories(codes=codes, **kwargs)
+        except Exception:
+            print(f'\n[{clock()}] An error at Bot.histories() in the session {wid}.\n\n{format_exc()}')
+            ret = ExitType.FAILURE
+
+        # Slice to restart is returned when the session reaches the request limit
+        ecode = ExitType.RESTART if isinstance(ret, tuple) else ret
+        outbox.put((FINISH, wid, sid, ecode))
+        if ecode is ExitType.RESTART:
+            break
+
+    app.closeAllWindows()
+
+
+class Orchestrator:
+    """
+    Coordinator of Bot.histories() over shards in several worker processes
+
+    :param sessions: int
+        number of worker processes, each of which logs in separately
+    :param factory: callable
+        function that returns a Bot in each worker, which must be picklable
+    :param login: callable, optional
+        function that logs in as login(bot, wid), which must be picklable
+    :param size: int
+        number of codes in a shard, history.SHARD_SIZE by default
+    :param retries: int
+        number of times to assign a failed shard again, history.SHARD_RETRIES by default
+    """
+    def __init__(self, sessions=2, factory=Bot, login=None, size=None, retries=None):
+        if sessions < 1:
+            raise ValueError(f'Given sessions must be a positive integer, not {sessions}.')
+
+        self.sessions = sessions
+        self.factory = factory
+        self.login = login
+        self.size = history.SHARD_SIZE if size is None else size
+        self.retries = history.SHARD_RETRIES if retries is None else retries
+
+        self.shards = dict()  # {sid: codes}
+        self.downloaded = dict()  # {code: wid}
+
+    def run(self, market=None, sector=None, codes=None, **kwargs):
+        """
+        Downloads codes in the market, sector or given codes with all sessions.
+
+        :param market: str
+            one of market code in kiwoom.config.markets
+        :param sector: str
+            one of market_gubun code in kiwoom.config.market_gubuns
+        :param codes: list of str
+            codes to download instead of the ones in market/sector
+        :param kwargs:
+            args of Bot.histories() for every shard, such as period, start and path
+        :return: int or list
+            returns 0 (= ExitType.SUCCESS) if all codes are downloaded, else the list of
+            codes not downloaded, which can be given as codes in the next run.
+        """
+        ctx = get_context('spawn')
+        outbox = ctx.Queue()
+        inboxes = {wid: ctx.Queue() for wid in range(self.sessions)}
+        procs = {
+            wid: ctx.Process(
+                target=work,
+                args=(wid, self.factory, self.login, inboxes[wid], outbox),
+                daemon=True
+            ) for wid in range(self.sessions)
+        }
+        for proc in procs.values():
+            proc.start()
+
+        try:
+            return self.coordinate(procs, inboxes, outbox, market, sector, codes, kwargs)
+
+        finally:
+            for wid, proc in procs.items():
+                if proc.is_alive():
+                    inboxes[wid].put(None)
+            for proc in procs.values():
+                proc.join(timeout=60)
+                if proc.is_alive():
+                    proc.terminate()
+
+    def coordinate(self, procs, inboxes, outbox, market, sector, codes, kwargs):
+        # Event loop of the coordinator that assigns shards and collects messages
+        alive = set(procs)  # workers not exited yet
+        idle = list()  # workers ready for a shard
+        running = dict()  # {wid: sid}
+        queue = deque()  # sids to assign
+        attempts, last = dict(), dict()  # {sid: number of attempts}, {sid: wid assigned last}
+        self.shards.clear()
+        self.downloaded.clear()
+
+        def retry(sid, wid, failed=True):
+            # To assign codes not downloaded yet in the shard again, counted as an attempt if failed
+            left = [code for code in self.shards[sid] if code not in self.downloaded]
+            if not left:
+                return
+            if failed and attempts[sid] >= self.retries:
+                print(f'\n[{clock()}] Giving up {len(left)} codes from {left[0]} after {attempts[sid] + 1} tries.')
+                return
+
+            nid = len(self.shards)
+            self.shards[nid] = left
+            attempts[nid], last[nid] = attempts[sid] + int(failed), wid
+            queue.append(nid)
+
+        def receive():
+            # To wait for a message while checking whether workers are dead
+            while alive:
+                try:
+                    return outbox.get(timeout=1)
+                except Empty:
+                    for wid in [wid for wid in alive if not procs[wid].is_alive()]:
+                        alive.discard(wid)
+                        if wid in idle:
+                            idle.remove(wid)
+                        if wid in running:
+                            retry(running.pop(wid), wid)
+            return None
+
+        # To wait until any session is logged in
+        while alive and not idle:
+            msg = receive()
+            if msg is not None and msg[0] == READY:
+                wid, connected = msg[1:]
+                if connected:
+                    idle.append(wid)
+                else:
+                    alive.discard(wid)
+        if not idle:
+            raise RuntimeError('No session is logged in.')
+
+        # To list codes in a logged-in session
+        if codes is None:
+            wid = idle[0]
+            inboxes[wid].put((CODES, market, sector))
+            while True:
+                msg = receive()
+                if msg is None or (msg[0] == CODES and msg[1] == wid):
+                    break
+                if msg[0] == READY and msg[2]:
+                    idle.append(msg[1])
+            if msg is None or msg[2] is None:
+                raise RuntimeError(f'Failed to list codes with market={market} and sector={sector}.')
+            codes = msg[2]
+
+        # Split codes into shards
+        codes = list(codes)
+        for i in range(0, len(codes), self.size):
+            sid = len(self.shards)
+            self.shards[sid] = codes[i: i + self.size]
+            attempts[sid] = 0
+            queue.append(sid)
+
+        print(f'Sharded Download Start for {len(codes)} codes in {len(self.shards)} shards with {len(alive)} sessions.')
+        while alive and (queue or running):
+            # To assign shards to idle workers, preferring one that didn't fail it last
+            while idle and queue:
+                wid = idle.pop(0)
+                sid = next((sid for sid in queue if last.get(sid) != wid), queue[0])
+                queue.remove(sid)
+                last[sid] = wid
+                running[wid] = sid
+                # Retries merge with files written before the failure, not to raise FileExistsError
+                kw = kwargs if attempts[sid] == 0 else dict(kwargs, merge=True)
+                inboxes[wid].put((SHARD, sid, self.shards[sid], kw))
+
+            msg = receive()
+            if msg is None:
+                break
+
+            kind, wid = msg[:2]
+            if kind == READY:
+                if msg[2]:
+                    idle.append(wid)
+                else:
+                    alive.discard(wid)
+
+            elif kind == PROGRESS:
+                self.downloaded[msg[3]] = wid
+                if len(self.downloaded) % history.DOWNLOAD_PROGRESS_DISPLAY == 0:
+                    pct = len(self.downloaded) / len(codes) * 100
+                    print(f'[{clock()}] Downloaded ..\t{pct: .1f}% ({len(self.downloaded)} of {len(codes)})')
+
+            elif kind == FINISH:
+                sid, ecode = msg[2:]
+                running.pop(wid, None)
+
+                # The session exhausted its request budget and exited, which isn't a failure of the shard
+                if ecode is ExitType.RESTART:
+                    retry(sid, wid, failed=False)
+                    alive.discard(wid)
+                    continue
+
+                if ecode is not ExitType.SUCCESS:
+                    retry(sid, wid)
+                idle.append(wid)
+
+        # Including codes not assigned when all sessions are exited
+        left = [code for code in codes if code not in self.downloaded]
+        print(f'Sharded Download Done for {len(codes) - len(left)} of {len(codes)} codes.')
+        if not left:
+            return ExitType.SUCCESS
+        return left
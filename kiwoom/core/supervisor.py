@@ -0,0 +1,380 @@
+"""
+Supervisor of Bot.histories() that respawns a frozen download process at once
+
+Downloading for 24 hours needs a loop that restarts Bot.histories() in a new process
+whenever the server stops responding. Downloader.watcher finds such a freeze only by
+comparing the number of requests every 10 minutes and exits 60 seconds later, so that
+up to 11 minutes are lost at every freeze.
+
+Heartbeat
+    A child process publishes its liveness and progress into a small block of shared
+    memory, i.e. the time of the last beat of its event loop, the numbers of requests
+    sent and responses received, the number of items downloaded and the current code.
+    Only requests accepted by the server are counted, so waiting for request limits is
+    never regarded as a freeze.
+
+Supervisor
+    Supervisor.run() spawns a child that logs in and runs Bot.histories(), and reads the
+    heartbeat every 'interval' seconds. If the event loop doesn't beat or a request is
+    not answered for 'timeout' seconds, the child is killed and a new one is spawned
+    immediately. It rests for 'rest' seconds only when a child dies without receiving
+    any response, i.e. when the server is not available at all.
+
+Give 'jobs' to Bot.histories() to resume exactly where a killed child stopped, see
+kiwoom.data.jobs. Otherwise, a new child downloads items from the beginning again.
+
+Usage example
+>>  if __name__ == '__main__':
+>>      supervisor = Supervisor(timeout=60)
+>>      result = supervisor.run(market='0', period='tick', path='C:/Data/tick', jobs='C:/Data/jobs.db')
+"""
+import os
+import sys
+import time
+from collections import namedtuple
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from queue import Empty
+from struct import Struct
+from traceback import format_exc
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QApplication
+
+from kiwoom.config import history
+from kiwoom.config.types import ExitType
+from kiwoom.core.bot import Bot
+from kiwoom.utils.general import clock
+
+
+# Layout of the shared block (seq, pid, beat, busy, nrq, nrs, cnt, code)
+#  - seq is odd while being written, so that a reader never sees a torn pulse
+#  - busy is the last time of progress while any request is in flight
+LAYOUT = Struct('<Qqddqqq16s')
+_SEQ = Struct('<Q')
+
+# Pulse read from the shared block
+Pulse = namedtuple('Pulse', ['pid', 'beat', 'busy', 'nrq', 'nrs', 'cnt', 'code'])
+
+# Requests answered by OnReceiveTrData and index of rq_name in their args
+_REQUESTS = {'comm_rq_data': 0, 'comm_kw_rq_data': 4}
+
+
+class Heartbeat:
+    """
+    Block of shared memory where a child process publishes its pulse
+
+    The supervisor creates a block and the child opens it by name and attaches a Bot.
+
+    :param name: str, optional
+        name of the block to open, a new block is created if None
+    """
+    def __init__(self, name=None):
+        self.owner = name is None
+        self.shm = SharedMemory(name=name, create=self.owner, size=LAYOUT.size)
+        if self.owner:
+            self.shm.buf[:LAYOUT.size] = bytes(LAYOUT.size)
+
+        self.bot = None
+        self.timer = None
+        self._requests = dict()
+        self._downloaded = None
+        self._seq = 0
+        self._pulse = None
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def read(self):
+        """
+        Returns the last pulse published by the child.
+
+        :return: Pulse
+        """
+        # Retries are bounded in case the child died while writing
+        for _ in range(1000):
+            vals = LAYOUT.unpack_from(self.shm.buf)
+            if vals[0] % 2 == 0 and vals[0] == _SEQ.unpack_from(self.shm.buf)[0]:
+                break
+            time.sleep(0)
+
+        pulse = Pulse._make(vals[1:])
+        return pulse._replace(code=pulse.code.rstrip(b'\x00').decode())
+
+    def reset(self):
+        """
+        Clears the pulse, ex) before spawning a new child.
+        """
+        self.shm.buf[:LAYOUT.size] = bytes(LAYOUT.size)
+
+    def attach(self, bot, interval=None):
+        """
+        Starts publishing the pulse of given bot in the child process.
+
+        :param bot: kiwoom.Bot
+        :param interval: float
+            seconds between beats, history.SUPERVISOR_INTERVAL by default
+        """
+        interval = history.SUPERVISOR_INTERVAL if interval is None else interval
+        now = time.time()
+        self.bot = bot
+        seq = _SEQ.unpack_from(self.shm.buf)[0]
+        self._seq = seq + seq % 2
+        self._pulse = [os.getpid(), now, now, 0, 0, 0, b'']
+        self._publish()
+
+        # To count requests accepted by the server
+        for fn, idx in _REQUESTS.items():
+            request = self._requests[fn] = getattr(bot.api, fn)
+
+            def wrapper(*args, _request=request, _idx=idx):
+                ret = _request(*args)
+                if ret == 0:
+                    self.sent(args[_idx])
+                return ret
+            setattr(bot.api, fn, wrapper)
+        bot.api.observe('on_receive_tr_data', self.received)
+
+        # To count items downloaded by Bot.histories()
+        self._downloaded = bot.downloaded
+
+        def downloaded(code):
+            self._pulse[5] += 1
+            self._publish()
+            self._downloaded(code)
+        bot.downloaded = downloaded
+
+        # To beat as long as the event loop runs, including waits for request limits
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.beat)
+        self.timer.start(int(interval * 1000))
+
+    def detach(self):
+        """
+        Stops publishing and restores the bot attached.
+        """
+        if self.bot is None:
+            return
+
+        self.timer.stop()
+        self.bot.api.unobserve('on_receive_tr_data', self.received)
+        for fn in self._requests:
+            delattr(self.bot.api, fn)
+        self.bot.downloaded = self._downloaded
+        self.bot, self.timer, self._downloaded = None, None, None
+        self._requests.clear()
+
+    def close(self):
+        """
+        Detaches and closes the block, which is also removed by the creator.
+        """
+        self.detach()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def beat(self):
+        self._pulse[1] = time.time()
+        self._publish()
+
+    def sent(self, rq_name):
+        # Waiting time of a request starts when nothing else is in flight
+        if self._pulse[3] == self._pulse[4]:
+            self._pulse[2] = time.time()
+        self._pulse[3] += 1
+        code = self.bot.share.args.get(rq_name, dict()).get('code')
+        if code is not None:
+            self._pulse[6] = str(code).encode()[:16]
+        self._publish()
+
+    def received(self, scr_no, rq_name, tr_code, record_name, prev_next):
+        self._pulse[2] = time.time()
+        self._pulse[4] = min(self._pulse[4] + 1, self._pulse[3])
+        self._publish()
+
+    def _publish(self):
+        # Odd seq while writing, then even again
+        buf = self.shm.buf
+        self._seq += 1
+        LAYOUT.pack_into(buf, 0, self._seq, *self._pulse[:6], self._pulse[6])
+        self._seq += 1
+        _SEQ.pack_into(buf, 0, self._seq)
+
+
+def work(factory, login, kwargs, name, interval, outbox):
+    """
+    Main function of a child process, which runs Bot.histories() with a heartbeat.
+
+    :param factory: callable
+        function that returns a Bot, ex) Bot or its subclass
+    :param login: callable, optional
+        function that logs in as login(bot), Bot.login() if None
+    :param kwargs: dict
+        args of Bot.histories()
+    :param name: str
+        name of the shared block of Heartbeat
+    :param interval: float
+        seconds between beats
+    :param outbox: multiprocessing.Queue
+        result of Bot.histories() to the supervisor
+    """
+    app = QApplication.instance() or QApplication(sys.argv)
+    bot = factory()
+    heartbeat = Heartbeat(name)
+    heartbeat.attach(bot, interval)
+    try:
+        if login is None:
+            bot.login()
+        else:
+            login(bot)
+        result = bot.histories(**kwargs)
+
+    except Exception:
+        print(f'\n[{clock()}] An error at Bot.histories() in the child process.\n\n{format_exc()}')
+        result = ExitType.FAILURE
+
+    finally:
+        heartbeat.close()
+
+    outbox.put(result)
+    app.closeAllWindows()
+
+
+class Supervisor:
+    """
+    Supervisor that keeps Bot.histories() running until the download is done
+
+    :param factory: callable
+        function that returns a Bot in the child, which must be picklable
+    :param login: callable, optional
+        function that logs in as login(bot), which must be picklable
+    :param timeout: float
+        seconds without a beat or an answer to a request before killing the child,
+        history.SUPERVISOR_TIMEOUT by default
+    :param interval: float
+        seconds between beats and checks, history.SUPERVISOR_INTERVAL by default
+    :param rest: float
+        seconds to rest when a child dies without any response, history.SUPERVISOR_REST by default
+    :param maxtry: int
+        number of times to retry after Bot.histories() fails by local errors
+    """
+    def __init__(self, factory=Bot, login=None, timeout=None, interval=None, rest=None, maxtry=2):
+        self.factory = factory
+        self.login = login
+        self.timeout = history.SUPERVISOR_TIMEOUT if timeout is None else timeout
+        self.interval = history.SUPERVISOR_INTERVAL if interval is None else interval
+        self.rest = history.SUPERVISOR_REST if rest is None else rest
+        self.maxtry = maxtry
+
+        self.pulse = None  # the last pulse of the child
+        self.spawns = 0  # number of children spawned
+        self.kills = 0  # number of frozen children killed
+
+    def run(self, **kwargs):
+        """
+        Runs Bot.histories() in child processes until the download is done.
+
+        :param kwargs:
+            args of Bot.histories(), such as market, period, path and jobs
+        :return: int
+            returns 0 (= ExitType.SUCCESS) if done, else -1 (= ExitType.FAILURE) after
+            failing by local errors more than maxtry times.
+        """
+        kwargs = dict(kwargs)
+        ctx = get_context('spawn')
+        outbox = ctx.Queue()
+        heartbeat = Heartbeat()
+        ntry = 0
+        self.spawns, self.kills = 0, 0
+
+        try:
+            while True:
+                print(f'[{clock()}] Starting a new child process.')
+                heartbeat.reset()
+                proc = ctx.Process(
+                    target=work,
+                    args=(self.factory, self.login, kwargs, heartbeat.name, self.interval, outbox),
+                    daemon=True
+                )
+                proc.start()
+                self.spawns += 1
+
+                frozen = self.watch(proc, heartbeat)
+                try:
+                    result = outbox.get(timeout=0 if frozen else 1)
+                except Empty:
+                    result = None
+
+                # 1) Download done
+                if result is ExitType.SUCCESS:
+                    print(f'[{clock()}] Download done.')
+                    return ExitType.SUCCESS
+
+                # 2) Download failed by local errors
+                elif result is ExitType.FAILURE:
+                    if ntry == self.maxtry:
+                        print(f'[{clock()}] Max tryout reached, stop downloading.')
+                        return ExitType.FAILURE
+                    ntry += 1
+                    print(f'[{clock()}] Retry downloading due to local errors.')
+
+                # 3) Jobs remain in the queue
+                elif result is ExitType.RESTART:
+                    print(f'[{clock()}] Resume pending jobs in a new child process.')
+
+                # 4) Request limit reached, restart with the slice returned
+                elif isinstance(result, tuple):
+                    kwargs['slice'] = result
+                    kwargs.pop('code', None)
+                    print(f'[{clock()}] Restart with slice={result} in a new child process.')
+
+                # 5) Child killed or died, right away if the server has responded
+                elif self.pulse is None or self.pulse.nrs == 0:
+                    print(f'[{clock()}] Take a {self.rest} seconds break for server to respond.')
+                    time.sleep(self.rest)
+
+        finally:
+            heartbeat.close()
+
+    def watch(self, proc, heartbeat):
+        """
+        Waits until the child exits, and kills it if frozen.
+
+        :param proc: multiprocessing.Process
+        :param heartbeat: Heartbeat
+        :return: bool
+            whether the child is killed as frozen
+        """
+        self.pulse = None
+        begin = time.time()
+        while True:
+            proc.join(self.interval)
+            if not proc.is_alive():
+                return False
+
+            pulse = heartbeat.read()
+            now = time.time()
+            if pulse.pid == 0:
+                # Not attached yet, i.e. the child is starting up
+                if now - begin > self.timeout:
+                    reason = f'not started in {self.timeout} seconds'
+                else:
+                    continue
+
+            elif now - pulse.beat > self.timeout:
+                reason = f'no beat for {now - pulse.beat:.0f} seconds'
+
+            elif pulse.nrq > pulse.nrs and now - pulse.busy > self.timeout:
+                reason = f'no response for {now - pulse.busy:.0f} seconds with code={pulse.code}'
+
+            else:
+                self.pulse = pulse
+                continue
+
+            self.pulse = None if pulse.pid == 0 else pulse
+            print(f'\n[{clock()}] Child process {proc.pid} has frozen ({reason}), respawning now.')
+            proc.kill()
+            proc.join()
+            self.kills += 1
+            return True
@@ -1,6 +1,14 @@
 from . import (
+    bar,
+    column,
+    jobs,
+    manifest,
     preps,
-    share
+    real,
+    ring,
+    share,
+    storage,
+    tickfile
 )
 
 from .share import Share
@@ -0,0 +1,213 @@
+"""
+Streaming aggregator of ticks into OHLCV bars
+
+Bars builds bars of each code incrementally from '주식체결' records of Kiwoom.bus, so that
+fresh bars during the session don't cost any TR request such as polling opt10080.
+
+Kinds of bars
+    'sec' & 'min'  : a bar for every 'unit' seconds or minutes, closed by the first tick
+                     of the next period. Labeled by the end of the period as opt10080,
+                     i.e. ticks in [09:00:00, 09:01:00) make the bar of '090100'.
+    'volume'       : a bar closed once its volume reaches 'unit'
+    'tick'         : a bar closed every 'unit' ticks
+    Bars of 'volume' and 'tick' are labeled by the time of their last tick.
+
+Bars have the same fields as outputs of opt10080 in Server.history(), i.e. 체결시간, 시가,
+고가, 저가, 현재가 and 거래량, and Bars.frame() returns them in the same DataFrame.
+
+Slots connected by Bars.connect() are called with (code, bar) whenever a bar closes. Just
+like a hook of Kiwoom.connect(), slots can be connected for specific codes.
+
+Ticks have only time of the day, so bars are labeled by the date of the session. If a tick
+is earlier than the last one by SESSION_GAP in kiwoom.config.real, i.e. the next session
+begins, bars being built are closed and the date rolls over to today.
+
+Usage example
+>>  bars = Bars(api, ['005930', '000660'], unit=1, kind='min')
+>>  bars.connect(lambda code, bar: print(code, bar.체결시간, bar.현재가))
+>>  bars.connect(strategy, '005930')  # bars of Samsung Electronics only
+>>  api.set_real_reg('1000', '005930;000660', '20;10;15;13', '0')
+>>  ...
+>>  df = bars.frame('005930')
+"""
+from collections import defaultdict, deque, namedtuple
+from datetime import datetime
+
+import pandas as pd
+
+from kiwoom.config import real
+from kiwoom.data.preps import datetimes
+from kiwoom.data.ring import TICK_FIDS
+
+
+# Kinds of bars
+KINDS = ('sec', 'min', 'volume', 'tick')
+
+# Fields of a bar, the same as multi outputs of opt10080 in kiwoom.config.history
+Bar = namedtuple('Bar', ['체결시간', '시가', '고가', '저가', '현재가', '거래량'])
+
+
+class Bars:
+    """
+    Builder of OHLCV bars for each code from real-time ticks
+
+    :param api: kiwoom.Kiwoom
+    :param codes: str or list of str, optional
+        codes to build bars, all codes registered by SetRealReg if None
+    :param unit: int
+        seconds, minutes, volume or number of ticks for a bar depending on kind
+    :param kind: str
+        one of 'sec', 'min', 'volume' and 'tick'
+    :param maxlen: int, optional
+        maximum number of closed bars to keep for each code, unlimited if None
+    :param date: str, optional
+        date of the session in 'YYYYMMDD', today if None, which rolls over every session
+    """
+    def __init__(self, api, codes=None, unit=1, kind='min', maxlen=None, date=None):
+        if kind not in KINDS:
+            raise ValueError(f"Kind of bars must be one of {KINDS}, not '{kind}'.")
+        if int(unit) < 1:
+            raise ValueError(f'Unit must be a positive integer, not {unit}.')
+
+        self.api = api
+        self.codes = codes
+        self.unit = int(unit)
+        self.kind = kind
+        self.date = datetime.now().strftime('%Y%m%d') if date is None else date
+        self.bars = defaultdict(lambda: deque(maxlen=maxlen))  # {code: closed bars}
+        self._fixed = date is not None
+        self._last = 0  # time of the last tick
+
+        # {code: [key, 체결시간, 시가, 고가, 저가, 현재가, 거래량, ticks]} of bars not closed yet
+        self._open = dict()
+        self._slots = dict()  # {code: (slot, ...)}, None for any code
+        self._period = {'sec': 1, 'min': 60}.get(kind, 0) * self.unit
+
+        api.subscribe(self.on_tick, '주식체결', codes, fids=TICK_FIDS)
+
+    def connect(self, slot, codes=None):
+        """
+        Connects a slot to be called with (code, bar) whenever a bar closes.
+
+        :param slot: callable
+        :param codes: str or list of str, optional
+            codes to connect, any code if None
+        """
+        if not callable(slot):
+            raise TypeError(f'Given slot, {slot}, must be callable.')
+        for code in self._keys(codes):
+            slots = self._slots.get(code, tuple())
+            if slot not in slots:
+                self._slots[code] = slots + (slot,)
+
+    def disconnect(self, slot, codes=None):
+        """
+        Disconnects what is connected by Bars.connect() with the same args.
+
+        :param slot: callable
+        :param codes: str or list of str, optional
+        """
+        for code in self._keys(codes):
+            slots = tuple(fn for fn in self._slots.get(code, tuple()) if fn != slot)
+            if slots:
+                self._slots[code] = slots
+            else:
+                self._slots.pop(code, None)
+
+    def current(self, code):
+        """
+        Returns the bar of the code being built, or None.
+
+        :param code: str
+        :return: Bar
+        """
+        bar = self._open.get(code)
+        return None if bar is None else Bar._make(bar[1:7])
+
+    def flush(self, codes=None):
+        """
+        Closes bars being built, ex) at the market close.
+
+        :param codes: str or list of str, optional
+            codes to close bars, all codes if None
+        """
+        for code in list(self._open) if codes is None else self._keys(codes):
+            if code in self._open:
+                self._close(code, self._open.pop(code))
+
+    def close(self):
+        """
+        Stops receiving ticks and closes bars being built.
+        """
+        self.api.unsubscribe(self.on_tick, '주식체결', self.codes)
+        self.flush()
+
+    def frame(self, code):
+        """
+        Returns closed bars of the code in the same form of Server.history() for opt10080.
+
+        :param code: str
+        :return: pandas.DataFrame
+            bars with datetime index of '체결시간'
+        """
+        df = pd.DataFrame(list(self.bars.get(code, tuple())), columns=Bar._fields)
+        df['체결시간'] = datetimes(df['체결시간'].to_numpy())
+        return df.set_index('체결시간')
+
+    def on_tick(self, code, real_type, rec):
+        # Subscriber of Kiwoom.bus that receives a record of TICK_FIDS
+        time, price = rec.체결시간, rec.현재가
+        if not time or price is None:
+            return
+        volume = abs(rec.거래량 or 0)
+
+        now = int(time)
+        if self._last - now > real.SESSION_GAP:
+            # Bars of the previous session are done
+            self.flush()
+            if not self._fixed:
+                self.date = datetime.now().strftime('%Y%m%d')
+        self._last = now
+
+        bar = self._open.get(code)
+        if self._period:
+            # To find the period of the tick, i.e. seconds since midnight // period
+            secs = int(time[:2]) * 3600 + int(time[2:4]) * 60 + int(time[4:6])
+            key = secs // self._period
+            if bar is not None and bar[0] != key:
+                self._close(code, self._open.pop(code))
+                bar = None
+            if bar is None:
+                end = (key + 1) * self._period
+                label = f'{self.date}{end // 3600:02}{end % 3600 // 60:02}{end % 60:02}'
+                bar = self._open[code] = [key, label, price, price, price, price, 0, 0]
+
+        elif bar is None:
+            bar = self._open[code] = [None, self.date + time, price, price, price, price, 0, 0]
+
+        else:
+            bar[1] = self.date + time
+
+        if price > bar[3]:
+            bar[3] = price
+        elif price < bar[4]:
+            bar[4] = price
+        bar[5] = price
+        bar[6] += volume
+        bar[7] += 1
+
+        # To close by volume or number of ticks
+        if (self.kind == 'volume' and bar[6] >= self.unit) or (self.kind == 'tick' and bar[7] >= self.unit):
+            self._close(code, self._open.pop(code))
+
+    def _close(self, code, bar):
+        bar = Bar._make(bar[1:7])
+        self.bars[code].append(bar)
+        for slot in self._slots.get(code, tuple()) + self._slots.get(None, tuple()):
+            slot(code, bar)
+
+    @staticmethod
+    def _keys(codes):
+        if codes is None or isinstance(codes, str):
+            return [codes]
+        return list(codes)
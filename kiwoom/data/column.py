@@ -0,0 +1,92 @@
+"""
+Typed column buffer for historical data downloaded page by page.
+
+The server sends pages from the newest to the oldest and each page is also ordered
+from the newest to the oldest. Column keeps a NumPy array and fills it from the back,
+so that the data is always in chronological order without reversing it afterwards.
+
+1) Growth
+    : capacity grows geometrically, so n rows cost O(n) copies in total.
+
+2) Type
+    : dtype is decided by the first page and promoted only if later pages need it,
+      ex) int64 -> float64 when NaN comes, or -> object when types are mixed.
+"""
+import numpy as np
+
+
+class Column:
+    """
+    Reverse-filled and geometrically growing NumPy buffer for a column.
+
+    :param capacity: int
+        number of rows allocated at first
+    """
+    def __init__(self, capacity=0):
+        self.buffer = None
+        self.capacity = capacity
+        self.start = capacity  # data lives in buffer[start:]
+
+    def __len__(self):
+        if self.buffer is None:
+            return 0
+        return len(self.buffer) - self.start
+
+    def prepend(self, vals):
+        """
+        Writes a page ordered from the newest to the oldest in front of existing data.
+
+        :param vals: list or numpy.ndarray
+            values of a page ordered from the newest to the oldest
+        """
+        vals = np.asarray(vals)
+        if vals.ndim != 1:
+            vals = vals.ravel()
+
+        n = len(vals)
+        if n == 0:
+            return
+
+        if self.buffer is None:
+            self.capacity = max(self.capacity, n)
+            self.buffer = np.empty(self.capacity, dtype=vals.dtype)
+            self.start = self.capacity
+
+        dtype = _promote(self.buffer.dtype, vals.dtype)
+        if dtype != self.buffer.dtype or n > self.start:
+            self._grow(n, dtype)
+
+        # Reverse the page into the free space before existing data
+        self.buffer[self.start - n:self.start] = vals[::-1]
+        self.start -= n
+
+    def values(self):
+        """
+        Returns a view of data in chronological order.
+
+        :return: numpy.ndarray
+        """
+        if self.buffer is None:
+            return np.empty(0)
+        return self.buffer[self.start:]
+
+    def _grow(self, n, dtype):
+        size = len(self)
+        capacity = len(self.buffer)
+        while capacity - size < n:
+            capacity = max(capacity * 2, 1)
+
+        buffer = np.empty(capacity, dtype=dtype)
+        buffer[capacity - size:] = self.buffer[self.start:]
+        self.buffer, self.capacity, self.start = buffer, capacity, capacity - size
+
+
+def _promote(old, new):
+    # To keep the type of data just as pandas infers from a list of values
+    if old == new:
+        return old
+    if old.kind in 'iuf' and new.kind in 'iuf':
+        return np.promote_types(old, new)
+    if old.kind == 'U' and new.kind == 'U':
+        return np.promote_types(old, new)
+    return np.dtype(object)
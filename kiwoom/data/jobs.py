@@ -0,0 +1,270 @@
+"""
+Persistent queue of download jobs in SQLite
+
+Restarting Bot.histories() with a slice loses all progress when the supervisor dies, and
+scans the list from the beginning again. Instead, JobQueue keeps a job for each item of
+(code, period, unit, start, end) in a SQLite file with its state, attempts and times, so
+that Bot.histories(jobs=...) resumes exactly where it stopped after any restart.
+
+States of a job
+    pending -> running -> done
+                       -> pending (released to restart, or failed less than max_attempts)
+                       -> failed (failed max_attempts times)
+
+Jobs left 'running' by a process that died are back to 'pending' by JobQueue.recover(),
+which Bot.histories() calls when it starts. Hence, only one Bot may consume a queue at a
+time, while any process can read it.
+
+A job is added only once for the same (code, period, unit, start, end), so that a done
+job is never downloaded again with the same args. To merge the latest data every day
+with the same queue, re-arm done jobs once before the first run of the day by
+JobQueue.reset(DONE) or JobQueue.add(..., requeue=True).
+
+Usage example
+>>  jobs = JobQueue('C:/Data/jobs.db')
+>>  jobs.add(bot.codes(market='0'), 'tick', start='20250304')
+>>  bot.histories(jobs=jobs, path='C:/Data/market/KOSPI/tick')
+>>  jobs.counts()  # {'done': 950, 'pending': 12, 'failed': 1}
+>>
+>>  # The next day, to merge the latest data
+>>  jobs.reset(DONE)
+>>  bot.histories(jobs=jobs, path='C:/Data/market/KOSPI/tick', merge=True)
+"""
+import sqlite3
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime
+
+
+# Job in the queue
+Job = namedtuple('Job', ['id', 'code', 'period', 'unit', 'start', 'end', 'state', 'attempts'])
+
+# States of a job
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    code TEXT NOT NULL,
+    period TEXT NOT NULL,
+    unit TEXT NOT NULL DEFAULT '',
+    start TEXT NOT NULL DEFAULT '',
+    end TEXT NOT NULL DEFAULT '',
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created TEXT NOT NULL,
+    updated TEXT NOT NULL,
+    started TEXT,
+    finished TEXT,
+    UNIQUE (code, period, unit, start, end)
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, id);
+"""
+
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _text(val):
+    # None can't be a part of UNIQUE key in SQLite, so that it's saved as ''
+    return '' if val is None else str(val)
+
+
+def _job(row):
+    id, code, period, unit, start, end, state, attempts = row
+    return Job(id, code, period, int(unit) if unit else None, start or None, end or None, state, attempts)
+
+
+class JobQueue:
+    """
+    SQLite-backed queue of download jobs
+
+    :param file: str
+        path to the SQLite file, created if not exists
+    :param max_attempts: int
+        number of attempts before a job is marked failed
+    :param timeout: float
+        seconds to wait for the lock held by another connection
+    """
+    def __init__(self, file, max_attempts=3, timeout=30):
+        self.file = file
+        self.max_attempts = max_attempts
+        self.db = sqlite3.connect(file, timeout=timeout, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(_SCHEMA)
+
+    def __len__(self):
+        return self.count()
+
+    def close(self):
+        self.db.close()
+
+    def add(self, codes, period, unit=None, start=None, end=None, requeue=False):
+        """
+        Adds a pending job for each code, skipping the ones already in the queue.
+
+        :param codes: str or list of str
+        :param period: str
+            one of tick, min, day, week, month and year
+        :param unit: int, optional
+        :param start: str, optional
+            'YYYYMMDD'
+        :param end: str, optional
+            'YYYYMMDD'
+        :param requeue: bool
+            whether to put jobs already done or failed back to pending with no attempts
+        :return: int
+            number of jobs newly added or requeued
+        """
+        codes = [codes] if isinstance(codes, str) else codes
+        now = _now()
+        rows = [(code, period, _text(unit), _text(start), _text(end), now, now) for code in codes]
+        with self._transaction():
+            before = self.db.total_changes
+            self.db.executemany(
+                'INSERT OR IGNORE INTO jobs (code, period, unit, start, end, created, updated) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)', rows
+            )
+            if requeue:
+                self.db.executemany(
+                    'UPDATE jobs SET state = ?, attempts = 0, error = NULL, updated = ? '
+                    'WHERE code = ? AND period = ? AND unit = ? AND start = ? AND end = ? AND state IN (?, ?)',
+                    [(PENDING, now, *row[:5], DONE, FAILED) for row in rows]
+                )
+            return self.db.total_changes - before
+
+    def claim(self):
+        """
+        Marks the oldest pending job running and returns it.
+
+        :return: Job or None
+            None if no pending job
+        """
+        with self._transaction():
+            row = self.db.execute(
+                'SELECT id, code, period, unit, start, end, state, attempts FROM jobs '
+                'WHERE state = ? ORDER BY id LIMIT 1', (PENDING,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            now = _now()
+            self.db.execute(
+                'UPDATE jobs SET state = ?, attempts = attempts + 1, started = ?, updated = ? WHERE id = ?',
+                (RUNNING, now, now, row[0])
+            )
+        return _job(row)._replace(state=RUNNING, attempts=row[-1] + 1)
+
+    def done(self, id):
+        """
+        Marks the job done.
+
+        :param id: int
+        """
+        now = _now()
+        self.db.execute(
+            'UPDATE jobs SET state = ?, error = NULL, finished = ?, updated = ? WHERE id = ?',
+            (DONE, now, now, id)
+        )
+
+    def fail(self, id, error=None):
+        """
+        Marks the job failed if it has been tried max_attempts times, else pending again.
+
+        :param id: int
+        :param error: str, optional
+            message of the error
+        """
+        self.db.execute(
+            'UPDATE jobs SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, error = ?, updated = ? '
+            'WHERE id = ?', (self.max_attempts, FAILED, PENDING, error, _now(), id)
+        )
+
+    def release(self, id):
+        """
+        Puts the running job back to pending, ex) to restart later.
+
+        The attempt counted by JobQueue.claim() is taken back, as the job didn't fail.
+
+        :param id: int
+        """
+        self.db.execute(
+            'UPDATE jobs SET state = ?, attempts = MAX(attempts - 1, 0), updated = ? WHERE id = ? AND state = ?',
+            (PENDING, _now(), id, RUNNING)
+        )
+
+    def recover(self):
+        """
+        Puts jobs left running by a process that died back to pending.
+
+        :return: int
+            number of jobs recovered
+        """
+        cur = self.db.execute(
+            'UPDATE jobs SET state = ?, updated = ? WHERE state = ?', (PENDING, _now(), RUNNING)
+        )
+        return cur.rowcount
+
+    def reset(self, state=FAILED):
+        """
+        Puts jobs in the state back to pending with no attempts, ex) to retry failed ones.
+
+        :param state: str
+        :return: int
+            number of jobs reset
+        """
+        cur = self.db.execute(
+            'UPDATE jobs SET state = ?, attempts = 0, error = NULL, updated = ? WHERE state = ?',
+            (PENDING, _now(), state)
+        )
+        return cur.rowcount
+
+    def count(self, state=None):
+        """
+        Returns the number of jobs in the state, all jobs if None.
+
+        :param state: str, optional
+        :return: int
+        """
+        if state is None:
+            return self.db.execute('SELECT COUNT(*) FROM jobs').fetchone()[0]
+        return self.db.execute('SELECT COUNT(*) FROM jobs WHERE state = ?', (state,)).fetchone()[0]
+
+    def counts(self):
+        """
+        Returns the number of jobs for each state.
+
+        :return: dict
+            {state: number of jobs}
+        """
+        return dict(self.db.execute('SELECT state, COUNT(*) FROM jobs GROUP BY state').fetchall())
+
+    def jobs(self, state=None):
+        """
+        Returns jobs in the state in order of ids, all jobs if None.
+
+        :param state: str, optional
+        :return: list of Job
+        """
+        sql = 'SELECT id, code, period, unit, start, end, state, attempts FROM jobs'
+        if state is None:
+            rows = self.db.execute(sql + ' ORDER BY id').fetchall()
+        else:
+            rows = self.db.execute(sql + ' WHERE state = ? ORDER BY id', (state,)).fetchall()
+        return [_job(row) for row in rows]
+
+    @contextmanager
+    def _transaction(self):
+        # To take the write lock at the beginning, so that claims never race
+        self.db.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            self.db.execute('ROLLBACK')
+            raise
+        self.db.execute('COMMIT')
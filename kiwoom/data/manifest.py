@@ -0,0 +1,191 @@
+"""
+Manifest of downloaded historical data in a directory.
+
+A sidecar json file in each data path keeps an entry for every file written by
+Server.history_to_file(), so that what is downloaded can be checked without opening
+thousands of files.
+
+Entry of each file
+    {
+        'code': '005930',
+        'fmt': 'csv',
+        'period': 'tick',
+        'unit': 1,
+        'first': '2024-01-02 09:00:00',
+        'last': '2024-11-15 15:30:00',
+        'rows': 1234567,
+        'hash': 'blake2b:...',
+        'size': 123456789,
+        'mtime_ns': 1731650000000000000,
+        'updated': '2024-11-15 18:01:23'
+    }
+
+Manifest is rewritten atomically with os.replace() while holding a lock file, so that
+readers never see a partial file and several processes can share the same path.
+
+Usage example
+>>  manifest = Manifest('C:/Data/market/KOSPI/tick')
+>>  manifest.get('005930.csv')['last']
+"""
+import json
+from datetime import datetime
+from hashlib import blake2b
+from os import O_CREAT, O_EXCL, O_WRONLY, close, getpid, open as os_open, remove, replace, stat
+from os.path import basename, exists, getmtime, join
+from time import sleep, time
+
+
+# Name of the sidecar file in each data path
+MANIFEST = 'manifest.json'
+
+# Loaded entries for each manifest with its (mtime_ns, size) to skip parsing again
+_CACHE = dict()
+
+
+def digest(file, block=2 ** 20):
+    """
+    Returns blake2b hash of the file content as 'blake2b:<hex>'.
+
+    :param file: str
+    :param block: int
+        number of bytes to read at a time
+    """
+    h = blake2b(digest_size=16)
+    with open(file, 'rb') as f:
+        for chunk in iter(lambda: f.read(block), b''):
+            h.update(chunk)
+    return f'blake2b:{h.hexdigest()}'
+
+
+class Manifest:
+    """
+    Sidecar json file that describes every data file in the path.
+
+    :param path: str
+        data path where files are saved
+    :param name: str
+        file name of the manifest
+    :param timeout: float
+        seconds to wait for the lock held by another process
+    """
+    def __init__(self, path, name=MANIFEST, timeout=30):
+        self.path = path
+        self.file = join(path, name)
+        self.lock = self.file + '.lock'
+        self.timeout = timeout
+
+    def __contains__(self, file):
+        return basename(file) in self.load()
+
+    def load(self):
+        """
+        Returns all entries as a dict of {file name: entry}.
+        """
+        try:
+            st = stat(self.file)
+        except FileNotFoundError:
+            return dict()
+
+        key = (st.st_mtime_ns, st.st_size)
+        if self.file in _CACHE and _CACHE[self.file][0] == key:
+            return _CACHE[self.file][1]
+
+        with open(self.file, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+        _CACHE[self.file] = (key, entries)
+        return entries
+
+    def get(self, file):
+        """
+        Returns the entry of given file or None if not recorded.
+
+        :param file: str
+            file name or path to the file
+        """
+        return self.load().get(basename(file))
+
+    def fresh(self, file):
+        """
+        Returns the entry if the file has not been changed since recorded, else None.
+
+        :param file: str
+            path to the file
+        """
+        entry = self.get(file)
+        if entry is None or not exists(file):
+            return None
+        st = stat(file)
+        if entry.get('size') != st.st_size or entry.get('mtime_ns') != st.st_mtime_ns:
+            return None
+        return entry
+
+    def update(self, file, **entry):
+        """
+        Records an entry for given file. Size and modified time are added automatically.
+
+        :param file: str
+            path to the file
+        :param entry: dict
+            information of the file such as first, last, rows, period, unit and hash
+        """
+        st = stat(file)
+        entry = {key: _jsonable(val) for key, val in entry.items()}
+        entry.update(
+            size=st.st_size,
+            mtime_ns=st.st_mtime_ns,
+            updated=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        )
+
+        with self:
+            entries = dict(self.load())
+            entries[basename(file)] = entry
+            self.dump(entries)
+
+    def remove(self, file):
+        """
+        Removes the entry of given file if any.
+        """
+        with self:
+            entries = dict(self.load())
+            if entries.pop(basename(file), None) is not None:
+                self.dump(entries)
+
+    def dump(self, entries):
+        # Write to a temporary file and replace, so that readers never see a partial file
+        tmp = f'{self.file}.{getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False, indent=1, sort_keys=True)
+        replace(tmp, self.file)
+
+    def __enter__(self):
+        begin = time()
+        while True:
+            try:
+                close(os_open(self.lock, O_CREAT | O_EXCL | O_WRONLY))
+                return self
+            except FileExistsError:
+                # To release the lock left by a dead process
+                try:
+                    if time() - getmtime(self.lock) > self.timeout:
+                        remove(self.lock)
+                        continue
+                except FileNotFoundError:
+                    continue
+                if time() - begin > self.timeout:
+                    raise TimeoutError(f"Can't acquire the lock of manifest, '{self.lock}'.")
+                sleep(0.01)
+
+    def __exit__(self, *exc):
+        try:
+            remove(self.lock)
+        except FileNotFoundError:
+            pass
+
+
+def _jsonable(val):
+    # Timestamps are saved as strings
+    if hasattr(val, 'isoformat'):
+        return str(val)
+    if hasattr(val, 'item'):  # numpy scalars
+        return val.item()
+    return val
@@ -0,0 +1,89 @@
+"""
+Decoder of real-time data into records
+
+Fetching each FID by GetCommRealData() costs a dynamicCall, and its result is parsed by
+hand afterwards. Instead, Decoder splits real_data once with the layout of the real type
+in kiwoom.config.real, picks the values of needed FIDs by precomputed indices and parses
+them with pre-processors chosen in advance, into a namedtuple of fixed fields.
+
+The layout is checked against GetCommRealData() at the first event. If it doesn't match,
+or the layout is unknown, values are fetched by GetCommRealData() for each FID instead.
+
+Usage example
+>>  decoder = Decoder(api, '주식체결', [20, 10, 15])
+>>
+>>  def slot(code, real_type, real_data):
+>>      rec = decoder(code, real_data)
+>>      rec.체결시간, rec.현재가, rec.거래량  # ('090000', 70000, -10)
+"""
+from collections import namedtuple
+from operator import itemgetter
+
+from kiwoom.config import real
+
+
+class Decoder:
+    """
+    Callable that decodes real_data of the real type into a record of given FIDs
+
+    :param api: kiwoom.Kiwoom
+    :param real_type: str
+        one of real types listed in KOA Studio, ex) '주식체결'
+    :param fids: list of int
+        FIDs to decode, all FIDs in the layout if None
+    """
+    def __init__(self, api, real_type, fids=None):
+        layout = real.layout(real_type)
+        if fids is None:
+            if layout is None:
+                raise KeyError(f"Layout of '{real_type}' is unknown. FIDs must be given.")
+            fids = layout
+
+        self.api = api
+        self.real_type = real_type
+        self.fids = tuple(int(fid) for fid in fids)
+        self.record = namedtuple('Record', [real.field(fid) for fid in self.fids])
+        self.parsers = tuple(real.preper(fid) for fid in self.fids)
+
+        # To pick values of FIDs from split real_data at once
+        self.valid = None  # whether the layout matches, checked at the first event
+        self.getter = None
+        if layout is not None and self.fids and set(self.fids).issubset(layout):
+            indices = [layout.index(fid) for fid in self.fids]
+            self.size = max(indices) + 1
+            getter = itemgetter(*indices)
+            self.getter = getter if len(indices) > 1 else lambda vals: (getter(vals),)
+        else:
+            self.valid = False
+
+    def __call__(self, code, real_data):
+        """
+        Returns a record of FIDs decoded from real_data. This must be called inside of
+        on_receive_real_data event, since GetCommRealData() may be needed.
+
+        :param code: str
+        :param real_data: str
+            real_data passed into on_receive_real_data
+        :return: namedtuple
+        """
+        raw = None
+        if self.valid is not False:
+            vals = real_data.split('\t')
+            if len(vals) >= self.size:
+                raw = self.getter(vals)
+                if self.valid is None:
+                    self.validate(code, raw)
+                    if not self.valid:
+                        raw = None
+
+        # Fetch each FID, otherwise
+        if raw is None:
+            raw = [self.api.get_comm_real_data(code, fid) for fid in self.fids]
+        return self.record._make([fn(x) for fn, x in zip(self.parsers, raw)])
+
+    def validate(self, code, raw):
+        # To check the layout with values from GetCommRealData()
+        self.valid = all(
+            str(val).strip() == self.api.get_comm_real_data(code, fid).strip()
+            for fid, val in zip(self.fids, raw)
+        )
@@ -0,0 +1,177 @@
+"""
+Fixed-memory ring buffers of real-time data
+
+Ring keeps the last 'capacity' items in a NumPy structured array. Every item is written
+twice, at i and i + capacity of a buffer twice as large, so that the last n items are
+always contiguous and returned as a view without copying.
+
+TickStore keeps a Ring of ticks for each code, fed by Kiwoom.bus with records of '주식체결'.
+Memory is fixed by capacity, i.e. 2 * capacity * TICK.itemsize bytes for each code, no
+matter how long the session is.
+
+Usage example
+>>  ticks = TickStore(api, capacity=4096)
+>>  api.set_real_reg('1000', '005930;000660', '20;10;15;13', '0')
+>>  ...
+>>  window = ticks['005930'].view(100)  # the last 100 ticks
+>>  window['price'].mean(), window['volume'][window['side'] > 0].sum()
+"""
+import numpy as np
+
+
+# Layout of a tick
+TICK = np.dtype([
+    ('time', np.int32),  # HHMMSS
+    ('price', np.int64),
+    ('volume', np.int64),
+    ('side', np.int8),  # 1 for buy and -1 for sell
+    ('cum_volume', np.int64)
+])
+
+# FIDs of '주식체결' to make a tick, i.e. 체결시간, 현재가, 거래량 and 누적거래량
+TICK_FIDS = (20, 10, 15, 13)
+
+
+def tick(rec):
+    """
+    Returns a tick of TICK layout from a record of '주식체결' with TICK_FIDS.
+
+    Note that the record may have FIDs of other subscribers as well.
+
+    :param rec: namedtuple
+        record decoded by kiwoom.data.real.Decoder
+    :return: tuple
+        (time, price, volume, side, cum_volume)
+    """
+    volume = rec.거래량 or 0
+    return (
+        int(rec.체결시간 or 0),
+        rec.현재가 or 0,
+        abs(volume),
+        1 if volume >= 0 else -1,
+        rec.누적거래량 or 0
+    )
+
+
+class Ring:
+    """
+    Ring buffer of fixed capacity with O(1) append and zero-copy views.
+
+    :param capacity: int
+        maximum number of items to keep
+    :param dtype: numpy.dtype
+        dtype of an item, structured dtype is possible
+    """
+    def __init__(self, capacity, dtype=TICK):
+        if capacity < 1:
+            raise ValueError(f'Capacity must be a positive integer, not {capacity}.')
+
+        self.capacity = int(capacity)
+        self.dtype = np.dtype(dtype)
+        self.count = 0  # number of items appended in total
+        self._buf = np.zeros(2 * self.capacity, dtype=self.dtype)
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, item):
+        """
+        Appends an item, overwriting the oldest one if full.
+
+        :param item: tuple or scalar
+            value of an item of dtype, ex) (time, price, volume, side, cum_volume)
+        """
+        i = self.count % self.capacity
+        self._buf[i] = item
+        self._buf[i + self.capacity] = item
+        self.count += 1
+
+    def view(self, n=None):
+        """
+        Returns the last n items in chronological order as a read-only view.
+
+        Note that the view shares memory with the buffer, so that it changes once the
+        items are overwritten by later appends. Copy it to keep longer.
+
+        :param n: int, optional
+            number of items, all items kept if None
+        :return: numpy.ndarray
+        """
+        size = len(self)
+        n = size if n is None else min(max(int(n), 0), size)
+        end = (self.count - 1) % self.capacity + self.capacity + 1 if self.count else 0
+        view = self._buf[end - n: end]
+        view.flags.writeable = False
+        return view
+
+    def last(self):
+        """
+        Returns the last item or None if empty.
+        """
+        if not self.count:
+            return None
+        return self._buf[(self.count - 1) % self.capacity]
+
+    def clear(self):
+        """
+        Forgets all items without releasing memory.
+        """
+        self.count = 0
+
+
+class TickStore:
+    """
+    Ring buffers of ticks for each code, fed by on_receive_real_data.
+
+    :param api: kiwoom.Kiwoom
+    :param codes: list of str, optional
+        codes to keep, all codes registered by SetRealReg if None
+    :param capacity: int
+        number of ticks to keep for each code
+    """
+    def __init__(self, api, codes=None, capacity=2 ** 12):
+        self.api = api
+        self.codes = codes
+        self.capacity = capacity
+        self.rings = dict()
+
+        # Buffers of given codes are allocated in advance
+        for code in ([codes] if isinstance(codes, str) else codes or list()):
+            self.rings[code] = Ring(capacity, TICK)
+
+        api.subscribe(self.on_tick, '주식체결', codes, fids=TICK_FIDS)
+
+    def __contains__(self, code):
+        return code in self.rings
+
+    def __getitem__(self, code):
+        return self.rings[code]
+
+    def __iter__(self):
+        return iter(self.rings)
+
+    def view(self, code, n=None):
+        """
+        Returns the last n ticks of the code as a read-only view, see Ring.view().
+
+        :param code: str
+        :param n: int, optional
+        :return: numpy.ndarray
+        """
+        if code not in self.rings:
+            return np.zeros(0, dtype=TICK)
+        return self.rings[code].view(n)
+
+    def close(self):
+        """
+        Stops receiving ticks. Ticks kept so far remain.
+        """
+        self.api.unsubscribe(self.on_tick, '주식체결', self.codes)
+
+    def on_tick(self, code, real_type, rec):
+        # Subscriber of Kiwoom.bus that receives a record of TICK_FIDS
+        ring = self.rings.get(code)
+        if ring is None:
+            ring = self.rings[code] = Ring(self.capacity, TICK)
+
+        ring.append(tick(rec))
@@ -1,5 +1,7 @@
 from collections import defaultdict
 
+from kiwoom.data.column import Column
+
 
 TYPES = ('single', 'multi')
 
@@ -29,7 +31,7 @@ class Share:
         self.args = dict()
         self.single = defaultdict(dict)
         self.multi = defaultdict(lambda: defaultdict(list))
-        self.history = defaultdict(lambda: defaultdict(list))
+        self.history = defaultdict(lambda: defaultdict(Column))
 
     """
     Dictionary-like Methods
@@ -167,15 +169,16 @@ class Share:
     History Data
     """
     def get_history(self, code=None, key=None):
+        # Note that data is returned in chronological order as numpy.ndarray
         if code is None:
             return self.history
         elif key is None:
-            return self.history[code]
-        return self.history[code][key]
+            return {k: col.values() for k, col in self.history[code].items()}
+        return self.history[code][key].values()
 
     def extend_history(self, code, key, vals):
-        # To Extend list to original data
-        self.history[code][key] += vals
+        # To write a page from the newest to the oldest in front of original data
+        self.history[code][key].prepend(vals)
 
     def remove_history(self, code):
         if code in self.history:
@@ -0,0 +1,545 @@
+"""
+Storage backends for downloaded historical data.
+
+Each backend reads and writes a DataFrame with datetime index ('일자' or '체결시간').
+Backend can be selected per call of Bot.history() and Bot.histories() with 'fmt'.
+
+1) CSV (default)
+    : text file encoded in config.ENCODING, which needs to parse datetime when read.
+      Supports incremental merge, i.e. truncating the tail and appending new rows.
+
+2) Parquet
+    : columnar file with typed datetime index, written in row groups so that readers
+      can skip groups by statistics of the index. Requires pyarrow.
+      Supports incremental merge by row groups, i.e. the boundary is found by statistics
+      of the index and only the overlapping row group is decoded. Note that Parquet has
+      no in-place append, so that the file is still rewritten group by group.
+
+3) Feather
+    : columnar file for the fastest read and write without row groups. Requires pyarrow.
+
+Usage example
+>>  bot.history('005930', 'tick', path='data', fmt='parquet')
+>>  bot.histories(market='0', period='tick', fmt=Parquet(row_group_size=50000))
+"""
+from os import SEEK_END, remove, replace
+from os.path import exists, getsize, join
+
+import pandas as pd
+
+from kiwoom import config
+
+
+def _pyarrow():
+    # Optional dependency, so import only when needed
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Columnar formats need 'pyarrow'. Try 'pip install kiwoom[parquet]'.")
+    return pyarrow
+
+
+def _typed(df):
+    # Columns with mixed types, i.e. numbers and strings, are saved as strings
+    df = df.copy(deep=False)
+    for col in df.columns:
+        if df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True).startswith('mixed'):
+            df[col] = df[col].astype(str)
+    return df
+
+
+class Storage:
+    """
+    Base class of storage backends. Override read() and write() to add a new format.
+    """
+    name = ''
+    ext = ''
+
+    def file(self, path, code):
+        """
+        Returns path to the file of given code.
+
+        :param path: str
+        :param code: str
+        """
+        return join(path, code if code.endswith(self.ext) else code + self.ext)
+
+    def read(self, file, col):
+        """
+        Returns DataFrame with datetime index named col.
+
+        :param file: str
+        :param col: str
+            name of datetime column, '일자' or '체결시간'
+        """
+        raise NotImplementedError
+
+    def write(self, df, file):
+        """
+        Writes DataFrame with datetime index to file, which will be overwritten.
+
+        :param df: pandas.DataFrame
+        :param file: str
+        """
+        raise NotImplementedError
+
+    def last(self, file, col):
+        """
+        Returns the last timestamp in the file or None if there's no data.
+
+        Override this to avoid loading the whole file.
+
+        :param file: str
+        :param col: str
+            name of datetime column, '일자' or '체결시간'
+        :return: pandas.Timestamp or None
+        """
+        df = self.read(file, col)
+        return df.index[-1] if not df.empty else None
+
+    def summary(self, file, col):
+        """
+        Returns (first timestamp, last timestamp, number of rows) in the file.
+
+        Override this to avoid loading the whole file.
+
+        :param file: str
+        :param col: str
+            name of datetime column, '일자' or '체결시간'
+        :return: tuple
+        """
+        df = self.read(file, col)
+        if df.empty:
+            return None, None, 0
+        return df.index[0], df.index[-1], len(df)
+
+    def header(self, file):
+        """
+        Returns names of index and columns in the file if incremental merge is supported, else None.
+
+        :param file: str
+        """
+        return None
+
+    def locate(self, file, ts, side='left', block=2 ** 16):
+        """
+        Returns where to truncate the file to merge data from ts incrementally.
+        See CSV.locate() for details. None if not supported.
+        """
+        return None
+
+    def end(self, file):
+        """
+        Returns the offset of the end of data, i.e. to append without truncating.
+
+        :param file: str
+        :return: int
+        """
+        raise NotImplementedError
+
+    def append(self, df, file, offset):
+        """
+        Truncates the file at offset and appends DataFrame without header.
+
+        :param df: pandas.DataFrame
+        :param file: str
+        :param offset: int
+        :return: int or None
+            number of rows truncated, None if it can't be appended without touching the file
+        """
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f'{type(self).__name__}()'
+
+
+class CSV(Storage):
+    name = 'csv'
+    ext = '.csv'
+
+    def __init__(self, encoding=None):
+        self.encoding = encoding
+
+    def read(self, file, col):
+        return pd.read_csv(
+            file,
+            index_col=[col],
+            parse_dates=[col],
+            encoding=self.encoding or config.ENCODING
+        )
+
+    def write(self, df, file):
+        df.to_csv(file, encoding=self.encoding or config.ENCODING)
+
+    def last(self, file, col, block=2 ** 12):
+        # Read from the end of file until the last line is complete
+        with open(file, 'rb') as f:
+            f.readline()
+            begin = f.tell()
+            pos = f.seek(0, SEEK_END)
+
+            tail = b''
+            while pos > begin:
+                size = min(block, pos - begin)
+                pos -= size
+                f.seek(pos)
+                tail = f.read(size) + tail
+
+                lines = tail.split(b'\n')
+                idx = [i for i, line in enumerate(lines) if line.strip()]
+                if idx and (idx[-1] > 0 or pos == begin):
+                    line = lines[idx[-1]]
+                    return pd.Timestamp(line[:line.find(b',')].decode())
+        return None
+
+    def summary(self, file, col, block=2 ** 20):
+        with open(file, 'rb') as f:
+            f.readline()
+            line = f.readline()
+            first = pd.Timestamp(line[:line.find(b',')].decode()) if line.strip() else None
+
+            # To count lines without parsing
+            rows = 1 if first is not None else 0
+            for chunk in iter(lambda: f.read(block), b''):
+                rows += chunk.count(b'\n')
+        return first, self.last(file, col), rows
+
+    def header(self, file):
+        with open(file, 'rb') as f:
+            line = f.readline()
+        return line.rstrip(b'\r\n').decode(self.encoding or config.ENCODING).split(',')
+
+    def locate(self, file, ts, side='left', block=2 ** 16):
+        """
+        Scans the file backward from the end and finds the first line whose timestamp is
+        equal to or greater than ts for side='left' (greater than ts for side='right').
+
+        Only the tail of the file is read, block by block, until the boundary is found.
+        Returns None if the file can't be merged incrementally, i.e. the file doesn't end
+        with a new line, the tail is not in chronological order or, for side='left', the
+        whole data starts after ts.
+
+        :param file: str
+        :param ts: pandas.Timestamp
+        :param side: str
+            'left' or 'right'
+        :param block: int
+            number of bytes to read at a time
+        :return: tuple or None
+            (offset, equal, last) where offset is the position of the line in bytes, equal
+            is whether a line with the same timestamp as ts exists and last is the timestamp
+            of the last line in the file.
+        """
+        with open(file, 'rb') as f:
+            f.readline()
+            begin = f.tell()
+            end = f.seek(0, SEEK_END)
+
+            # No data but header
+            if end == begin:
+                return begin, False, None
+
+            # To append new lines right after the last line
+            f.seek(end - 1)
+            if f.read(1) != b'\n':
+                return None
+
+            pos, rest = end, b''
+            offset, equal, last, nxt = end, False, None, None
+            while pos > begin:
+                size = min(block, pos - begin)
+                pos -= size
+                f.seek(pos)
+                chunk = f.read(size) + rest
+
+                # The first line may be cut off unless the chunk starts from the beginning
+                lines = chunk.split(b'\n')
+                start = pos
+                if pos > begin:
+                    rest = lines.pop(0)
+                    start += len(rest) + 1
+                else:
+                    rest = b''
+
+                starts, stamps = list(), list()
+                for line in lines:
+                    if line.strip():
+                        starts.append(start)
+                        stamps.append(line[:line.find(b',')].decode())
+                    start += len(line) + 1
+
+                try:
+                    stamps = pd.to_datetime(stamps)
+                except (ValueError, TypeError):
+                    return None
+
+                # From the newest to the oldest
+                for start, stamp in zip(reversed(starts), reversed(stamps)):
+                    if last is None:
+                        last = stamp
+                    if nxt is not None and stamp > nxt:
+                        return None
+                    nxt = stamp
+
+                    if stamp > ts or (side == 'left' and stamp == ts):
+                        offset = start
+                        equal = equal or stamp == ts
+                        continue
+
+                    # Boundary found
+                    equal = equal or stamp == ts
+                    return offset, equal, last
+
+        # The whole data follows ts
+        if side == 'left' and not equal:
+            return None
+        return offset, equal, last
+
+    def end(self, file):
+        return getsize(file)
+
+    def append(self, df, file, offset):
+        encoding = self.encoding or config.ENCODING
+        data = df.to_csv(header=False).encode(encoding)
+        with open(file, 'r+b') as f:
+            # Only the tail after offset is read to count rows truncated
+            f.seek(offset)
+            dropped = f.read().count(b'\n')
+            f.truncate(offset)
+            f.seek(offset)
+            f.write(data)
+        return dropped
+
+
+class Parquet(Storage):
+    name = 'parquet'
+    ext = '.parquet'
+
+    def __init__(self, row_group_size=2 ** 17, compression='snappy'):
+        self.row_group_size = row_group_size
+        self.compression = compression
+
+    def read(self, file, col):
+        _pyarrow()
+        df = pd.read_parquet(file, engine='pyarrow')
+        if df.index.name != col and col in df.columns:
+            df.set_index(col, inplace=True)
+        return df
+
+    def last(self, file, col):
+        # Statistics of the last row group, if any, have the last timestamp
+        pq = _pyarrow().parquet
+        meta = pq.ParquetFile(file).metadata
+        if meta.num_rows == 0:
+            return None
+
+        names = [meta.schema.column(i).name for i in range(meta.num_columns)]
+        if col in names:
+            group = meta.row_group(meta.num_row_groups - 1)
+            stats = group.column(names.index(col)).statistics
+            if stats is not None and stats.has_min_max:
+                return pd.Timestamp(stats.max)
+        return super().last(file, col)
+
+    def summary(self, file, col):
+        pq = _pyarrow().parquet
+        meta = pq.ParquetFile(file).metadata
+        if meta.num_rows == 0:
+            return None, None, 0
+
+        names = [meta.schema.column(i).name for i in range(meta.num_columns)]
+        if col in names:
+            stats = meta.row_group(0).column(names.index(col)).statistics
+            if stats is not None and stats.has_min_max:
+                return pd.Timestamp(stats.min), self.last(file, col), meta.num_rows
+        return super().summary(file, col)
+
+    def write(self, df, file):
+        _pyarrow()
+        _typed(df).to_parquet(
+            file,
+            engine='pyarrow',
+            compression=self.compression,
+            row_group_size=self.row_group_size
+        )
+
+    def header(self, file):
+        schema = _pyarrow().parquet.read_schema(file)
+        index = (schema.pandas_metadata or dict()).get('index_columns', list())
+        # Only a named datetime index, not RangeIndex or MultiIndex
+        if len(index) != 1 or not isinstance(index[0], str):
+            return None
+        return index + [name for name in schema.names if name != index[0]]
+
+    def locate(self, file, ts, side='left', block=None):
+        """
+        Finds the first row whose timestamp is equal to or greater than ts for side='left'
+        (greater than ts for side='right'), in the same way as CSV.locate().
+
+        Row groups are skipped by statistics of the index and only the row group with the
+        boundary is read. Returns None if the file can't be merged incrementally, i.e. no
+        statistics, row groups not in chronological order or, for side='left', the whole
+        data starts after ts.
+
+        :param file: str
+        :param ts: pandas.Timestamp
+        :param side: str
+            'left' or 'right'
+        :param block: None
+            not used, to have the same signature as CSV.locate()
+        :return: tuple or None
+            (offset, equal, last) where offset is the number of rows before the boundary.
+        """
+        header = self.header(file)
+        if header is None:
+            return None
+
+        pf = _pyarrow().parquet.ParquetFile(file)
+        meta = pf.metadata
+        if meta.num_rows == 0:
+            return 0, False, None
+
+        # (min, max, number of rows) of the index in each row group
+        idx = pf.schema_arrow.get_field_index(header[0])
+        groups = list()
+        for i in range(meta.num_row_groups):
+            group = meta.row_group(i)
+            if group.num_rows == 0:
+                continue
+            stats = group.column(idx).statistics
+            if stats is None or not stats.has_min_max:
+                return None
+            groups.append((i, pd.Timestamp(stats.min), pd.Timestamp(stats.max), group.num_rows))
+
+        if any(prev[2] > nxt[1] for prev, nxt in zip(groups, groups[1:])):
+            return None
+
+        # From the newest row group to the oldest, until the boundary is in the group
+        last, offset = groups[-1][2], meta.num_rows
+        for k in range(len(groups) - 1, -1, -1):
+            i, lo, hi, num = groups[k]
+            offset -= num
+            if lo < ts or (side == 'right' and lo == ts):
+                stamps = pd.DatetimeIndex(pf.read_row_group(i, columns=[header[0]]).column(0).to_numpy())
+                if not stamps.is_monotonic_increasing:
+                    return None
+                pos = stamps.searchsorted(ts, side=side)
+                if side == 'left':
+                    equal = stamps[pos] == ts if pos < num else k + 1 < len(groups) and groups[k + 1][1] == ts
+                else:
+                    equal = pos > 0 and stamps[pos - 1] == ts
+                return offset + pos, bool(equal), last
+
+        # The whole data follows ts
+        equal = groups[0][1] == ts
+        if side == 'left' and not equal:
+            return None
+        return 0, bool(equal), last
+
+    def end(self, file):
+        return _pyarrow().parquet.ParquetFile(file).metadata.num_rows
+
+    def append(self, df, file, offset):
+        """
+        Keeps the first 'offset' rows of the file and appends DataFrame as new row groups.
+
+        Row groups before the boundary are copied as they are, and the group with the
+        boundary is merged with new data not to leave small row groups behind. As Parquet
+        can't be truncated in place, the result is written to a temporary file first and
+        replaces the original one, so that the file is never left broken.
+
+        :param df: pandas.DataFrame
+        :param file: str
+        :param offset: int
+            number of rows to keep
+        :return: int or None
+            number of rows truncated, None if types of columns differ from the file
+        """
+        pa = _pyarrow()
+        tmp = file + '.tmp'
+        with open(file, 'rb') as fp:
+            pf = pa.parquet.ParquetFile(fp)
+            meta, schema = pf.metadata, pf.schema_arrow
+            try:
+                new = pa.Table.from_pandas(_typed(df), schema=schema, preserve_index=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, ValueError):
+                # Types of columns differ from the file
+                return None
+
+            try:
+                with pa.parquet.ParquetWriter(tmp, schema, compression=self.compression) as writer:
+                    tail, kept = list(), 0
+                    for i in range(meta.num_row_groups):
+                        num = meta.row_group(i).num_rows
+                        if not tail and kept + num <= offset and num >= self.row_group_size:
+                            writer.write_table(pf.read_row_group(i))
+                        elif kept < offset:
+                            # Small or overlapping groups are merged with new data
+                            tail.append(pf.read_row_group(i).slice(0, offset - kept))
+                        else:
+                            break
+                        kept += num
+
+                    writer.write_table(pa.concat_tables(tail + [new]), row_group_size=self.row_group_size)
+            except BaseException:
+                if exists(tmp):
+                    remove(tmp)
+                raise
+
+        replace(tmp, file)
+        return meta.num_rows - offset
+
+
+class Feather(Storage):
+    name = 'feather'
+    ext = '.feather'
+
+    def __init__(self, compression='lz4'):
+        self.compression = compression
+
+    def read(self, file, col):
+        _pyarrow()
+        # Feather format doesn't keep index
+        return pd.read_feather(file).set_index(col)
+
+    def last(self, file, col):
+        _pyarrow()
+        sr = pd.read_feather(file, columns=[col])[col]
+        return sr.iloc[-1] if not sr.empty else None
+
+    def summary(self, file, col):
+        _pyarrow()
+        sr = pd.read_feather(file, columns=[col])[col]
+        if sr.empty:
+            return None, None, 0
+        return sr.iloc[0], sr.iloc[-1], len(sr)
+
+    def write(self, df, file):
+        _pyarrow()
+        _typed(df).reset_index().to_feather(file, compression=self.compression)
+
+
+STORAGES = {
+    CSV.name: CSV,
+    Parquet.name: Parquet,
+    Feather.name: Feather
+}
+
+
+def get(fmt=None):
+    """
+    Returns storage backend for given format.
+
+    :param fmt: str or Storage
+        one of 'csv', 'parquet' and 'feather' or an instance of Storage.
+        if None, returns CSV backend.
+    :return: Storage
+    """
+    if fmt is None:
+        return CSV()
+    if isinstance(fmt, Storage):
+        return fmt
+    if isinstance(fmt, str) and fmt.lower() in STORAGES:
+        return STORAGES[fmt.lower()]()
+    raise ValueError(f"Given fmt, '{fmt}', must be one of {tuple(STORAGES)} or an instance of Storage.")
@@ -0,0 +1,240 @@
+"""
+Memory-mapped, append-only files of real-time ticks
+
+Writing ticks with pandas or csv in slots costs allocations and formatting for every
+event, which stalls the Qt thread at the market open. Instead, TickRecorder appends each
+tick as a fixed-width record of TICK layout into a memory-mapped file for each code and
+day, i.e. a single store into memory per tick.
+
+File format
+    HEADER(magic, final, itemsize, count) + records of TICK layout
+    Space for records is allocated by CHUNK at once and only the first 'count' records are
+    valid. The count in the header is updated when flushed, so that other processes can
+    read ticks recorded so far by read() while the session runs. Files are truncated to
+    the exact size and marked final when finalized.
+
+Files are flushed every 'interval' milliseconds by QTimer and finalized at MARKET_CLOSE
+in kiwoom.config.real, or by TickRecorder.close(). If ticks of a new session come without
+closing, i.e. earlier than the last tick by SESSION_GAP, files of the day are finalized and
+ticks are recorded in the directory of the new day.
+
+Usage example
+>>  recorder = TickRecorder(api, 'ticks')  # ticks/YYYYMMDD/{code}.tick
+>>  api.set_real_reg('1000', '005930;000660', '20;10;15;13', '0')
+>>
+>>  # In another process
+>>  ticks = read('ticks/20210104/005930.tick')
+>>  ticks['price'][-100:].mean()
+"""
+import mmap
+from datetime import datetime
+from os import makedirs
+from os.path import exists, getsize, join
+from struct import Struct
+
+import numpy as np
+from PyQt5.QtCore import QTimer
+
+from kiwoom.config import real
+from kiwoom.data.ring import TICK, TICK_FIDS, tick
+
+
+# File signature and header (magic, final, itemsize, count)
+MAGIC = b'KWTK\x01'
+HEADER = Struct('<5sBHQ')
+
+# Number of records allocated at once
+CHUNK = 2 ** 16
+
+
+def read(file):
+    """
+    Returns ticks in given file as a read-only memory-mapped array.
+
+    Only ticks flushed by the writer so far are included, even if it is being written.
+
+    :param file: str
+        path to the file written by TickFile
+    :return: numpy.ndarray
+    """
+    with open(file, 'rb') as f:
+        magic, _, itemsize, count = HEADER.unpack(f.read(HEADER.size))
+
+    if magic != MAGIC or itemsize != TICK.itemsize:
+        raise ValueError(f"Given file, '{file}', is not a tick file written by TickFile.")
+    if count == 0:
+        return np.zeros(0, dtype=TICK)
+    return np.memmap(file, dtype=TICK, mode='r', offset=HEADER.size, shape=(count,))
+
+
+class TickFile:
+    """
+    Append-only memory-mapped file of ticks
+
+    If the file already exists, ticks are appended after the ones in it.
+
+    :param file: str
+        path to the file
+    :param chunk: int
+        number of records to allocate at once
+    """
+    def __init__(self, file, chunk=CHUNK):
+        self.file = file
+        self.chunk = int(chunk)
+        self.count = 0
+        self.capacity = 0
+        self._mm = None
+        self._arr = None
+
+        if exists(file) and getsize(file) >= HEADER.size:
+            self._fp = open(file, 'r+b')
+            magic, _, itemsize, self.count = HEADER.unpack(self._fp.read(HEADER.size))
+            if magic != MAGIC or itemsize != TICK.itemsize:
+                self._fp.close()
+                raise ValueError(f"Given file, '{file}', is not a tick file written by TickFile.")
+        else:
+            self._fp = open(file, 'w+b')
+
+        self._map(self.count + self.chunk)
+        self.flush()
+
+    def __len__(self):
+        return self.count
+
+    def append(self, item):
+        """
+        Appends a tick, which is readable by other processes after flush.
+
+        :param item: tuple
+            (time, price, volume, side, cum_volume)
+        """
+        if self.count == self.capacity:
+            self._map(self.capacity + self.chunk)
+        self._arr[self.count] = item
+        self.count += 1
+
+    def flush(self, final=False):
+        """
+        Writes the number of ticks into the header and flushes to the disk.
+
+        :param final: bool
+            whether to mark the file as final
+        """
+        self._mm[:HEADER.size] = HEADER.pack(MAGIC, int(final), TICK.itemsize, self.count)
+        self._mm.flush()
+
+    def finalize(self):
+        """
+        Flushes, closes and truncates the file to the exact size of ticks in it.
+        """
+        if self._fp is None:
+            return
+
+        self.flush(final=True)
+        self._arr = None
+        self._mm.close()
+        try:
+            self._fp.truncate(HEADER.size + self.count * TICK.itemsize)
+        except OSError:
+            # Windows can't truncate a file mapped by readers, but the count is in the header
+            pass
+        self._fp.close()
+        self._mm, self._fp = None, None
+
+    def _map(self, capacity):
+        # To remap the file with larger space, views must be released before closing
+        self._arr = None
+        if self._mm is not None:
+            self._mm.close()
+
+        size = HEADER.size + capacity * TICK.itemsize
+        try:
+            self._fp.truncate(size)
+        except OSError:
+            # Windows can't resize a file mapped by readers, but writing at the end extends it
+            self._fp.seek(size - 1)
+            self._fp.write(b'\0')
+            self._fp.flush()
+        self._mm = mmap.mmap(self._fp.fileno(), size)
+        self._arr = np.ndarray((capacity,), dtype=TICK, buffer=self._mm, offset=HEADER.size)
+        self.capacity = capacity
+
+
+class TickRecorder:
+    """
+    Recorder of '주식체결' ticks into a TickFile for each code and day
+
+    :param api: kiwoom.Kiwoom
+    :param path: str
+        directory to save files, as path/YYYYMMDD/{code}.tick
+    :param codes: str or list of str, optional
+        codes to record, all codes registered by SetRealReg if None
+    :param interval: int
+        milliseconds between flushes
+    :param close_at: str, optional
+        time to finalize files in 'HHMMSS', kiwoom.config.real.MARKET_CLOSE if None.
+        Empty string not to finalize until TickRecorder.close().
+    """
+    def __init__(self, api, path, codes=None, interval=1000, close_at=None):
+        self.api = api
+        self.codes = codes
+        self.root = path
+        self._last = 0  # time of the last tick
+        self._close_at = real.MARKET_CLOSE if close_at is None else close_at
+        self._open()
+
+        # Finalize at the market close, only if started before
+        if self.close_at and datetime.now().strftime('%H%M%S') >= self.close_at:
+            self.close_at = None
+
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.flush)
+        self.timer.start(interval)
+
+        api.subscribe(self.on_tick, '주식체결', codes, fids=TICK_FIDS)
+
+    def flush(self):
+        """
+        Flushes all files, and finalizes them at the market close.
+        """
+        for file in self.files.values():
+            file.flush()
+
+        if self.close_at and datetime.now().strftime('%H%M%S') >= self.close_at:
+            self.close()
+
+    def close(self):
+        """
+        Stops recording and finalizes all files.
+        """
+        if self.timer is None:
+            return
+
+        self.timer.stop()
+        self.timer = None
+        self.api.unsubscribe(self.on_tick, '주식체결', self.codes)
+        for file in self.files.values():
+            file.finalize()
+
+    def on_tick(self, code, real_type, rec):
+        # Subscriber of Kiwoom.bus that receives a record of TICK_FIDS
+        item = tick(rec)
+        if self._last - item[0] > real.SESSION_GAP:
+            # Ticks of the previous session are done
+            for file in self.files.values():
+                file.finalize()
+            self._open()
+        self._last = item[0]
+
+        file = self.files.get(code)
+        if file is None:
+            file = self.files[code] = TickFile(join(self.path, f'{code}.tick'))
+        file.append(item)
+
+    def _open(self):
+        # To record ticks of the session in the directory of today
+        self.date = datetime.now().strftime('%Y%m%d')
+        self.path = join(self.root, self.date)
+        self.files = dict()
+        self.close_at = self._close_at
+        makedirs(self.path, exist_ok=True)
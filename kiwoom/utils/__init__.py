@@ -1,6 +1,8 @@
 from . import (
     general,
-    manager
+    limiter,
+    manager,
+    recorder
 )
 
 from .general import *
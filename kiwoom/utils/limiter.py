@@ -0,0 +1,92 @@
+"""
+Rate limiter for requests to Kiwoom server
+
+Kiwoom server limits the number of requests in several sliding windows at the same time,
+ex) 5 times per second, 100 times per minute and 1000 times per hour for TR requests.
+Limiter keeps the timestamps of recent requests and grants a new one as soon as all the
+windows allow, instead of waiting for a fixed time before every request.
+
+Usage example
+>>  limiter = Limiter([(5, 1), (100, 60), (1000, 3600)])
+>>  limiter.acquire()  # blocks until granted
+>>  api.comm_rq_data(...)
+"""
+from collections import deque
+from time import monotonic
+
+
+class Limiter:
+    """
+    Sliding-window log rate limiter with multiple windows
+
+    :param windows: list of tuple or callable
+        [(count, seconds), ...] that allows 'count' requests in any 'seconds'.
+        If callable, it's called every time to get windows, so that changes of
+        configuration such as history.REQUEST_LIMIT_TIME apply at once.
+    :param sleep: callable, optional
+        function that waits for given seconds, ex) lambda sec: QTest.qWait(int(sec * 1000))
+    :param clock: callable
+        function that returns current time in seconds
+    """
+    def __init__(self, windows, sleep=None, clock=monotonic):
+        self._windows = windows
+        self.sleep = sleep
+        self.clock = clock
+        self.log = deque()
+        self.waited = 0  # total seconds waited for grants
+        self.enabled = True  # False to grant every request at once, ex) in replay
+
+    @property
+    def windows(self):
+        if not self.enabled:
+            return list()
+        windows = self._windows() if callable(self._windows) else self._windows
+        return [(int(n), float(sec)) for n, sec in windows if n > 0 and sec > 0]
+
+    def wait(self):
+        """
+        Returns seconds to wait until the next request is granted, 0 if possible now.
+        """
+        now, delay = self.clock(), 0
+        for n, sec in self.windows:
+            # The n-th recent request must be out of the window
+            if len(self.log) >= n:
+                delay = max(delay, self.log[-n] + sec - now)
+        return delay
+
+    def record(self):
+        """
+        Records a request at current time.
+        """
+        self.log.append(self.clock())
+
+        # To keep only timestamps needed for the largest window
+        size = max((n for n, _ in self.windows), default=0)
+        while len(self.log) > size:
+            self.log.popleft()
+
+    def acquire(self):
+        """
+        Blocks until the next request is granted and records it.
+
+        :return: float
+            seconds waited
+        """
+        begin = self.clock()
+        delay = self.wait()
+        while delay > 0:
+            if self.sleep is None:
+                raise RuntimeError('Limiter needs sleep function to wait. Try Limiter(windows, sleep=fn).')
+            self.sleep(delay)
+            delay = self.wait()
+
+        self.record()
+        waited = self.clock() - begin
+        self.waited += waited
+        return waited
+
+    def reset(self):
+        """
+        Forgets all requests recorded.
+        """
+        self.log.clear()
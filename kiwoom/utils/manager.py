@@ -62,8 +62,9 @@ class Downloader:
                     app = QApplication.instance()
                     app.closeAllWindows()
 
-                    # Set restart param and unloop
-                    bot.share.update_single('history', 'restart', True)
+                    # Set restart param for every download in flight and unloop
+                    for rq_name in bot.share.get_single('histories', 'rq_names'):
+                        bot.share.update_single(rq_name, 'restart', True)
                     bot.api.unloop()
 
                     # Exit script after 60 seconds
@@ -91,8 +92,8 @@ class Downloader:
         @wraps(fn)
         # Define wrapper function
         def wrapper(*args):
-            server = args[0]
-            code = server.share.get_args('history', 'code')
+            server, rq_name = args[0], args[2]
+            code = server.share.get_args(rq_name, 'code')
 
             # Execute Server.history(*args)
             try:
@@ -106,8 +107,8 @@ class Downloader:
                 print(f'\n[{clock()}] An error at Server.history{args[1:]} with code={code}.\n\n{format_exc()}')
                 # Reset variables
                 server.share.remove_history(code)
-                server.share.remove_args('history')
-                server.share.update_single('history', 'error', True)
+                server.share.remove_args(rq_name)
+                server.share.update_single(rq_name, 'error', True)
                 # Return to Signal.history()
                 server.api.unloop()
 
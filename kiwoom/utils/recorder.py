@@ -0,0 +1,332 @@
+"""
+Record and replay of API sessions
+
+1) Recorder
+    Wraps API.call() and eight event handlers of Kiwoom instance. Every call with its
+    return value and every event are appended to a compact binary log with timestamps
+    from time.monotonic_ns().
+
+2) Replayer
+    Feeds events in the log back through Connector.map, i.e. Kiwoom.on_* handlers, and
+    answers API.call() with the recorded return values. Events can be fed as fast as
+    possible or at the original pacing. If a driver function such as Bot.history is
+    given, each event waits for the request that caused it in the recorded session.
+    Limiters of Kiwoom are disabled while attached, since the server is not there.
+
+Log format
+    MAGIC + records, where each record is HEADER(kind, timestamp, size) + payload.
+    Payload is marshal.dumps((fn, args, return)) for CALL and (event, args) for EVENT.
+
+Usage example
+>>  with Recorder('session.log').attach(bot.api):
+>>      bot.histories(market='0', period='tick')
+
+>>  replayer = Replayer('session.log').attach(bot.api)
+>>  elapsed = replayer.play(bot.histories, market='0', period='tick')
+"""
+import marshal
+from collections import defaultdict, deque
+from struct import Struct
+from time import monotonic_ns, perf_counter
+
+from PyQt5.QtCore import QEventLoop, QTimer
+
+from kiwoom.config.const import EVENTS
+
+
+# Record types
+CALL = 0
+EVENT = 1
+
+# Limiters of Kiwoom disabled while replaying
+LIMITERS = ('limiter', 'pacer', 'order_limiter')
+
+# Calls that make the server fire events
+REQUESTS = (
+    'CommConnect',
+    'CommRqData',
+    'CommKwRqData',
+    'SendOrder',
+    'SendOrderFO',
+    'SendOrderCredit',
+    'SetRealReg',
+    'GetConditionLoad',
+    'SendCondition'
+)
+
+# File signature and header of each record (type, timestamp in ns, payload size)
+MAGIC = b'KWRC\x01'
+HEADER = Struct('<BqI')
+
+
+def signal_name(event):
+    """
+    Returns the name of Qt signal for given event, ex) on_receive_tr_data -> OnReceiveTrData
+    """
+    return ''.join(word.capitalize() for word in event.split('_'))
+
+
+def read(file):
+    """
+    Yields (type, timestamp, payload) for each record in given log file.
+
+    :param file: str
+        path to the log file written by Recorder
+    """
+    with open(file, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Given file, '{file}', is not a log written by Recorder.")
+
+        while True:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                break
+            kind, ns, size = HEADER.unpack(header)
+            yield kind, ns, marshal.loads(f.read(size))
+
+
+def _dumps(obj):
+    try:
+        return marshal.dumps(obj)
+    except ValueError:
+        # Unsupported types are just saved as strings
+        return marshal.dumps(repr(obj))
+
+
+def _freeze(obj):
+    # To make args hashable, i.e. list -> tuple
+    if isinstance(obj, (list, tuple)):
+        return tuple(_freeze(x) for x in obj)
+    return obj
+
+
+class Recorder:
+    """
+    Records API calls and events of Kiwoom instance to a binary log file.
+
+    :param file: str
+        path to the log file, which will be overwritten.
+    """
+    def __init__(self, file):
+        self.file = file
+        self.api = None
+        self._fp = None
+        self._call = None
+        self._handlers = dict()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.detach()
+
+    def write(self, kind, payload):
+        payload = _dumps(payload)
+        self._fp.write(HEADER.pack(kind, monotonic_ns(), len(payload)))
+        self._fp.write(payload)
+
+    def attach(self, api):
+        """
+        Starts recording on given instance of Kiwoom.
+
+        :param api: kiwoom.Kiwoom
+        :return: Recorder
+        """
+        self.api = api
+        self._fp = open(self.file, 'wb')
+        self._fp.write(MAGIC)
+
+        # To record API.call()
+        self._call = api.call
+
+        def call(fn, *args):
+            ret = self._call(fn, *args)
+            self.write(CALL, (fn, args, ret))
+            return ret
+        api.call = call
+
+        # To record events before they are handled
+        for event in EVENTS:
+            handler = getattr(api, event)
+
+            def record(*args, _event=event, _handler=handler):
+                self.write(EVENT, (_event, args))
+                return _handler(*args)
+
+            self._handlers[event] = handler
+            setattr(api, event, record)
+            self._reconnect(event, handler, record)
+        return self
+
+    def detach(self):
+        """
+        Stops recording and restores the instance of Kiwoom.
+        """
+        if self.api is None:
+            return
+
+        self.api.call = self._call
+        for event, handler in self._handlers.items():
+            self._reconnect(event, getattr(self.api, event), handler)
+            delattr(self.api, event)
+
+        self._fp.close()
+        self._handlers.clear()
+        self.api, self._fp, self._call = None, None, None
+
+    def _reconnect(self, event, old, new):
+        # Signals of the control are connected to bound methods at API.__init__()
+        signal = getattr(self.api, signal_name(event), None)
+        if signal is None:
+            return
+        try:
+            signal.disconnect(old)
+            signal.connect(new)
+        except (TypeError, AttributeError):
+            pass
+
+
+class Replayer:
+    """
+    Replays a binary log file written by Recorder.
+
+    :param file: str
+        path to the log file written by Recorder
+    """
+    def __init__(self, file):
+        self.file = file
+        self.api = None
+        self.events = list()  # [(timestamp, number of requests before, event, args), ...]
+        self.calls = defaultdict(deque)  # (fn, args) -> deque of returns
+
+        nrq = 0
+        for kind, ns, payload in read(file):
+            if kind == CALL:
+                fn, args, ret = payload
+                self.calls[(fn, _freeze(args))].append(ret)
+                if fn[:fn.find('(')] in REQUESTS:
+                    nrq += 1
+            elif kind == EVENT:
+                event, args = payload
+                self.events.append((ns, nrq, event, tuple(args)))
+
+        self._call = None
+        self._enabled = dict()  # {name: enabled} of limiters of Kiwoom
+        self._idx = 0
+        self._nrq = 0
+        self._gate = False
+        self._pace = False
+        self._waiting = False
+        self._qloop = None
+
+    def __len__(self):
+        return len(self.events)
+
+    def call(self, fn, *args):
+        """
+        Returns the recorded return value of API.call(fn, *args) in recorded order.
+        """
+        try:
+            ret = self.calls[(fn, _freeze(args))].popleft()
+        except IndexError:
+            raise RuntimeError(f"Replay diverged from the log. {fn} with args {args} was not recorded.")
+
+        # To release the event waiting for this request
+        if fn[:fn.find('(')] in REQUESTS:
+            self._nrq += 1
+            if self._waiting:
+                self._waiting = False
+                QTimer.singleShot(0, self._step)
+        return ret
+
+    def attach(self, api):
+        """
+        Replaces API.call() of given instance with the recorded return values.
+
+        Limiters of Kiwoom are disabled until Replayer.detach(), since the server is not there.
+
+        :param api: kiwoom.Kiwoom
+        :return: Replayer
+        """
+        self.api = api
+        self._call = api.call
+        api.call = self.call
+
+        for name in LIMITERS:
+            limiter = getattr(api, name, None)
+            if limiter is not None:
+                self._enabled[name] = limiter.enabled
+                limiter.enabled = False
+        return self
+
+    def detach(self):
+        """
+        Restores API.call() and limiters of Kiwoom of the instance.
+        """
+        if self.api is None:
+            return
+
+        self.api.call = self._call
+        for name, enabled in self._enabled.items():
+            getattr(self.api, name).enabled = enabled
+        self._enabled.clear()
+        self.api, self._call = None, None
+
+    def play(self, fn=None, *args, pace=False, **kwargs):
+        """
+        Feeds recorded events to the instance of Kiwoom and blocks until all is done.
+
+        Events are fired by QTimer, so that nested Kiwoom.loop() in signals and slots
+        works just like the live session.
+
+        :param fn: callable, optional
+            driver that makes requests as in the recorded session, ex) bot.histories.
+            If given, each event is fired only after the request that caused it and
+            replay ends when fn returns. Else, all events are fired one after another.
+        :param pace: bool
+            if True, keep intervals between events as recorded, else as fast as possible.
+        :return: float
+            elapsed time in seconds
+        """
+        if self.api is None:
+            raise RuntimeError('Replayer is not attached to any instance. Try Replayer.attach(api) first.')
+
+        self._idx, self._nrq = 0, 0
+        self._gate, self._pace, self._waiting = fn is not None, pace, False
+        self._qloop = QEventLoop()
+
+        begin = perf_counter()
+        if self.events:
+            QTimer.singleShot(0, self._step)
+            if fn is not None:
+                fn(*args, **kwargs)
+            else:
+                self._qloop.exec()
+
+        # To stop remaining events
+        self._idx = len(self.events)
+        return perf_counter() - begin
+
+    def _step(self):
+        if self._idx >= len(self.events):
+            return
+
+        ns, nrq, event, args = self.events[self._idx]
+        # To wait for the request that caused this event
+        if self._gate and self._nrq < nrq:
+            self._waiting = True
+            return
+        self._idx += 1
+
+        # To schedule the next event before handling, since handlers may block in loop
+        if self._idx < len(self.events):
+            delay = 0
+            if self._pace:
+                delay = max(0, (self.events[self._idx][0] - ns) // 10 ** 6)
+            QTimer.singleShot(delay, self._step)
+
+        try:
+            getattr(self.api, event)(*args)
+        finally:
+            if self._idx == len(self.events):
+                self._qloop.exit()
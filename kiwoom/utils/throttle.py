@@ -0,0 +1,129 @@
+"""
+Adaptive throttle for TR requests
+
+Throttle controls the request rate in AIMD (additive increase, multiplicative decrease)
+way, just like TCP congestion control. The rate increases a little for every response
+received in time and decreases by half whenever the server says it's overloaded, i.e.
+
+1) comm_rq_data(...) returns -200 (OP_ERR_SISE_OVERFLOW)
+2) on_receive_msg(...) receives a message about overload
+3) response takes longer than expected (the rate is kept, not increased)
+
+Kiwoom.pacer uses Throttle.interval as the minimum interval between requests when
+history.ADAPTIVE is True, see history.adapt().
+"""
+from time import monotonic
+
+
+class Throttle:
+    """
+    AIMD controller of the minimum interval between requests
+
+    :param interval: float
+        initial interval in seconds
+    :param bounds: tuple of float
+        (minimum, maximum) interval in seconds
+    :param increase: float
+        requests per second to add to the rate for each response in time
+    :param decrease: float
+        factor to multiply to the rate when overloaded
+    :param latency: float
+        seconds of response time regarded as slow
+    :param keywords: tuple of str
+        words in messages from the server that mean overload
+    :param clock: callable
+        function that returns current time in seconds
+    """
+    def __init__(
+            self,
+            interval=3.6,
+            bounds=(0.2, 10),
+            increase=0.02,
+            decrease=0.5,
+            latency=1,
+            keywords=('과부하',),
+            clock=monotonic
+    ):
+        self.bounds = bounds
+        self.increase = increase
+        self.decrease = decrease
+        self.latency = latency
+        self.keywords = keywords
+        self.clock = clock
+
+        self.rate = 1 / self._clip(interval)
+        self.overloads = 0
+        self._sent = dict()
+        self._last = float('-inf')  # last time overloaded
+
+    @property
+    def interval(self):
+        """
+        Current minimum interval between requests in seconds
+        """
+        return 1 / self.rate
+
+    def _clip(self, interval):
+        lo, hi = self.bounds
+        return min(max(interval, lo), hi)
+
+    def success(self, latency=None):
+        """
+        Increases the rate additively if the response came in time.
+
+        :param latency: float
+            seconds from request to response
+        """
+        if latency is not None and latency > self.latency:
+            return
+        self.rate = 1 / self._clip(1 / (self.rate + self.increase))
+
+    def overload(self):
+        """
+        Decreases the rate multiplicatively.
+
+        Signals within the current interval since the last one are regarded as the
+        same overload, i.e. -200 and its message for the same request.
+        """
+        now = self.clock()
+        if now - self._last < self.interval:
+            return
+        self._last = now
+        self.overloads += 1
+        self.rate = 1 / self._clip(1 / (self.rate * self.decrease))
+
+    """
+    Observers
+    """
+    def sent(self, key, ret):
+        """
+        Observes the return of a request.
+
+        :param key: str
+            key to match the response, ex) rq_name
+        :param ret: int
+            error code returned by the request
+        """
+        if ret == -200:  # OP_ERR_SISE_OVERFLOW
+            self.overload()
+        elif ret == 0:
+            self._sent[key] = self.clock()
+
+    def received(self, key):
+        """
+        Observes a response to the request with given key.
+
+        :param key: str
+            key to match the request, ex) rq_name
+        """
+        if key in self._sent:
+            self.success(self.clock() - self._sent.pop(key))
+
+    def message(self, msg):
+        """
+        Observes a message from the server.
+
+        :param msg: str
+        """
+        if any(word in msg for word in self.keywords):
+            self.overload()
@@ -1,2 +1,7 @@
-from . import api
+from . import (
+    api,
+    sim
+)
+
 from .api import API
+from .sim import Simulator
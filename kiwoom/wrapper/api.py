@@ -1,4 +1,8 @@
-from PyQt5.QAxContainer import QAxWidget
+try:
+    from PyQt5.QAxContainer import QAxWidget
+except ImportError:
+    # ActiveX is only available on Windows, so fall back to the simulated backend
+    from kiwoom.wrapper.sim import QAxWidget
 
 
 class API(QAxWidget):
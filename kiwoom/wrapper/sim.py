@@ -0,0 +1,573 @@
+"""
+Simulated backend of Kiwoom Open API+
+
+Every API method ends up in API.call(), which is QAxWidget.dynamicCall() against
+'KHOPENAPI.KHOpenAPICtrl.1' by default. Simulator is a drop-in replacement of API.call()
+that never talks to the server. It serves synthetic data and fires events through Qt
+timers, so that signals and slots behave just like they do on the real control.
+
+1) TR data
+    Chart TRs from opt10079 to opt20019 are served page by page with real 'prev_next'
+    semantics. Each page has at most 900 rows ordered from the newest to the oldest.
+
+2) Real-time & Chejan data
+    on_receive_real_data is fired for registered codes at 'real_rate' events per second,
+    and on_receive_chejan_data at 'chejan_rate' events per second after orders.
+
+3) Overload
+    CommRqData returns -200 (OP_ERR_SISE_OVERFLOW) and SendOrder returns -308
+    (OP_ERR_ORD_OVERFLOW) whenever one of the given rate windows is exceeded.
+
+Usage example
+>>  bot = Bot()
+>>  attach(bot.api, Simulator(rows=9000, latency=0, tr_limits=()))
+>>  bot.login()
+>>  bot.history('005930', 'tick')
+
+On platforms without QAxContainer (i.e. other than Windows), kiwoom.wrapper.api falls
+back to QAxWidget in this module, which attaches a default Simulator by itself.
+"""
+from collections import defaultdict, deque
+from datetime import date, datetime, time, timedelta
+from functools import partial
+from random import Random
+from time import monotonic
+from zlib import crc32
+
+from PyQt5.QtCore import QTimer, pyqtSignal
+from PyQt5.QtWidgets import QWidget
+
+from kiwoom.config import history, real
+from kiwoom.config.const import MARKETS, SECTORS
+from kiwoom.config.types import MULTI, SINGLE
+
+
+# Rate windows in (number of requests, seconds)
+TR_LIMITS = ((5, 1), (100, 60), (1000, 3600))
+ORDER_LIMITS = ((5, 1),)
+
+# Maximum number of rows in a page of chart TRs
+PAGE_SIZE = 900
+
+# FIDs served for real type '주식체결', the others in its layout are served as ''
+REAL_FIDS = (20, 10, 11, 12, 27, 28, 15, 13, 14, 16, 17, 18, 228)
+
+# FIDs served for chejan data
+CHEJAN_FIDS = (9201, 9203, 9001, 913, 302, 900, 901, 902, 910, 911, 907)
+
+
+class Simulator:
+    """
+    Callable that mimics QAxWidget.dynamicCall() of Kiwoom Open API+.
+
+    :param rows: int
+        number of rows available for each (code, TR code) in total
+    :param latency: int
+        milliseconds to wait before firing events
+    :param real_rate: float
+        number of on_receive_real_data events per second, 0 to disable
+    :param chejan_rate: float
+        number of on_receive_chejan_data events per second after orders
+    :param tr_limits: tuple of (int, float)
+        rate windows for CommRqData, exceeding any of them returns -200
+    :param order_limits: tuple of (int, float)
+        rate windows for SendOrder, exceeding any of them returns -308
+    :param ncodes: int
+        number of stock codes listed in each market
+    :param today: datetime.date
+        the newest date of synthetic data, today by default
+    :param seed: int
+        seed for random numbers to make data reproducible
+    """
+    def __init__(
+            self,
+            rows=9000,
+            latency=0,
+            real_rate=0,
+            chejan_rate=100,
+            tr_limits=TR_LIMITS,
+            order_limits=ORDER_LIMITS,
+            ncodes=100,
+            today=None,
+            seed=0
+    ):
+        self.api = None
+        self.rows = rows
+        self.latency = latency
+        self.real_rate = real_rate
+        self.chejan_rate = chejan_rate
+        self.ncodes = ncodes
+        self.today = today if today else date.today()
+        self.seed = seed
+
+        self.connected = False
+        self.inputs = dict()
+        self.pages = dict()  # rq_name -> (tr_code, single, rows)
+        self.cursors = dict()  # rq_name -> iterator of rows
+        self.reals = defaultdict(list)  # scr_no -> registered codes
+        self.real = dict()  # fid -> str of the last real-time event
+        self.chejan = dict()  # fid -> str of the last chejan event
+
+        # Sliding windows to reproduce overload errors
+        self._tr_limits = [(n, sec, deque(maxlen=n)) for n, sec in tr_limits]
+        self._order_limits = [(n, sec, deque(maxlen=n)) for n, sec in order_limits]
+
+        # Timer to fire real-time events
+        self._timer = None
+        self._turn = 0
+        self._order = 0
+
+        # Map of function name to its handler
+        self._fns = {
+            'CommConnect': self.comm_connect,
+            'GetConnectState': lambda: int(self.connected),
+            'GetLoginInfo': self.get_login_info,
+            'CommRqData': self.comm_rq_data,
+            'CommKwRqData': self.comm_kw_rq_data,
+            'SetInputValue': self.set_input_value,
+            'GetRepeatCnt': self.get_repeat_cnt,
+            'GetCommData': self.get_comm_data,
+            'GetCommDataEx': self.get_comm_data_ex,
+            'GetCommRealData': lambda code, fid: self.real.get(int(fid), ''),
+            'GetChejanData': lambda fid: self.chejan.get(int(fid), ''),
+            'DisconnectRealData': self.disconnect_real_data,
+            'SetRealReg': self.set_real_reg,
+            'SetRealRemove': self.set_real_remove,
+            'SendOrder': self.send_order,
+            'SendOrderFO': self.send_order,
+            'SendOrderCredit': self.send_order,
+            'GetCodeListByMarket': self.get_code_list_by_market,
+            'GetMasterCodeName': lambda code: f'종목{code}',
+            'GetConditionLoad': self.get_condition_load,
+            'GetConditionNameList': lambda: '',
+            'KOA_Functions': self.koa_functions,
+        }
+
+    def bind(self, api):
+        """
+        Set API instance that receives events from this simulator.
+
+        :param api: kiwoom.API
+        :return: Simulator
+        """
+        self.api = api
+        return self
+
+    def __call__(self, fn, *args):
+        """
+        Mimics QAxWidget.dynamicCall(fn, *args).
+
+        :param fn: str
+            function signature such as 'CommRqData(QString, QString, Int, QString)'
+        :return: int or str
+            return value of the function, '' for functions that are not simulated.
+        """
+        # To handle dynamicCall(fn, [arg1, arg2, ...])
+        if len(args) == 1 and isinstance(args[0], list):
+            args = args[0]
+
+        handler = self._fns.get(fn[:fn.find('(')])
+        if handler is None:
+            return ''
+        return handler(*args)
+
+    def emit(self, event, *args):
+        """
+        Fires an event of API instance after latency through Qt event loop.
+        """
+        QTimer.singleShot(self.latency, partial(getattr(self.api, event), *args))
+
+    @staticmethod
+    def overflow(limits):
+        """
+        Returns True if one of the sliding windows is full, else records a new call.
+        """
+        now = monotonic()
+        for n, sec, window in limits:
+            if len(window) == n and now - window[0] < sec:
+                return True
+        for _, _, window in limits:
+            window.append(now)
+        return False
+
+    """
+    로그인 버전처리
+    """
+    def comm_connect(self):
+        self.connected = True
+        self.emit('on_event_connect', 0)
+        return 0
+
+    @staticmethod
+    def get_login_info(tag):
+        return {
+            'ACCOUNT_CNT': '1',
+            'ACCLIST': '8000000011;',
+            'ACCNO': '8000000011;',
+            'USER_ID': 'simulator',
+            'USER_NAME': '시뮬레이터',
+            'KEY_BSECGB': '0',
+            'FIREW_SECGB': '0',
+            'GetServerGubun': '1'
+        }.get(tag, '')
+
+    """
+    조회와 실시간데이터처리
+    """
+    def set_input_value(self, id, value):
+        self.inputs[id] = value
+
+    def comm_rq_data(self, rq_name, tr_code, prev_next, scr_no):
+        if self.overflow(self._tr_limits):
+            return -200  # OP_ERR_SISE_OVERFLOW
+
+        inputs, self.inputs = self.inputs, dict()
+        if int(prev_next) != 2 or rq_name not in self.cursors:
+            self.cursors[rq_name] = _Cursor(self.chart(tr_code, inputs))
+
+        # Fetch one page from the cursor
+        cursor = self.cursors[rq_name]
+        rows = cursor.page(PAGE_SIZE)
+        if not cursor:
+            del self.cursors[rq_name]
+
+        single = dict()
+        if history.is_chart(tr_code):
+            code = inputs.get(history.get_record_name_for_its_name(tr_code), '')
+            single = {key: '' for key in history.outputs(tr_code, SINGLE)}
+            single[history.get_record_name_for_its_name(tr_code)] = code
+
+        self.pages[rq_name] = (tr_code, single, rows)
+        self.emit('on_receive_tr_data', scr_no, rq_name, tr_code, '', '2' if cursor else '0')
+        return 0
+
+    def comm_kw_rq_data(self, arr_code, next, code_cnt, type_flag, rq_name, scr_no):
+        if self.overflow(self._tr_limits):
+            return -200  # OP_ERR_SISE_OVERFLOW
+        self.pages[rq_name] = ('OPTKWFID', dict(), list())
+        self.emit('on_receive_tr_data', scr_no, rq_name, 'OPTKWFID', '', '0')
+        return 0
+
+    def get_repeat_cnt(self, tr_code, rq_name):
+        if rq_name not in self.pages:
+            return 0
+        return len(self.pages[rq_name][2])
+
+    def get_comm_data(self, tr_code, rq_name, index, item_name):
+        if rq_name not in self.pages:
+            return ''
+        _, single, rows = self.pages[rq_name]
+        if index < len(rows) and item_name in rows[index]:
+            return rows[index][item_name]
+        return single.get(item_name, '')
+
+    def get_comm_data_ex(self, tr_code, rq_name):
+        if rq_name not in self.pages:
+            return list()
+        _, _, rows = self.pages[rq_name]
+        keys = history.layout(tr_code) or history.outputs(tr_code, MULTI)
+        return [[row.get(key, '') for key in keys] for row in rows]
+
+    def chart(self, tr_code, inputs):
+        """
+        Returns an iterator of rows for chart TRs from the newest to the oldest.
+        """
+        if not history.is_chart(tr_code):
+            return iter(())
+
+        period = history.get_period(tr_code)
+        code = inputs.get(history.get_record_name_for_its_name(tr_code), '')
+        rnd = Random(crc32(code.encode()) ^ self.seed)
+
+        # The newest point of data
+        end = inputs.get('기준일자', '')
+        end = datetime.strptime(end, '%Y%m%d').date() if end else self.today
+        unit = int(inputs.get('틱범위', '1') or '1')
+
+        return _rows(
+            tr_code, period, unit, end, self.rows, rnd,
+            sentinel=history.is_sector(code) and period in ('tick', 'min')
+        )
+
+    def disconnect_real_data(self, scr_no):
+        if scr_no in self.reals:
+            del self.reals[scr_no]
+
+    def set_real_reg(self, scr_no, code_list, fid_list, opt_type):
+        codes = [code for code in code_list.split(';') if code]
+        if str(opt_type) == '0':
+            self.reals.clear()
+        self.reals[scr_no] = list(dict.fromkeys(self.reals[scr_no] + codes))
+
+        # Start timer to fire real-time events
+        if self.real_rate > 0 and self._timer is None:
+            self._timer = QTimer()
+            self._timer.timeout.connect(self.tick)
+            self._timer.start(max(1, int(1000 / self.real_rate)))
+        return 0
+
+    def set_real_remove(self, scr_no, del_code):
+        scrs = list(self.reals.keys()) if scr_no == 'ALL' else [scr_no]
+        for scr in scrs:
+            if del_code == 'ALL':
+                self.disconnect_real_data(scr)
+            elif del_code in self.reals.get(scr, list()):
+                self.reals[scr].remove(del_code)
+
+    def tick(self):
+        """
+        Fires on_receive_real_data for registered codes in turn.
+        """
+        codes = [code for codes in self.reals.values() for code in codes]
+        if not codes:
+            return
+
+        # To achieve rates over 1,000 events per second with 1 ms timer
+        for _ in range(max(1, int(self.real_rate / 1000))):
+            code = codes[self._turn % len(codes)]
+            self._turn += 1
+
+            rnd = Random(self._turn ^ self.seed)
+            price = 10000 + rnd.randint(-500, 500) * 10
+            volume = rnd.randint(1, 1000) * rnd.choice((1, -1))
+            self.real = {
+                20: datetime.now().strftime('%H%M%S'),
+                10: _sign(price, 10000),
+                11: _sign(price - 10000, 0),
+                12: f'{(price - 10000) / 100:+.2f}',
+                27: _sign(price + 10, 10000),
+                28: _sign(price - 10, 10000),
+                15: f'{volume:+d}',
+                13: str(self._turn * 10),
+                14: str(self._turn * price // 10 ** 6),
+                16: _sign(10000, 10000),
+                17: _sign(max(price, 10000), 10000),
+                18: _sign(min(price, 10000), 10000),
+                228: f'{rnd.uniform(50, 150):.2f}'
+            }
+            # Call directly, since GetCommRealData() is only valid inside of the event
+            real_data = '\t'.join(self.real.get(fid, '') for fid in real.layout('주식체결'))
+            self.api.on_receive_real_data(code, '주식체결', real_data)
+
+    """
+    주문과 잔고처리
+    """
+    def send_order(self, rq_name, scr_no, acc_no, *args):
+        if self.overflow(self._order_limits):
+            return -308  # OP_ERR_ORD_OVERFLOW
+
+        self._order += 1
+        self.emit('on_receive_tr_data', scr_no, rq_name, '', '', '0')
+
+        # 접수 -> 체결 -> 잔고
+        delay = 1000 / self.chejan_rate if self.chejan_rate > 0 else 0
+        for i, (gubun, state) in enumerate((('0', '접수'), ('0', '체결'), ('1', ''))):
+            data = {
+                9201: acc_no,
+                9203: str(self._order).zfill(7),
+                9001: str(args[1] if isinstance(args[0], int) else args[0]),
+                913: state,
+                302: '',
+                900: '1',
+                901: '0',
+                902: '0' if state == '체결' else '1',
+                910: '0',
+                911: '1' if state == '체결' else '0',
+                907: '2'
+            }
+            QTimer.singleShot(int(self.latency + i * delay), partial(self._chejan, gubun, data))
+        return 0
+
+    def _chejan(self, gubun, data):
+        self.chejan = data
+        self.api.on_receive_chejan_data(gubun, len(data), ';'.join(map(str, CHEJAN_FIDS)))
+
+    """
+    조건검색
+    """
+    def get_condition_load(self):
+        self.emit('on_receive_condition_ver', 1, '')
+        return 1
+
+    """
+    기타함수
+    """
+    def get_code_list_by_market(self, market):
+        market = str(market)
+        if market not in MARKETS:
+            return ''
+
+        # NXT lists the first half of KOSPI codes
+        if market == 'NXT':
+            codes = _codes('0', self.ncodes)[::2]
+        else:
+            codes = _codes(market, self.ncodes)
+        return ';'.join(codes) + ';'
+
+    @staticmethod
+    def koa_functions(function_name, arg=''):
+        if function_name == 'GetUpjongCode':
+            prefixes = {'0': '06', '1': '1', '2': '2', '4': '4', '7': '7'}.get(str(arg), '')
+            sectors = [(code, nm) for code, nm in SECTORS.items() if code[0] in prefixes]
+            return ''.join(f'{arg},{code},{nm}|' for code, nm in sectors)
+        return ''
+
+
+class QAxWidget(QWidget):
+    """
+    Stand-in of PyQt5.QAxContainer.QAxWidget on platforms without ActiveX.
+
+    Signals have the same names as the events of Open API+ and dynamicCall() is
+    served by Simulator, which is attached when setControl() is called.
+    """
+    OnEventConnect = pyqtSignal(int)
+    OnReceiveMsg = pyqtSignal(str, str, str, str)
+    OnReceiveTrData = pyqtSignal(str, str, str, str, str)
+    OnReceiveRealData = pyqtSignal(str, str, str)
+    OnReceiveChejanData = pyqtSignal(str, int, str)
+    OnReceiveConditionVer = pyqtSignal(int, str)
+    OnReceiveTrCondition = pyqtSignal(str, str, str, int, int)
+    OnReceiveRealCondition = pyqtSignal(str, str, str, str)
+
+    def __init__(self):
+        super().__init__()
+        self.simulator = None
+
+    def setControl(self, control):
+        attach(self)
+        return True
+
+    def dynamicCall(self, fn, *args):
+        return self.simulator(fn, *args)
+
+
+def attach(api, simulator=None):
+    """
+    Replaces API.call of given instance with Simulator.
+
+    :param api: kiwoom.API
+        instance of API or Kiwoom class
+    :param simulator: Simulator, optional
+        if None, Simulator with default configuration is used.
+    :return: Simulator
+    """
+    simulator = Simulator() if simulator is None else simulator
+    api.simulator = simulator.bind(api)
+    api.call = simulator
+    return simulator
+
+
+"""
+Helper functions to generate synthetic data
+"""
+
+
+class _Cursor:
+    """
+    Iterator of rows that knows whether more rows are left.
+    """
+    def __init__(self, rows):
+        self.rows = rows
+        self.head = next(rows, None)
+
+    def __bool__(self):
+        return self.head is not None
+
+    def page(self, n):
+        lst = list()
+        while self.head is not None and len(lst) < n:
+            lst.append(self.head)
+            self.head = next(self.rows, None)
+        return lst
+
+
+def _sign(val, base):
+    """
+    Returns val in string with '+' or '-' sign compared to base, just like the server does.
+    """
+    if val > base:
+        return f'+{abs(val)}'
+    if val < base:
+        return f'-{abs(val)}'
+    return str(abs(val))
+
+
+def _codes(market, n):
+    """
+    Returns n stock codes in given market that do not overlap with other markets.
+    """
+    idx = list(MARKETS.keys()).index(market)
+    return [str(idx * 10000 + i * 10).zfill(6) for i in range(1, n + 1)]
+
+
+def _times(period, unit, end, sentinel):
+    """
+    Yields datetime strings of given period from the newest to the oldest.
+    """
+    if period in ('tick', 'min'):
+        open_, close = time(9, 0, 0), time(15, 30, 0)
+        step = timedelta(seconds=1) if period == 'tick' else timedelta(minutes=unit)
+        day = end
+        while True:
+            if day.weekday() < 5:
+                ymd = day.strftime('%Y%m%d')
+                if sentinel:
+                    yield ymd + '999999'
+                    yield ymd + '888888'
+                t = datetime.combine(day, close)
+                while t.time() > open_:
+                    yield t.strftime('%Y%m%d%H%M%S')
+                    t -= step
+            day -= timedelta(days=1)
+
+    elif period == 'day':
+        day = end
+        while True:
+            if day.weekday() < 5:
+                yield day.strftime('%Y%m%d')
+            day -= timedelta(days=1)
+
+    elif period == 'week':
+        day = end - timedelta(days=end.weekday())
+        while True:
+            yield day.strftime('%Y%m%d')
+            day -= timedelta(weeks=1)
+
+    elif period == 'month':
+        day = end.replace(day=1)
+        while True:
+            yield day.strftime('%Y%m%d')
+            day = (day - timedelta(days=1)).replace(day=1)
+
+    else:  # year
+        day = end.replace(month=1, day=1)
+        while True:
+            yield day.strftime('%Y%m%d')
+            day = day.replace(year=day.year - 1)
+
+
+def _rows(tr_code, period, unit, end, n, rnd, sentinel=False):
+    """
+    Yields n rows of multi data for chart TRs from the newest to the oldest.
+    """
+    keys = set(history.outputs(tr_code, MULTI))
+    col = history.get_datetime_column(period)
+    prc = rnd.randint(100, 10000) * 10
+    times = _times(period, unit, end, sentinel)
+
+    for _ in range(n):
+        opn = prc + rnd.randint(-5, 5) * 10
+        high = max(prc, opn) + rnd.randint(0, 5) * 10
+        low = max(10, min(prc, opn) - rnd.randint(0, 5) * 10)
+        vol = rnd.randint(1, 10000)
+        row = {
+            col: next(times),
+            '시가': _sign(opn, prc),
+            '고가': _sign(high, prc),
+            '저가': _sign(low, prc),
+            '현재가': _sign(prc, opn),
+            '거래량': str(vol),
+            '거래대금': str(vol * prc // 10 ** 6)
+        }
+        yield {key: val for key, val in row.items() if key in keys}
+        prc = max(10, opn)
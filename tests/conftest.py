@@ -0,0 +1,75 @@
+"""
+Fixtures shared by tests, which run headless against kiwoom.wrapper.sim.Simulator.
+"""
+import os
+import sys
+from datetime import date
+from time import monotonic
+
+import pytest
+
+# Qt needs no display to run signals, slots and timers
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtTest import QTest
+from PyQt5.QtWidgets import QApplication
+
+from kiwoom import Bot, Kiwoom, config
+from kiwoom.config import history
+from kiwoom.wrapper.sim import Simulator, attach
+
+
+# The newest date of synthetic data, fixed to make files reproducible
+TODAY = date(2024, 11, 15)
+
+
+@pytest.fixture(scope='session')
+def app():
+    return QApplication.instance() or QApplication(sys.argv)
+
+
+@pytest.fixture
+def wait(app):
+    """
+    Returns a function that runs the event loop until fn() is true or timeout in ms.
+    """
+    def _wait(fn, timeout=3000):
+        end = monotonic() + timeout / 1000
+        while not fn():
+            if monotonic() > end:
+                raise TimeoutError(f'Condition not met in {timeout} ms.')
+            QTest.qWait(1)
+        return fn()
+    return _wait
+
+
+@pytest.fixture
+def unlimited(monkeypatch):
+    """
+    Turns off request limits, messages and prints of Bot for fast downloads.
+    """
+    monkeypatch.setattr(config, 'MUTE', True)
+    monkeypatch.setattr(history, 'REQUEST_LIMIT_TIME', 0)
+    monkeypatch.setattr(history, 'REQUEST_LIMIT_WINDOWS', [])
+
+
+@pytest.fixture
+def api(app, unlimited):
+    """
+    Kiwoom attached to a Simulator without rate windows, not logged in.
+    """
+    api = Kiwoom()
+    attach(api, Simulator(rows=2000, tr_limits=(), ncodes=3, today=TODAY))
+    return api
+
+
+@pytest.fixture
+def bot(app, unlimited, capsys):
+    """
+    Bot logged in to a Simulator without rate windows.
+    """
+    bot = Bot()
+    attach(bot.api, Simulator(rows=2000, tr_limits=(), ncodes=3, today=TODAY))
+    bot.login()
+    capsys.readouterr()
+    return bot
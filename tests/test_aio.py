@@ -0,0 +1,153 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from PyQt5.QtCore import QTimer
+
+from kiwoom import Kiwoom
+from kiwoom.core.aio import AsyncKiwoom, QtEventLoop, run
+from kiwoom.core.scheduler import Scheduler
+from kiwoom.wrapper.sim import Simulator, attach
+
+
+INPUTS = {'틱범위': '1', '수정주가구분': '1'}
+
+
+@pytest.fixture
+def sim(app, unlimited):
+    api = Kiwoom()
+    attach(api, Simulator(rows=2000, latency=100, tr_limits=(), ncodes=3, real_rate=500))
+    return api
+
+
+def test_run(app):
+    async def main():
+        await asyncio.sleep(0.01)
+        return asyncio.get_running_loop()
+
+    loop = run(main())
+    assert isinstance(loop, QtEventLoop) and loop.is_closed()
+
+
+def test_timers(app):
+    # asyncio timers and Qt timers run on the same loop
+    async def main():
+        fut = asyncio.get_running_loop().create_future()
+        QTimer.singleShot(20, lambda: fut.set_result('qt'))
+        begin = time.perf_counter()
+        results = await asyncio.gather(fut, asyncio.sleep(0.05, 'asyncio'))
+        return results, time.perf_counter() - begin
+
+    results, elapsed = run(main())
+    assert results == ['qt', 'asyncio']
+    assert 0.05 <= elapsed < 0.5
+
+
+def test_threadsafe(app):
+    async def main():
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        thread = threading.Thread(target=lambda: loop.call_soon_threadsafe(fut.set_result, 'thread'))
+        thread.start()
+        result = await asyncio.wait_for(fut, 2)
+        thread.join()
+        return result
+
+    assert run(main()) == 'thread'
+
+
+def test_streams(app):
+    # Sockets are watched by Qt without polling
+    async def main():
+        async def echo(reader, writer):
+            writer.write(await reader.readline())
+            await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(echo, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'kiwoom\n')
+        line = await asyncio.wait_for(reader.readline(), 2)
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return line
+
+    assert run(main()) == b'kiwoom\n'
+
+
+def test_requests(sim):
+    # Requests in flight at once, without nested loops
+    async def main():
+        aio = AsyncKiwoom(sim)
+        assert await aio.login(timeout=2) == 0
+        begin = time.perf_counter()
+        responses = await asyncio.gather(*[
+            aio.request('opt10080', dict(INPUTS, 종목코드=code), single=['종목코드'], multi=['체결시간', '현재가'])
+            for code in ('000010', '000020', '000030')
+        ])
+        elapsed = time.perf_counter() - begin
+        aio.close()
+        return responses, elapsed
+
+    responses, elapsed = run(main())
+    assert [res.single['종목코드'] for res in responses] == ['000010', '000020', '000030']
+    for res in responses:
+        assert res.tr_code == 'opt10080' and res.prev_next == '2'
+        assert len(res.multi['체결시간']) == len(res.multi['현재가']) == 900
+    assert elapsed < 0.25  # not 3 x 100 ms of latency
+    assert sim.observers('on_receive_tr_data') == ()
+
+
+def test_scheduler(sim):
+    async def main():
+        aio = AsyncKiwoom(sim, Scheduler(sim))
+        res = await aio.request('opt10081', {'종목코드': '000010'}, multi=['일자'], timeout=2)
+        aio.close()
+        return res
+
+    assert len(run(main()).multi['일자']) == 900
+
+
+def test_errors(app, unlimited):
+    api = Kiwoom()
+    attach(api, Simulator(latency=1000, tr_limits=((1, 60),)))
+
+    async def main():
+        aio = AsyncKiwoom(api)
+        first = asyncio.ensure_future(aio.request('opt10081', {'종목코드': '000010'}, rq_name='a'))
+        await asyncio.sleep(0)
+        with pytest.raises(KeyError):
+            await aio.request('opt10081', {'종목코드': '000010'}, rq_name='a')
+        with pytest.raises(RuntimeError):
+            await aio.request('opt10081', {'종목코드': '000020'}, rq_name='b')
+
+        # Requests waiting for responses are cancelled
+        aio.close()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    run(main())
+
+
+def test_real(sim):
+    # Only events of given codes are yielded, until the iterator is closed
+    async def main():
+        aio = AsyncKiwoom(sim)
+        sim.set_real_reg('1000', '000010;000020;000030', '10;15', '0')
+        items = list()
+        stream = aio.real(codes=['000020'], real_type='주식체결', fids=[10, 15])
+        async for item in stream:
+            items.append(item)
+            if len(items) == 5:
+                break
+        await stream.aclose()
+        return items
+
+    items = run(main())
+    assert [code for code, _, _ in items] == ['000020'] * 5
+    code, rtype, rec = items[0]
+    assert rtype == '주식체결' and rec.현재가 != 0
+    assert len(sim.bus) == 0
@@ -0,0 +1,153 @@
+from collections import namedtuple
+from datetime import datetime
+from random import Random
+
+import pandas as pd
+import pytest
+
+from kiwoom.data import bar
+from kiwoom.data.bar import Bar, Bars
+
+DATE = '20241115'
+
+# Record of '주식체결' decoded with TICK_FIDS
+Record = namedtuple('Record', ['체결시간', '현재가', '거래량', '누적거래량'])
+
+
+def ticks(n=500, seed=0):
+    # Random ticks from 09:00:00 in increasing time
+    rnd, secs, recs = Random(seed), 9 * 3600, list()
+    for i in range(n):
+        secs += rnd.randint(0, 7)
+        time = f'{secs // 3600:02}{secs % 3600 // 60:02}{secs % 60:02}'
+        recs.append(Record(time, rnd.randint(9000, 11000), rnd.randint(1, 300) * rnd.choice((1, -1)), i))
+    return recs
+
+
+def feed(bars, recs, code='000010'):
+    for rec in recs:
+        bars.on_tick(code, '주식체결', rec)
+    bars.flush()
+    return bars.frame(code)
+
+
+@pytest.mark.parametrize('kind, unit, period', [('sec', 10, '10s'), ('min', 1, '1min'), ('min', 5, '5min')])
+def test_time(api, kind, unit, period):
+    recs = ticks()
+    df = feed(Bars(api, unit=unit, kind=kind, date=DATE), recs)
+
+    # Labeled by the end of the period, i.e. [09:00:00, 09:01:00) as 09:01:00
+    raw = pd.DataFrame({
+        'time': pd.to_datetime([DATE + rec.체결시간 for rec in recs], format='%Y%m%d%H%M%S'),
+        'price': [rec.현재가 for rec in recs],
+        'volume': [abs(rec.거래량) for rec in recs]
+    })
+    expected = raw.groupby(raw['time'].dt.floor(period) + pd.Timedelta(period)).agg(
+        시가=('price', 'first'), 고가=('price', 'max'), 저가=('price', 'min'),
+        현재가=('price', 'last'), 거래량=('volume', 'sum')
+    )
+    expected.index.name = '체결시간'
+
+    assert list(df.columns) == list(Bar._fields[1:])
+    pd.testing.assert_frame_equal(df, expected, check_dtype=False, check_index_type=False)
+
+
+@pytest.mark.parametrize('kind, unit', [('tick', 7), ('volume', 1000)])
+def test_count(api, kind, unit):
+    recs = ticks()
+    df = feed(Bars(api, unit=unit, kind=kind, date=DATE), recs)
+
+    # Bars closed by number of ticks or volume, labeled by the last tick
+    expected, group = list(), list()
+    for rec in recs:
+        group.append(rec)
+        if len(group) == unit if kind == 'tick' else sum(abs(r.거래량) for r in group) >= unit:
+            expected.append(group)
+            group = list()
+    if group:
+        expected.append(group)
+
+    prices = [[r.현재가 for r in group] for group in expected]
+    assert df.index.strftime('%H%M%S').tolist() == [group[-1].체결시간 for group in expected]
+    assert df['시가'].tolist() == [p[0] for p in prices]
+    assert df['고가'].tolist() == [max(p) for p in prices]
+    assert df['저가'].tolist() == [min(p) for p in prices]
+    assert df['현재가'].tolist() == [p[-1] for p in prices]
+    assert df['거래량'].tolist() == [sum(abs(r.거래량) for r in group) for group in expected]
+
+
+def test_slots(api):
+    class Strategy:
+        def __init__(self):
+            self.log = list()
+
+        def on_bar(self, code, bar):
+            self.log.append((code, bar.체결시간))
+
+    log, strategy = list(), Strategy()
+    bars = Bars(api, unit=2, kind='tick', date=DATE, maxlen=2)
+    bars.connect(lambda code, bar: log.append((code, bar.체결시간)), '000020')
+    bars.connect(strategy.on_bar)
+    recs = ticks(6)
+    for code in ('000010', '000020'):
+        for rec in recs[:3]:
+            bars.on_tick(code, '주식체결', rec)
+    assert log == [('000020', DATE + recs[1].체결시간)]
+    assert strategy.log == [('000010', DATE + recs[1].체결시간), ('000020', DATE + recs[1].체결시간)]
+    assert bars.current('000010') == Bar(DATE + recs[2].체결시간, *[recs[2].현재가] * 4, abs(recs[2].거래량))
+
+    bars.disconnect(strategy.on_bar)
+    for rec in recs[3:]:
+        bars.on_tick('000010', '주식체결', rec)
+    assert len(strategy.log) == 2
+    assert len(bars.bars['000010']) == 2  # maxlen
+
+    with pytest.raises(ValueError):
+        Bars(api, kind='hour')
+    with pytest.raises(ValueError):
+        Bars(api, unit=0)
+
+
+def test_stream(api):
+    # Bars of ticks from the simulator, until closed
+    closed = list()
+    bars = Bars(api, '000010', unit=3, kind='tick')
+    bars.connect(lambda code, bar: closed.append(bar))
+    api.simulator.set_real_reg('1000', '000010;000020', '20;10;15;13', '0')
+
+    prices = list()
+    for i in range(12):
+        api.simulator.tick()
+        if i % 2 == 0:
+            prices.append(abs(int(api.simulator.real[10])))
+
+    assert [bar.현재가 for bar in closed] == prices[2::3]
+    assert [bar.고가 for bar in closed] == [max(prices[i:i + 3]) for i in range(0, 6, 3)]
+    bars.close()
+    assert api.observers('on_receive_real_data') == ()
+
+
+def test_session(api, monkeypatch):
+    # Bars of the previous session are closed once ticks of the next session come
+    class Now:
+        day = datetime(2024, 11, 15, 9)
+
+        @classmethod
+        def now(cls):
+            return cls.day
+    monkeypatch.setattr(bar, 'datetime', Now)
+
+    bars = Bars(api, unit=1, kind='min')
+    bars.on_tick('000010', '주식체결', Record('152959', 10000, 1, 1))
+    Now.day = datetime(2024, 11, 18, 9)
+    bars.on_tick('000010', '주식체결', Record('090001', 10100, 2, 2))
+    bars.flush()
+    assert [b.체결시간 for b in bars.bars['000010']] == ['20241115153000', '20241118090100']
+
+    # Unless the date is given
+    bars = Bars(api, unit=3, kind='tick', date=DATE)
+    for time in ('152959', '090001'):
+        bars.on_tick('000010', '주식체결', Record(time, 10000, 1, 1))
+    assert len(bars.bars['000010']) == 1
+    bars.flush()
+    assert [b.체결시간 for b in bars.bars['000010']] == [DATE + '152959', DATE + '090001']
@@ -0,0 +1,136 @@
+import pytest
+
+
+def events(log, name):
+    def fn(code, real_type, data):
+        log.append((name, code, real_type))
+    return fn
+
+
+def fire(api, *pairs):
+    for code, real_type in pairs:
+        api.on_receive_real_data(code, real_type, '')
+
+
+PAIRS = [('1', '주식체결'), ('2', '주식체결'), ('3', '주식체결'), ('1', '주식호가잔량')]
+
+
+def test_routing(api):
+    log = list()
+    api.subscribe(events(log, 'a'), '주식체결', ['1', '2'])
+    api.subscribe(events(log, 'b'), None, '1')
+    api.subscribe(events(log, 'c'))
+    fire(api, *PAIRS)
+    assert log == [
+        ('a', '1', '주식체결'), ('b', '1', '주식체결'), ('c', '1', '주식체결'),
+        ('a', '2', '주식체결'), ('c', '2', '주식체결'),
+        ('c', '3', '주식체결'),
+        ('b', '1', '주식호가잔량'), ('c', '1', '주식호가잔량'),
+    ]
+
+
+def test_once(api):
+    # A subscriber matching several keys is called once
+    log = list()
+    fn = events(log, 'a')
+    api.subscribe(fn, '주식체결', '1')
+    api.subscribe(fn, None, '1')
+    api.subscribe(fn, '주식체결', None)
+    fire(api, ('1', '주식체결'))
+    assert log == [('a', '1', '주식체결')]
+    assert len(api.bus) == 3
+
+
+def test_unsubscribe(api):
+    # Bus observes the event only while it has any subscriber
+    log = list()
+    a, b = events(log, 'a'), events(log, 'b')
+    api.subscribe(a, '주식체결', ['1', '2'])
+    api.subscribe(b, None, '1')
+    api.unsubscribe(a, '주식체결', '1')
+    fire(api, *PAIRS)
+    assert log == [('b', '1', '주식체결'), ('a', '2', '주식체결'), ('b', '1', '주식호가잔량')]
+
+    api.unsubscribe(a, '주식체결', '2')
+    api.unsubscribe(b, None, '1')
+    assert len(api.bus) == 0
+    assert api.observers('on_receive_real_data') == ()
+
+
+@pytest.mark.parametrize('codes', [['1', '2'], None])
+def test_fast_path(api, codes):
+    # A lone subscriber is bound directly, and the table is used again once another comes
+    log = list()
+    a = events(log, 'a')
+    api.subscribe(a, '주식체결', codes)
+    bound, = api.observers('on_receive_real_data')
+    assert bound is api.bus.publish and bound is not api.bus._publish
+
+    fire(api, *PAIRS)
+    expected = [('a', code, rtype) for code, rtype in PAIRS if rtype == '주식체결' and (codes is None or code in codes)]
+    assert log == expected
+
+    b = events(log, 'b')
+    api.subscribe(b, '주식호가잔량', '1')
+    assert api.observers('on_receive_real_data') == (api.bus._publish,)
+    log.clear()
+    fire(api, *PAIRS)
+    assert log == expected + [('b', '1', '주식호가잔량')]
+
+    api.unsubscribe(b, '주식호가잔량', '1')
+    assert api.observers('on_receive_real_data') != (api.bus._publish,)
+    api.unsubscribe(a, '주식체결', codes)
+    assert api.observers('on_receive_real_data') == ()
+
+
+def test_no_fast_path(api):
+    # Wildcard real type, or several subscribers, go through the table
+    log = list()
+    api.subscribe(events(log, 'a'), None, '1')
+    assert api.observers('on_receive_real_data') == (api.bus._publish,)
+
+    api.unsubscribe(api.bus._table[None]['1'][0], None, '1')
+    api.subscribe(events(log, 'a'), '주식체결', '1')
+    api.subscribe(events(log, 'b'), '주식체결', '2')
+    assert api.observers('on_receive_real_data') == (api.bus._publish,)
+
+
+def test_records(api):
+    # Records are decoded once with FIDs of all subscribers
+    sim, log = api.simulator, list()
+    api.subscribe(lambda code, rtype, rec: log.append(('price', code, rec)), '주식체결', '000010', fids=[10])
+    api.subscribe(lambda code, rtype, rec: log.append(('volume', code, rec)), '주식체결', None, fids=[15])
+    api.subscribe(lambda code, rtype, data: log.append(('raw', code, data)), '주식체결', '000010')
+    sim.set_real_reg('1000', '000010;000020', '10;15', '0')
+
+    sim.tick()
+    assert [(name, code) for name, code, _ in log] == [('raw', '000010'), ('price', '000010'), ('volume', '000010')]
+    raw, price, volume = [data for _, _, data in log]
+    assert price is volume
+    assert price.현재가 == abs(int(sim.real[10])) and price.거래량 == int(sim.real[15])
+    assert raw.split('\t')[1] == sim.real[10]
+
+    log.clear()
+    sim.tick()
+    assert [(name, code) for name, code, _ in log] == [('volume', '000020')]
+
+    with pytest.raises(ValueError):
+        api.subscribe(lambda *args: None, None, '1', fids=[10])
+    with pytest.raises(TypeError):
+        api.subscribe('not callable')
+
+
+def test_unsubscribe_method(api):
+    # A bound method is a new object at every access, but equal to the one subscribed
+    class Counter:
+        n = 0
+
+        def on_tick(self, code, real_type, rec):
+            self.n += 1
+
+    counter = Counter()
+    api.subscribe(counter.on_tick, '주식체결', '1', fids=[10])
+    api.unsubscribe(counter.on_tick, '주식체결', '1')
+    fire(api, ('1', '주식체결'))
+    assert counter.n == 0
+    assert len(api.bus) == 0 and not api.bus._fids
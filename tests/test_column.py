@@ -0,0 +1,61 @@
+import numpy as np
+
+from kiwoom.data.column import Column
+
+
+def pages(n, size):
+    # Pages from the newest to the oldest, each ordered from the newest to the oldest
+    data = np.arange(n)
+    return data, [data[max(0, end - size):end][::-1] for end in range(n, 0, -size)]
+
+
+def test_chronological():
+    data, parts = pages(2500, 900)
+    col = Column()
+    for page in parts:
+        col.prepend(page)
+    assert len(col) == 2500
+    assert np.array_equal(col.values(), data)
+    assert col.values().dtype == np.int64
+
+
+def test_growth():
+    # Capacity grows geometrically, i.e. a few reallocations for many pages
+    col, buffers = Column(), set()
+    for page in pages(10000, 10)[1]:
+        col.prepend(page)
+        buffers.add(id(col.buffer))
+    assert len(col) == 10000
+    assert col.capacity < 2 * 10000 + 10
+    assert len(buffers) <= 12
+
+
+def test_capacity():
+    col = Column(capacity=100)
+    col.prepend([3, 2, 1])
+    assert len(col) == 3 and col.capacity == 100
+    assert list(col.values()) == [1, 2, 3]
+
+
+def test_promote():
+    col = Column()
+    col.prepend(np.array([3, 2], dtype=np.int64))
+    col.prepend(np.array([1.5, np.nan]))
+    assert col.values().dtype == np.float64
+    assert np.isnan(col.values()[0]) and list(col.values()[1:]) == [1.5, 2, 3]
+
+    col.prepend(np.array(['a'], dtype=object))
+    assert col.values().dtype == object
+    assert col.values()[0] == 'a' and col.values()[-1] == 3
+
+    col = Column()
+    col.prepend(np.array(['bb', 'a']))
+    col.prepend(np.array(['cccc']))
+    assert list(col.values()) == ['cccc', 'a', 'bb']
+
+
+def test_empty():
+    col = Column()
+    col.prepend([])
+    assert len(col) == 0
+    assert col.values().size == 0
@@ -0,0 +1,69 @@
+import pytest
+
+from kiwoom.config import history
+
+
+TR_CODE = 'opt10080'  # 주식분봉차트조회요청
+
+
+@pytest.fixture
+def page(api, wait):
+    """
+    Runs fn(api) inside of on_receive_tr_data for a page of minute bars.
+    """
+    def run(fn):
+        result = list()
+        api.connect('on_receive_tr_data', slot=lambda *args: result.append(fn(api)), key='rq')
+        api.set_input_value('종목코드', '000010')
+        api.set_input_value('틱범위', '1')
+        assert api.comm_rq_data('rq', TR_CODE, '0', '0001') == 0
+        wait(lambda: result)
+        return result[0]
+    return run
+
+
+def cells(api, keys):
+    cnt = api.get_repeat_cnt(TR_CODE, 'rq')
+    return {key: [api.get_comm_data(TR_CODE, 'rq', i, key) for i in range(cnt)] for key in keys}
+
+
+def count(api):
+    # Counts API calls by name
+    calls, call = dict(), api.call
+
+    def counted(fn, *args):
+        name = fn[:fn.find('(')]
+        calls[name] = calls.get(name, 0) + 1
+        return call(fn, *args)
+    api.call = counted
+    return calls
+
+
+def test_columns(api, page):
+    keys = ['체결시간', '현재가', '거래량']
+    calls = count(api)
+    data = page(lambda api: api.get_comm_data_columns(TR_CODE, 'rq', keys))
+    assert calls['GetCommDataEx'] == 1
+    assert calls['GetCommData'] == len(keys)  # cross-check of the first row only
+
+    expected = page(lambda api: cells(api, keys))
+    assert {key: list(val) for key, val in data.items()} == expected
+    assert len(expected['체결시간']) == 900
+
+
+def test_wrong_layout(api, page):
+    # Falls back to GetCommData for each cell when the layout doesn't match
+    keys = ['현재가', '거래량']
+    layout = list(reversed(history.layout(TR_CODE)))
+    data = page(lambda api: api.get_comm_data_columns(TR_CODE, 'rq', keys, layout=layout))
+    assert data == page(lambda api: cells(api, keys))
+
+
+def test_history(bot, tmp_path, monkeypatch, capsys):
+    # Files are the same with or without GetCommDataEx
+    bot.history('000010', 'min', path=str(tmp_path / 'ex'))
+    monkeypatch.setattr(history, 'layout', lambda tr_code: None)
+    bot.history('000010', 'min', path=str(tmp_path / 'cell'))
+    capsys.readouterr()
+
+    assert (tmp_path / 'ex' / '000010.csv').read_bytes() == (tmp_path / 'cell' / '000010.csv').read_bytes()
@@ -0,0 +1,122 @@
+import pytest
+
+from kiwoom import Kiwoom, config
+from kiwoom.core.connector import Connector
+
+
+@pytest.fixture
+def api(app):
+    return Kiwoom()
+
+
+def test_slot(api):
+    # Without hook and observers, the slot itself is called
+    log = list()
+    slot = lambda err: log.append(err)
+    api.connect('on_event_connect', slot=slot)
+    assert api._connector.dispatch['on_event_connect'] is slot
+
+    api.on_event_connect(0)
+    assert log == [0]
+    assert api.slot('on_event_connect') is slot
+
+
+def test_hook(api, monkeypatch, capsys):
+    # Slots are selected by the arg of the hook, i.e. rq_name
+    log = list()
+    api.connect('on_receive_tr_data', slot=lambda *args: log.append(('a',) + args), key='a')
+    api.connect('on_receive_tr_data', slot=lambda *args: log.append(('b',) + args), key='b')
+    api.on_receive_tr_data('0001', 'b', 'opt10081', '', '0')
+    api.on_receive_tr_data('0002', 'a', 'opt10081', '', '2')
+    assert log == [('b', '0001', 'b', 'opt10081', '', '0'), ('a', '0002', 'a', 'opt10081', '', '2')]
+    assert api.get_hook_index('on_receive_tr_data') == 1
+
+    # Warning for a key without slot
+    monkeypatch.setattr(config, 'MUTE', False)
+    api.on_receive_tr_data('0003', 'c', 'opt10081', '', '0')
+    assert 'not connected to any slot' in capsys.readouterr().out
+    monkeypatch.setattr(config, 'MUTE', True)
+    api.on_receive_tr_data('0003', 'c', 'opt10081', '', '0')
+    assert capsys.readouterr().out == ''
+
+    with pytest.raises(KeyError):
+        api.set_connect_hook('on_receive_tr_data', 'unknown')
+
+
+def test_remove_hook(api):
+    log = list()
+    api.remove_connect_hook('on_receive_tr_data')
+    assert api.get_connect_hook('on_receive_tr_data') is None
+    api.connect('on_receive_tr_data', slot=lambda *args: log.append(args[1]))
+    api.on_receive_tr_data('0001', 'any', 'opt10081', '', '0')
+    assert log == ['any']
+
+    with pytest.raises(RuntimeError):
+        api.connect('on_receive_tr_data', slot=lambda *args: None, key='key')
+
+
+def test_observers(api, monkeypatch, capsys):
+    log = list()
+    first = lambda *args: log.append(('first', args[1]))
+    second = lambda *args: log.append(('second', args[1]))
+    api.observe('on_receive_tr_data', first)
+    api.observe('on_receive_tr_data', second)
+    api.connect('on_receive_tr_data', slot=lambda *args: log.append(('slot', args[1])), key='rq')
+
+    # Observers in order, then the slot
+    api.on_receive_tr_data('0001', 'rq', 'opt10081', '', '0')
+    assert log == [('first', 'rq'), ('second', 'rq'), ('slot', 'rq')]
+    assert api.observers('on_receive_tr_data') == (first, second)
+
+    # Events handled by observers only are fine
+    monkeypatch.setattr(config, 'MUTE', False)
+    log.clear()
+    api.on_receive_tr_data('0001', 'other', 'opt10081', '', '0')
+    assert log == [('first', 'other'), ('second', 'other')]
+
+    api.unobserve('on_receive_tr_data', first)
+    api.unobserve('on_receive_tr_data', first)
+    log.clear()
+    api.on_receive_tr_data('0001', 'rq', 'opt10081', '', '0')
+    assert log == [('second', 'rq'), ('slot', 'rq')]
+
+    # A lone observer without slot is called directly
+    api.observe('on_receive_chejan_data', first)
+    assert api._connector.dispatch['on_receive_chejan_data'] is first
+
+    with pytest.raises(TypeError):
+        api.observe('on_receive_msg', 'not callable')
+
+
+def test_unobserve_method(api):
+    # A bound method is a new object at every access, but equal to the one observed
+    class Counter:
+        n = 0
+
+        def received(self, *args):
+            self.n += 1
+
+    counter = Counter()
+    api.observe('on_receive_tr_data', counter.received)
+    api.on_receive_tr_data('0001', 'rq', 'opt10081', '', '0')
+    api.unobserve('on_receive_tr_data', counter.received)
+    api.on_receive_tr_data('0001', 'rq', 'opt10081', '', '0')
+    assert counter.n == 1
+    assert api.observers('on_receive_tr_data') == ()
+
+
+def test_map():
+    # Overridden handler runs before the slot, and extra args are dropped
+    log = list()
+
+    class API:
+        def __init__(self):
+            self._connector = Connector()
+            self._connector.connect('on_receive_msg', slot=lambda *args: log.append(('slot',) + args))
+
+        @Connector.map
+        def on_receive_msg(self, scr_no, rq_name, tr_code, msg):
+            log.append(('handler', msg))
+
+    API().on_receive_msg('0001', 'rq', 'opt10081', 'msg', 'extra')
+    assert log == [('handler', 'msg'), ('slot', '0001', 'rq', 'opt10081', 'msg')]
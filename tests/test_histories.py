@@ -0,0 +1,108 @@
+from time import perf_counter
+
+import pytest
+from PyQt5.QtCore import QTimer
+
+from kiwoom.config import history
+from kiwoom.config.types import ExitType
+from kiwoom.wrapper.sim import Simulator, attach
+
+
+def files(path):
+    return {file.name: file.read_bytes() for file in path.iterdir()}
+
+
+@pytest.fixture
+def slow(bot):
+    # Simulator with latency, where downloads at once overlap their responses
+    attach(bot.api, Simulator(rows=2000, latency=60, tr_limits=(), ncodes=8, today=bot.api.simulator.today))
+    bot.login()
+    return bot
+
+
+@pytest.mark.parametrize('period', ['tick', 'day'])
+def test_concurrency(slow, tmp_path, capsys, period):
+    elapsed = dict()
+    for concurrency in (1, 4):
+        begin = perf_counter()
+        result = slow.histories(market='0', period=period, path=str(tmp_path / str(concurrency)), concurrency=concurrency)
+        elapsed[concurrency] = perf_counter() - begin
+        assert result == ExitType.SUCCESS
+    capsys.readouterr()
+
+    assert len(files(tmp_path / '1')) == 8
+    assert files(tmp_path / '4') == files(tmp_path / '1')
+    assert elapsed[4] < elapsed[1] / 2
+
+
+def test_codes(bot, tmp_path, capsys):
+    codes = ['000020', '000030']
+    assert bot.histories(codes=codes, period='day', path=str(tmp_path), concurrency=2) == ExitType.SUCCESS
+    capsys.readouterr()
+    assert sorted(files(tmp_path)) == ['000020.csv', '000030.csv']
+
+    with pytest.raises(ValueError):
+        bot.histories(codes=codes, period='day', path=str(tmp_path), concurrency=0)
+    with pytest.raises(RuntimeError):
+        bot.histories(market='0', codes=codes, period='day', path=str(tmp_path))
+
+
+def test_downloaded(bot, tmp_path, capsys):
+    # Hook is called for each item in order of completion
+    downloaded = list()
+    bot.downloaded = downloaded.append
+    bot.histories(market='0', period='day', path=str(tmp_path), concurrency=3)
+    capsys.readouterr()
+    assert sorted(downloaded) == bot.codes('0')
+    assert sorted(code + '.csv' for code in downloaded) == sorted(files(tmp_path))
+
+
+def test_failure(bot, tmp_path, monkeypatch, capsys):
+    # An error stops starting new items
+    save = bot.server.history_to_file
+
+    def history_to_file(df, file, *args, **kwargs):
+        if file == '000020':
+            raise OSError('Disk full')
+        return save(df, file, *args, **kwargs)
+    monkeypatch.setattr(bot.server, 'history_to_file', history_to_file)
+
+    codes = ['000010', '000020', '000030', '000040', '000050']
+    assert bot.histories(codes=codes, period='day', path=str(tmp_path), concurrency=2) == ExitType.FAILURE
+    capsys.readouterr()
+    assert '000010.csv' in files(tmp_path)
+    assert not {'000020.csv', '000040.csv', '000050.csv'} & set(files(tmp_path))
+
+
+def test_restart(bot, tmp_path, monkeypatch, capsys):
+    # The first item reaches the request limit after the second one is downloaded
+    monkeypatch.setattr(history, 'SPEEDING', True)
+    original = bot.history
+
+    def limited(code, *args, prev_next='0', **kwargs):
+        if code == '000010' and prev_next != '0':
+            if bot.share.get_single('histories', 'cnt') == 0:
+                # To wait for the other item to be downloaded first
+                QTimer.singleShot(10, lambda: limited(code, *args, prev_next=prev_next, **kwargs))
+                return
+            bot.share.single['histories']['nrq'] = history.REQUEST_LIMIT_TRY
+        return original(code, *args, prev_next=prev_next, **kwargs)
+    monkeypatch.setattr(bot, 'history', limited)
+    monkeypatch.setattr(history, 'REQUEST_LIMIT_TRY', 100)
+
+    codes = ['000010', '000020', '000030']
+    downloaded = list()
+    bot.downloaded = downloaded.append
+    result = bot.histories(codes=codes, period='day', path=str(tmp_path), merge=False, concurrency=2)
+    assert result[:2] == (0, None) and 1 in result[2]
+    assert sorted(downloaded) == [codes[i] for i in result[2]]
+    assert bot.scr.usage()['used'] == 0
+
+    # Only the items left are downloaded in the next run
+    del downloaded[:]
+    monkeypatch.setattr(history, 'SPEEDING', False)
+    monkeypatch.setattr(bot, 'history', original)
+    assert bot.histories(codes=codes, period='day', path=str(tmp_path), merge=False, slice=result) == ExitType.SUCCESS
+    capsys.readouterr()
+    assert downloaded == [code for i, code in enumerate(codes) if i not in result[2]]
+    assert sorted(files(tmp_path)) == [code + '.csv' for code in codes]
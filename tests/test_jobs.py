@@ -0,0 +1,127 @@
+from threading import Thread
+
+import pytest
+
+from kiwoom.config.types import ExitType
+from kiwoom.data.jobs import DONE, FAILED, PENDING, RUNNING, JobQueue
+
+
+@pytest.fixture
+def jobs(tmp_path):
+    jobs = JobQueue(str(tmp_path / 'jobs.db'))
+    yield jobs
+    jobs.close()
+
+
+def test_add(jobs):
+    assert jobs.add(['000010', '000020'], 'tick') == 2
+    assert jobs.add('000010', 'tick') == 0
+    assert jobs.add('000010', 'min', unit=3, start='20240101') == 1
+    assert [job[1:] for job in jobs.jobs()] == [
+        ('000010', 'tick', None, None, None, PENDING, 0),
+        ('000020', 'tick', None, None, None, PENDING, 0),
+        ('000010', 'min', 3, '20240101', None, PENDING, 0)
+    ]
+
+    # Requeue puts done and failed jobs back, but not the ones pending or running
+    jobs.done(jobs.claim().id)
+    jobs.claim()
+    assert jobs.add(['000010', '000020'], 'tick', requeue=True) == 1
+    assert jobs.counts() == {PENDING: 2, RUNNING: 1}
+    assert len(jobs) == 3
+
+
+def test_claim(jobs):
+    jobs.add(['000010', '000020'], 'day')
+    first, second = jobs.claim(), jobs.claim()
+    assert (first.code, first.state, first.attempts) == ('000010', RUNNING, 1)
+    assert second.code == '000020'
+    assert jobs.claim() is None
+
+    # Released jobs don't count as attempts
+    jobs.release(first.id)
+    jobs.release(first.id)
+    assert jobs.jobs(PENDING) == [first._replace(state=PENDING, attempts=0)]
+    assert jobs.claim() == first
+
+
+def test_fail(tmp_path):
+    jobs = JobQueue(str(tmp_path / 'jobs.db'), max_attempts=2)
+    jobs.add('000010', 'day')
+    jobs.fail(jobs.claim().id, 'OSError')
+    assert jobs.jobs()[0].state == PENDING
+
+    job = jobs.claim()
+    jobs.fail(job.id, 'OSError')
+    assert jobs.jobs() == [job._replace(state=FAILED)]
+    assert jobs.claim() is None
+
+    assert jobs.reset(FAILED) == 1
+    assert jobs.jobs()[0].attempts == 0
+    jobs.close()
+
+
+def test_recover(jobs):
+    # Jobs left running by a process that died are pending for the next one
+    jobs.add(['000010', '000020', '000030'], 'day')
+    jobs.claim()
+    jobs.done(jobs.claim().id)
+    jobs.close()
+
+    jobs = JobQueue(jobs.file)
+    assert jobs.recover() == 1
+    assert [(job.code, job.state) for job in jobs.jobs()] == [('000010', PENDING), ('000020', DONE), ('000030', PENDING)]
+    assert jobs.claim().code == '000010'
+    jobs.close()
+
+
+def test_race(jobs):
+    # Claims of several connections never return the same job
+    jobs.add([f'{i:06}' for i in range(200)], 'day')
+    claimed = list()
+
+    def consume():
+        queue = JobQueue(jobs.file)
+        while (job := queue.claim()) is not None:
+            claimed.append(job.id)
+        queue.close()
+
+    threads = [Thread(target=consume) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(claimed) == list(range(1, 201))
+
+
+def test_histories(bot, jobs, tmp_path, capsys):
+    path = tmp_path / 'day'
+    jobs.add(['000010', '000020', '000030'], 'day')
+    jobs.claim()  # left running by a process that died
+    jobs.done(jobs.claim().id)
+
+    # Resumes pending jobs including the recovered one, but not the done one
+    assert bot.histories(jobs=jobs.file, path=str(path)) == ExitType.SUCCESS
+    assert sorted(file.name for file in path.iterdir()) == ['000010.csv', '000030.csv']
+    assert jobs.counts() == {DONE: 3}
+
+    # Items given are added unless already in the queue
+    assert bot.histories(codes=['000030', '000020'], period='day', jobs=jobs, path=str(path)) == ExitType.SUCCESS
+    capsys.readouterr()
+    assert sorted(file.name for file in path.iterdir()) == ['000010.csv', '000030.csv']
+
+
+def test_histories_failure(bot, jobs, tmp_path, monkeypatch, capsys):
+    save = bot.server.history_to_file
+
+    def history_to_file(df, file, *args, **kwargs):
+        if file == '000020':
+            raise OSError('Disk full')
+        return save(df, file, *args, **kwargs)
+    monkeypatch.setattr(bot.server, 'history_to_file', history_to_file)
+
+    jobs.add(['000010', '000020', '000030'], 'day')
+    assert bot.histories(jobs=jobs, path=str(tmp_path)) == ExitType.FAILURE
+    capsys.readouterr()
+    assert [job.state for job in jobs.jobs()] == [DONE, PENDING, PENDING]
+    assert jobs.jobs()[1].attempts == 1
@@ -0,0 +1,148 @@
+from time import perf_counter
+
+import pytest
+
+from kiwoom.config import history
+from kiwoom.utils.limiter import Limiter
+from kiwoom.wrapper.sim import Simulator, attach
+
+
+class Clock:
+    # Fake time that moves only when slept
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = list()
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, sec):
+        self.slept.append(sec)
+        self.now += sec
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def test_windows(clock):
+    limiter = Limiter([(5, 1), (100, 60), (0, 1), (1, 0)], clock=clock)
+    assert limiter.windows == [(5, 1.0), (100, 60.0)]
+
+    limiter.enabled = False
+    assert limiter.windows == []
+    assert limiter.wait() == 0
+
+
+def test_burst(clock):
+    # 5 requests at once, then the 6th waits until the 1st is out of the window
+    limiter = Limiter([(5, 1)], sleep=clock.sleep, clock=clock)
+    for _ in range(5):
+        assert limiter.acquire() == 0
+    assert limiter.wait() == pytest.approx(1)
+
+    clock.now += 0.4
+    assert limiter.wait() == pytest.approx(0.6)
+    assert limiter.acquire() == pytest.approx(0.6)
+    assert clock.now == pytest.approx(1001)
+
+
+def test_multiple(clock):
+    # The largest delay among windows is waited
+    limiter = Limiter([(2, 1), (3, 10)], sleep=clock.sleep, clock=clock)
+    stamps = list()
+    for _ in range(7):
+        limiter.acquire()
+        stamps.append(clock.now - 1000)
+    assert stamps == pytest.approx([0, 0, 1, 10, 10, 11, 20])
+
+    # Every window of each size holds no more than its count
+    for n, sec in limiter.windows:
+        for i in range(len(stamps) - n):
+            assert stamps[i + n] - stamps[i] >= sec - 1e-9
+
+
+def test_interval(clock):
+    # A window of (1, interval) is the minimum interval between two requests
+    limiter = Limiter([(1, 0.2)], sleep=clock.sleep, clock=clock)
+    for _ in range(4):
+        limiter.acquire()
+    assert clock.slept == pytest.approx([0.2, 0.2, 0.2])
+    assert limiter.waited == pytest.approx(0.6)
+
+
+def test_log(clock):
+    # Only timestamps needed for the largest window are kept
+    limiter = Limiter([(3, 1), (5, 60)], sleep=clock.sleep, clock=clock)
+    for _ in range(20):
+        limiter.acquire()
+    assert len(limiter.log) == 5
+
+    limiter.reset()
+    assert limiter.wait() == 0
+
+
+def test_no_sleep(clock):
+    limiter = Limiter([(1, 1)], clock=clock)
+    limiter.acquire()
+    with pytest.raises(RuntimeError):
+        limiter.acquire()
+
+
+def test_config(clock, monkeypatch):
+    # Changes of configuration apply at once
+    limiter, pacer = Limiter(history.limits, clock=clock), Limiter(history.pace, clock=clock)
+    monkeypatch.setattr(history, 'REQUEST_LIMIT_WINDOWS', [(5, 1)])
+    monkeypatch.setattr(history, 'REQUEST_LIMIT_TIME', 0)
+    assert limiter.windows == [(5, 1.0)] and pacer.windows == []
+
+    # The minimum interval is only for bulk downloads
+    monkeypatch.setattr(history, 'REQUEST_LIMIT_TIME', 3600)
+    assert limiter.windows == [(5, 1.0)] and pacer.windows == [(1, 3.6)]
+
+
+def test_account(api, wait, monkeypatch):
+    # One-off requests such as account inquiries are not delayed by the minimum interval
+    monkeypatch.setattr(history, 'REQUEST_LIMIT_TIME', 3600)
+    monkeypatch.setattr(history, 'REQUEST_LIMIT_WINDOWS', [(5, 1), (100, 60), (1000, 3600)])
+    events = list()
+    api.connect('on_receive_tr_data', slot=lambda *args: events.append(args), key='balance')
+    for _ in range(2):
+        api.set_input_value('계좌번호', '8000000011')
+        assert api.comm_rq_data('balance', 'opw00018', '0', '2000') == 0
+        wait(lambda: events)
+        events.clear()
+    assert api.limiter.waited < 0.1
+
+
+def test_pace(bot, tmp_path, monkeypatch, capsys):
+    # Requests of bulk downloads keep the minimum interval
+    monkeypatch.setattr(history, 'REQUEST_LIMIT_TIME', 100)
+    begin = perf_counter()
+    bot.histories(codes=['000010'], period='day', path=str(tmp_path))
+    capsys.readouterr()
+    assert perf_counter() - begin >= 0.2  # 3 pages
+    assert bot.api.limiter.waited < 0.01
+
+
+def test_server(bot, tmp_path, monkeypatch, capsys):
+    # Requests never exceed the windows of the server while waiting in the event loop
+    attach(bot.api, Simulator(rows=2000, tr_limits=((4, 0.5),), ncodes=3, today=bot.api.simulator.today))
+    bot.login()
+    monkeypatch.setattr(history, 'REQUEST_LIMIT_WINDOWS', [(4, 0.5)])
+
+    overflows, call = list(), bot.api.call
+
+    def counted(fn, *args):
+        ret = call(fn, *args)
+        if ret == -200:
+            overflows.append(args)
+        return ret
+    bot.api.call = counted
+
+    bot.histories(market='0', period='day', path=str(tmp_path))
+    capsys.readouterr()
+    assert not overflows
+    assert len(list(tmp_path.iterdir())) == 3
+    assert bot.api.limiter.waited > 0
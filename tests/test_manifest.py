@@ -0,0 +1,126 @@
+import json
+import os
+import time
+import warnings
+from datetime import date
+from hashlib import blake2b
+from threading import Thread
+
+import pandas as pd
+import pytest
+
+from kiwoom.config import history
+from kiwoom.core.server import Server
+from kiwoom.data.manifest import Manifest, digest
+from kiwoom.data.storage import CSV
+
+
+@pytest.fixture
+def file(tmp_path):
+    file = tmp_path / '005930.csv'
+    file.write_bytes(b'data')
+    return str(file)
+
+
+def ticks(start, n=100, freq='7s'):
+    index = pd.date_range(start, periods=n, freq=freq, name='체결시간')
+    return pd.DataFrame({'체결가': range(n), '거래량': range(n)}, index=index)
+
+
+def test_update(tmp_path, file):
+    manifest = Manifest(str(tmp_path))
+    assert manifest.get(file) is None and file not in manifest
+
+    manifest.update(file, code='005930', rows=10, last=pd.Timestamp('2024-11-15 15:30'))
+    entry = Manifest(str(tmp_path)).get('005930.csv')
+    assert entry['rows'] == 10 and entry['last'] == '2024-11-15 15:30:00'
+    assert entry['size'] == 4 and file in manifest
+    assert not os.path.exists(manifest.lock)
+
+    with open(manifest.file, encoding='utf-8') as f:
+        assert json.load(f)['005930.csv'] == entry
+
+    manifest.remove(file)
+    assert file not in Manifest(str(tmp_path))
+
+
+def test_fresh(tmp_path, file):
+    manifest = Manifest(str(tmp_path))
+    manifest.update(file, rows=1)
+    assert manifest.fresh(file)['rows'] == 1
+
+    # Changed after recorded
+    with open(file, 'ab') as f:
+        f.write(b'more')
+    assert manifest.fresh(file) is None
+
+
+def test_lock(tmp_path, file):
+    # Writer waits until the lock is released
+    manifest = Manifest(str(tmp_path))
+    with manifest:
+        writer = Thread(target=Manifest(str(tmp_path)).update, args=(file,), kwargs={'rows': 1})
+        writer.start()
+        time.sleep(0.1)
+        assert writer.is_alive() and manifest.get(file) is None
+    writer.join(5)
+    assert manifest.get(file)['rows'] == 1
+
+    # Lock left by a dead process is released after timeout
+    open(manifest.lock, 'w').close()
+    past = time.time() - 10
+    os.utime(manifest.lock, (past, past))
+    Manifest(str(tmp_path), timeout=1).update(file, rows=2)
+    assert manifest.get(file)['rows'] == 2
+
+
+def test_digest(file):
+    assert digest(file, block=3) == 'blake2b:' + blake2b(b'data', digest_size=16).hexdigest()
+
+
+@pytest.mark.filterwarnings('ignore::UserWarning')
+@pytest.mark.parametrize('incremental', [True, False])
+def test_history(bot, tmp_path, monkeypatch, capsys, incremental):
+    # Entries counted from the previous entry match the files merged incrementally
+    monkeypatch.setattr(history, 'MANIFEST', True)
+    monkeypatch.setattr(history, 'MANIFEST_HASH', True)
+    monkeypatch.setattr(history, 'INCREMENTAL_MERGE', incremental)
+    for day in (date(2024, 11, 15), date(2024, 11, 20), date(2024, 11, 21)):
+        bot.api.simulator.today = day
+        bot.histories(market='0', period='tick', path=str(tmp_path))
+    capsys.readouterr()
+
+    manifest = Manifest(str(tmp_path))
+    files = [file for file in os.listdir(tmp_path) if file.endswith('.csv')]
+    assert len(files) == 3 and len(manifest.load()) == 3
+    for name in files:
+        file = str(tmp_path / name)
+        entry = manifest.fresh(file)
+        first, last, rows = CSV().summary(file, '체결시간')
+        assert (entry['first'], entry['last'], entry['rows']) == (str(first), str(last), rows)
+        assert entry['period'] == 'tick' and entry['hash'] == digest(file)
+
+
+def test_opt_in(bot, tmp_path, capsys):
+    bot.history('000010', 'day', path=str(tmp_path))
+    capsys.readouterr()
+    assert os.listdir(tmp_path) == ['000010.csv']
+
+
+@pytest.mark.parametrize('incremental', [True, False])
+def test_warning(tmp_path, monkeypatch, incremental):
+    # Tick data is merged from the date it starts, warning only if the file has no rows on the date
+    monkeypatch.setattr(history, 'INCREMENTAL_MERGE', incremental)
+    server, path = Server(), str(tmp_path)
+    server.history_to_file(ticks('2024-11-14 09:00'), 'a', path)
+    server.history_to_file(ticks('2024-11-14 09:00'), 'b', path)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        server.history_to_file(ticks('2024-11-14 09:00:03'), 'a', path, merge=True)
+    expected = ticks('2024-11-14 09:00:03')
+    pd.testing.assert_frame_equal(CSV().read(str(tmp_path / 'a.csv'), '체결시간'), expected, check_freq=False)
+
+    with pytest.warns(UserWarning):
+        server.history_to_file(ticks('2024-11-15 09:00:03'), 'b', path, merge=True)
+    assert CSV().summary(str(tmp_path / 'b.csv'), '체결시간')[2] == 200
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from kiwoom.data.preps import datetimes, number, numbers, prep, preps, remove_sign, remove_signs, string, strings
+
+
+COLUMNS = [
+    ['100', '+200', '-300', '  400 '],  # integers with signs and spaces
+    ['1.5', '-0.25', '+3.00', '4'],  # floats
+    ['100', '', '-300', ' '],  # integers with empty values
+    ['1.5', '', '2'],  # floats with empty values
+    ['99999999999999999999', '1'],  # out of int64
+    ['A005930', ' 삼성전자 ', '100'],  # strings and numbers
+    ['+-1', '--2', '+3'],  # signs only to remove
+    [],
+]
+
+
+def same(vector, scalar):
+    # Compare as columns of a DataFrame, where None is NaN just like in pandas
+    dtype = None if len(scalar) else object
+    pd.testing.assert_series_equal(pd.Series(vector, dtype=dtype), pd.Series(scalar, dtype=dtype), check_dtype=False)
+
+
+@pytest.mark.parametrize('col', COLUMNS)
+def test_preps(col):
+    same(preps(col), [prep(x) for x in col])
+
+
+@pytest.mark.parametrize('col', COLUMNS)
+def test_strings(col):
+    arr = strings(col)
+    assert list(arr) == [string(x) for x in col]
+
+
+@pytest.mark.parametrize('col', COLUMNS)
+def test_numbers(col):
+    try:
+        scalar = [number(x) for x in col]
+    except ValueError:
+        with pytest.raises(ValueError):
+            numbers(col)
+    else:
+        same(numbers(col), scalar)
+
+
+@pytest.mark.parametrize('col', COLUMNS)
+def test_remove_signs(col):
+    same(remove_signs(col), [remove_sign(x) for x in col])
+
+
+def test_dtypes():
+    assert numbers(['1', '-2']).dtype == np.int64
+    assert numbers(['1', '2.5']).dtype == np.float64
+    assert preps(['1', 'a']).dtype == object
+    assert numbers(['1', '99999999999999999999'])[1] == 99999999999999999999
+
+
+def test_empty():
+    # Empty values are None in scalar versions and NaN in vectorized ones
+    assert number('') is None and number('  ') is None
+    arr = numbers(['', ' ', '1'])
+    assert arr.dtype == np.float64
+    assert np.isnan(arr[:2]).all() and arr[2] == 1
+    assert np.isnan(numbers(['', ''])).all()
+    assert np.isnan(remove_signs(['+', '-10'])[0])
+
+
+def legacy(col, replacer=None, delayed=None):
+    # Decoding of chart timestamps by regex and pandas.to_datetime, as it was in Server.history()
+    fmt = '%Y%m%d%H%M%S' if len(col[0]) == 14 else '%Y%m%d'
+    sr = pd.Series(col)
+    fixed = dict()
+    for ymd, hour in (delayed or dict()).items():
+        for regex, hhmmss in replacer.items():
+            hhmmss = str(min(int(hhmmss) + hour * 10000, 180000)).zfill(6)
+            target = sr[sr.str.match(ymd) & sr.str.contains(regex, regex=True)]
+            for idx, tsp in target.replace(regex={regex: hhmmss}).items():
+                fixed[idx] = pd.to_datetime(tsp, format=fmt)
+    if replacer:
+        sr = sr.replace(regex=replacer)
+    sr = pd.to_datetime(sr, format=fmt)
+    sr.loc[list(fixed)] = list(fixed.values())
+    return sr.to_numpy()
+
+
+TICKS = ['20241113090000', '20241113153000', '20241113888888', '20241114100000',
+         '20241114888888', '20241114999999', '20241115999999', '20241115090001']
+
+
+def test_datetimes():
+    col = [t for t in TICKS if not t.endswith(('888888', '999999'))]
+    assert np.array_equal(datetimes(col), legacy(col))
+    assert np.array_equal(datetimes(['20241115', '19991231']), legacy(['20241115', '19991231']))
+
+
+@pytest.mark.parametrize('delayed', [None, {'20241114': 1}, {'20241114': 3, '20241115': 1}])
+def test_datetimes_replaced(delayed):
+    replacer = {'888888$': '160000', '999999$': '180000'}
+    expected = legacy(TICKS, replacer, delayed)
+    assert np.array_equal(datetimes(TICKS, replacer, delayed), expected)
+    assert datetimes(TICKS, replacer, delayed).dtype == np.dtype('datetime64[ns]')
+
+
+def test_datetimes_empty():
+    out = datetimes(['20241115', '', ' '])
+    assert out[0] == np.datetime64('2024-11-15') and np.isnat(out[1:]).all()
+    assert np.isnat(datetimes(['', ''])).all()
+
+
+@pytest.mark.parametrize('col', [
+    ['20240231'], ['2024111'], ['2024111509000'], ['abcdefgh'],
+    ['20241115', '20241115090000'], ['20241115250000'], ['20241113888888']
+])
+def test_datetimes_invalid(col):
+    with pytest.raises(ValueError):
+        datetimes(col)
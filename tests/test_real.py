@@ -0,0 +1,78 @@
+import pytest
+
+from kiwoom.config import real
+from kiwoom.data.real import Decoder
+
+
+FIDS = [20, 10, 12, 15, 13, 228]
+
+
+def decode(api, decoder, n=3):
+    # Decodes n events fired by the simulator, with the expected records by GetCommRealData()
+    results = list()
+
+    def observer(code, real_type, real_data):
+        rec = decoder(code, real_data)
+        raw = [api.simulator.real.get(fid, '') for fid in decoder.fids]
+        results.append((rec, tuple(fn(x) for fn, x in zip(decoder.parsers, raw))))
+
+    api.observe('on_receive_real_data', observer)
+    api.simulator.set_real_reg('1000', '000010;000020', ';'.join(map(str, FIDS)), '0')
+    for _ in range(n):
+        api.simulator.tick()
+    api.unobserve('on_receive_real_data', observer)
+    return results
+
+
+def count(api):
+    calls, call = list(), api.call
+
+    def counted(fn, *args):
+        calls.append(fn[:fn.find('(')])
+        return call(fn, *args)
+    api.call = counted
+    return calls
+
+
+def test_decode(api):
+    decoder = Decoder(api, '주식체결', FIDS)
+    calls = count(api)
+    results = decode(api, decoder)
+    for rec, expected in results:
+        assert tuple(rec) == expected
+    assert rec._fields == ('체결시간', '현재가', '등락율', '거래량', '누적거래량', '체결강도')
+    assert isinstance(rec.현재가, int) and rec.현재가 > 0 and isinstance(rec.등락율, float)
+
+    # The layout is checked with GetCommRealData() at the first event only
+    assert decoder.valid and calls.count('GetCommRealData') == len(FIDS)
+
+
+def test_wrong_layout(api, monkeypatch):
+    # Decoder expects a layout shifted by one from real_data the simulator fires
+    layout = real.layout('주식체결')
+    with monkeypatch.context() as m:
+        m.setattr(real, 'layout', lambda real_type: layout[1:] + layout[:1])
+        decoder = Decoder(api, '주식체결', FIDS)
+    calls = count(api)
+    for rec, expected in decode(api, decoder):
+        assert tuple(rec) == expected
+    assert decoder.valid is False
+
+    # Every event falls back to GetCommRealData() for each FID after the check failed
+    assert calls.count('GetCommRealData') > 3 * len(FIDS)
+
+
+def test_unknown(api):
+    with pytest.raises(KeyError):
+        Decoder(api, '알수없음')
+
+    decoder = Decoder(api, '알수없음', [10, 9999])
+    assert decoder.valid is False
+    assert decoder.record._fields == ('현재가', 'fid9999')
+
+
+def test_all_fids(api):
+    decoder = Decoder(api, '주식체결')
+    assert decoder.fids == real.layout('주식체결')
+    for rec, expected in decode(api, decoder, 1):
+        assert tuple(rec) == expected
@@ -0,0 +1,99 @@
+from math import ceil
+
+import pytest
+
+from kiwoom.config.screen import MAX_SCREEN_COUNT, RealScreen, Screen
+
+
+def calls(api):
+    # Records dynamicCalls about real-time registrations
+    log, call = list(), api.call
+
+    def recorded(fn, *args):
+        name = fn[:fn.find('(')]
+        if name in ('SetRealReg', 'SetRealRemove', 'DisconnectRealData'):
+            log.append((name, *args))
+        return call(fn, *args)
+    api.call = recorded
+    return log
+
+
+def codes(n, start=0):
+    return [f'{i:06}' for i in range(start, start + n)]
+
+
+def registered(api):
+    return {scr: codes for scr, codes in api.simulator.reals.items() if codes}
+
+
+@pytest.mark.parametrize('n', [1, 100, 101, 2000])
+def test_add(api, n):
+    real = RealScreen(api, [20, 10, 15, 13])
+    log = calls(api)
+    real.add(codes(n))
+
+    screens = real.screens()
+    assert len(screens) == ceil(n / 100)
+    assert list(screens) == [str(5000 + i) for i in range(len(screens))]
+    assert [code for scr in screens.values() for code in scr] == codes(n)
+    assert registered(api) == screens
+    assert all(name == 'SetRealReg' and tuple(args[2:]) == ('20;10;15;13', '1') for name, *args in log)
+    assert len(log) == len(screens)
+
+    # Codes registered already are skipped
+    log.clear()
+    assert real.add(codes(n)) == {}
+    assert log == []
+
+
+def test_remove(api):
+    real = RealScreen(api, '20;10', size=10)
+    real.add(codes(25))
+    log = calls(api)
+
+    # Only screens that had the codes are touched
+    assert real.remove(['000003', '000012', '999999']) == {'5000': ['000003'], '5001': ['000012']}
+    assert log == [('SetRealRemove', '5000', '000003'), ('SetRealRemove', '5001', '000012')]
+
+    # Screens left empty are disconnected and released
+    log.clear()
+    real.remove(codes(5, 20))
+    assert log == [('DisconnectRealData', '5002')]
+    assert real.screen.usage()['free']['real'] == 1
+
+    # Holes are filled first in order of screen numbers
+    log.clear()
+    assert real.add(codes(3, 100)) == {'5000': ['000100'], '5001': ['000101'], '5002': ['000102']}
+    assert [name for name, *_ in log] == ['SetRealReg'] * 3
+    assert real['000102'] == '5002' and '000003' not in real
+    assert registered(api) == real.screens()
+
+
+def test_compact(api):
+    real = RealScreen(api, '20;10', size=10)
+    real.add(codes(50))
+    real.remove(codes(25)[::2])
+    assert len(real.screens()) == 5
+
+    real.compact()
+    screens = real.screens()
+    assert len(screens) == ceil(len(real) / 10) == 4
+    assert sorted(code for scr in screens.values() for code in scr) == sorted(codes(25)[1::2] + codes(25, 25))
+    assert registered(api) == screens
+
+    real.clear()
+    assert len(real) == 0 and registered(api) == {}
+
+
+def test_shared():
+    # Screens of TR codes and real-time data share the limit
+    scr = Screen()
+    scr('opt10081')
+    real = RealScreen(type('API', (), {'set_real_reg': lambda *args: 0})(), '20', scr, size=1)
+    real.add(codes(MAX_SCREEN_COUNT - 1))
+    assert scr.usage()['used'] == MAX_SCREEN_COUNT
+    with pytest.raises(RuntimeError):
+        real.add('999999')
+
+    with pytest.raises(ValueError):
+        RealScreen(None, '20', size=101)
@@ -0,0 +1,79 @@
+import pytest
+
+from kiwoom import Bot
+from kiwoom.config import history
+from kiwoom.utils.recorder import CALL, EVENT, Recorder, Replayer, read
+
+
+@pytest.fixture
+def log(bot, tmp_path):
+    # Session of Bot.histories() recorded against the simulator
+    file = str(tmp_path / 'session.log')
+    with Recorder(file).attach(bot.api):
+        bot.histories(market='0', period='tick', path=str(tmp_path / 'live'))
+    return file
+
+
+def files(path):
+    return {file.name: file.read_bytes() for file in path.iterdir()}
+
+
+def test_read(log, tmp_path):
+    kinds = [kind for kind, _, _ in read(log)]
+    assert CALL in kinds and EVENT in kinds
+
+    other = tmp_path / 'other.log'
+    other.write_bytes(b'not a log')
+    with pytest.raises(ValueError):
+        list(read(str(other)))
+
+
+def test_detach(bot, tmp_path):
+    call = bot.api.call
+    with Recorder(str(tmp_path / 'session.log')).attach(bot.api) as recorder:
+        assert bot.api.call is not call
+        assert 'on_receive_tr_data' in vars(bot.api)
+    assert recorder.api is None
+    assert bot.api.call is call
+    assert 'on_receive_tr_data' not in vars(bot.api)
+
+
+def test_replay(log, tmp_path, monkeypatch, capsys):
+    # Default request limits would take minutes if the limiter were not disabled
+    monkeypatch.setattr(history, 'REQUEST_LIMIT_TIME', 3600)
+    monkeypatch.setattr(history, 'REQUEST_LIMIT_WINDOWS', [(5, 1), (100, 60), (1000, 3600)])
+
+    bot = Bot()
+    replayer = Replayer(log).attach(bot.api)
+    assert not bot.api.limiter.enabled and not bot.api.pacer.enabled
+    assert bot.api.limiter.windows == bot.api.pacer.windows == []
+
+    elapsed = replayer.play(bot.histories, market='0', period='tick', path=str(tmp_path / 'replay'))
+    assert elapsed < 10
+    assert files(tmp_path / 'replay') == files(tmp_path / 'live')
+
+    replayer.detach()
+    assert bot.api.limiter.enabled and bot.api.pacer.enabled
+    assert bot.api.limiter.windows == [(5, 1.0), (100, 60.0), (1000, 3600.0)]
+    assert bot.api.pacer.windows == [(1, 3.6)]
+    capsys.readouterr()
+
+
+def test_play_events(log, app):
+    # Without a driver, every event is fired in recorded order
+    bot = Bot()
+    fired = list()
+    bot.api.observe('on_receive_tr_data', lambda *args: fired.append(args[1]))
+
+    replayer = Replayer(log).attach(bot.api)
+    replayer.play()
+    replayer.detach()
+
+    recorded = [args[1] for _, _, event, args in replayer.events if event == 'on_receive_tr_data']
+    assert fired and fired == recorded
+
+
+def test_diverged(log, app):
+    replayer = Replayer(log).attach(Bot().api)
+    with pytest.raises(RuntimeError):
+        replayer.call('CommRqData(QString, QString, int, QString)', 'unknown', 'opt10079', 0, '9999')
@@ -0,0 +1,80 @@
+from collections import deque
+
+import numpy as np
+import pytest
+
+from kiwoom.data.ring import TICK, Ring, TickStore
+
+
+@pytest.mark.parametrize('capacity', [1, 3, 8])
+def test_view(capacity):
+    # The same items as deque(maxlen=capacity) at any count
+    ring, ref = Ring(capacity, np.int64), deque(maxlen=capacity)
+    for i in range(3 * capacity + 1):
+        assert len(ring) == len(ref)
+        assert ring.view().tolist() == list(ref)
+        for n in (0, 1, capacity - 1, capacity + 5):
+            assert ring.view(n).tolist() == list(ref)[len(ref) - min(n, len(ref)):]
+        ring.append(i)
+        ref.append(i)
+    assert ring.last() == ref[-1]
+    assert ring.count == 3 * capacity + 1
+
+
+def test_zero_copy():
+    ring = Ring(4)
+    for i in range(6):
+        ring.append((90000 + i, 100 + i, i, 1, i))
+
+    view = ring.view(3)
+    assert view.base is ring._buf or np.shares_memory(view, ring._buf)
+    assert view['price'].tolist() == [103, 104, 105]
+    with pytest.raises(ValueError):
+        view['price'][0] = 0
+
+    # A view changes once its items are overwritten
+    ring.append((90006, 106, 6, -1, 6))
+    assert view['price'].tolist() == [103, 104, 105]
+    ring.append((90007, 107, 7, -1, 7))
+    ring.append((90008, 108, 8, -1, 8))
+    ring.append((90009, 109, 9, -1, 9))
+    assert ring.view(3)['price'].tolist() == [107, 108, 109]
+    assert ring.last()['side'] == -1
+
+
+def test_clear():
+    ring = Ring(2)
+    assert ring.last() is None and len(ring.view()) == 0
+    ring.append((1, 1, 1, 1, 1))
+    ring.clear()
+    assert len(ring) == 0 and ring.last() is None
+    assert ring._buf.nbytes == 4 * TICK.itemsize
+
+    with pytest.raises(ValueError):
+        Ring(0)
+
+
+@pytest.mark.parametrize('codes', [['000010'], None])
+def test_store(api, codes):
+    ticks = TickStore(api, codes, capacity=5)
+    api.simulator.set_real_reg('1000', '000010;000020', '20;10;15;13', '0')
+
+    expected = {'000010': list(), '000020': list()}
+    for _ in range(12):
+        api.simulator.tick()
+        real = api.simulator.real
+        code = '000010' if len(expected['000010']) == len(expected['000020']) else '000020'
+        volume = int(real[15])
+        expected[code].append((
+            int(real[20]), int(real[10].lstrip('+-')), abs(volume), 1 if volume >= 0 else -1, int(real[13])
+        ))
+
+    for code in (codes or expected):
+        assert ticks.view(code).tolist() == expected[code][-5:]
+    assert list(ticks) == (codes or ['000010', '000020'])
+    assert len(ticks.view('000030')) == 0
+
+    ticks.close()
+    api.simulator.tick()
+    assert ticks['000010'].count == 6
+    assert api.observers('on_receive_real_data') == ()
@@ -0,0 +1,138 @@
+from time import perf_counter
+
+import pytest
+
+from kiwoom.config import history
+from kiwoom.config.types import BULK, INTERACTIVE, NORMAL, URGENT
+from kiwoom.core.scheduler import Scheduler, reserved
+from kiwoom.wrapper.sim import Simulator, attach
+
+
+@pytest.fixture
+def scheduler(api):
+    return Scheduler(api, reserve=0.1)
+
+
+def sender(api, log, name, ret=0):
+    # Request that records itself in Kiwoom.limiter just as Kiwoom.comm_rq_data() does
+    def send():
+        api.limiter.record()
+        log.append(name)
+        return ret
+    return send
+
+
+def test_priority(api, scheduler, wait):
+    log = list()
+    for name, priority in [('bulk', BULK), ('normal', NORMAL), ('urgent', URGENT), ('interactive', INTERACTIVE)]:
+        scheduler.submit(sender(api, log, name), priority=priority)
+    wait(lambda: len(log) == 4)
+    assert log == ['urgent', 'interactive', 'normal', 'bulk']
+    assert len(scheduler) == 0
+
+
+def test_deadline(api, scheduler, wait):
+    # Earlier deadline first among the same priority, then in order of submission
+    log = list()
+    scheduler.submit(sender(api, log, 'a'))
+    scheduler.submit(sender(api, log, 'b'), deadline=10)
+    scheduler.submit(sender(api, log, 'c'), deadline=5)
+    scheduler.submit(sender(api, log, 'd'))
+    wait(lambda: len(log) == 4)
+    assert log == ['c', 'b', 'a', 'd']
+
+
+def test_expired(api, scheduler, monkeypatch, wait):
+    monkeypatch.setattr(history, 'REQUEST_LIMIT_WINDOWS', [(1, 60)])
+    log = list()
+    api.limiter.record()
+    req = scheduler.submit(sender(api, log, 'a'), deadline=0.05)
+    wait(lambda: req.done)
+    assert req.expired and not log
+
+    with pytest.raises(TimeoutError):
+        scheduler.run(sender(api, log, 'b'), deadline=0.05)
+
+
+def test_reserve(api, scheduler, monkeypatch, wait):
+    # Quote lane can't use the budget reserved for account TRs
+    monkeypatch.setattr(history, 'REQUEST_LIMIT_WINDOWS', [(10, 60)])
+    log = list()
+    for i in range(10):
+        scheduler.submit(sender(api, log, f'quote{i}'), priority=URGENT, lane='quote')
+    wait(lambda: len(log) == 9)
+    assert scheduler.wait('quote') > 0 and scheduler.wait('account') == 0
+
+    scheduler.submit(sender(api, log, 'account'), priority=BULK, lane='account')
+    wait(lambda: len(log) == 10)
+    assert log[-1] == 'account' and len(scheduler) == 1
+    assert scheduler.wait('account') > 0
+
+    # Orders have their own budget
+    scheduler.submit(sender(api, log, 'order'), lane='order')
+    wait(lambda: len(log) == 11)
+    assert log[-1] == 'order'
+
+
+def test_run(api, scheduler):
+    log = list()
+    assert scheduler.run(sender(api, log, 'a', ret=-200)) == -200
+
+    def fail():
+        raise ValueError('failed')
+    with pytest.raises(ValueError):
+        scheduler.run(fail)
+
+    with pytest.raises(KeyError):
+        scheduler.submit(fail, lane='unknown')
+
+
+def test_callback(api, scheduler, wait):
+    log, results = list(), list()
+    scheduler.submit(sender(api, log, 'a', ret=7), callback=results.append)
+    cancelled = scheduler.submit(sender(api, log, 'b'), callback=results.append)
+    cancelled.cancel()
+    wait(lambda: results)
+    wait(lambda: not len(scheduler))
+    assert results == [7] and log == ['a']
+    assert cancelled.cancelled
+
+
+def test_reserved():
+    assert reserved([(5, 1), (100, 60), (1000, 3600)], 0.1) == [(4, 1), (90, 60), (900, 3600)]
+    assert reserved([(1, 0.9)], 0.1) == [(1, 1.0)]
+    assert reserved([(1, 0.9)], 0) == [(1, 0.9)]
+
+
+def test_saturated(api, scheduler, monkeypatch, wait):
+    # Account TRs get through while the quote lane is saturated by higher priority
+    monkeypatch.setattr(history, 'REQUEST_LIMIT_WINDOWS', [(1, 0.05)])
+    log = list()
+    for i in range(4):
+        scheduler.submit(sender(api, log, f'quote{i}'), priority=URGENT, lane='quote')
+    scheduler.submit(sender(api, log, 'account'), priority=BULK, lane='account')
+    wait(lambda: len(log) == 5)
+    assert log[:2] == ['quote0', 'account']
+
+
+def test_orders(api, wait, monkeypatch):
+    # Orders by the lane never exceed the limits of the server
+    attach(api, Simulator(tr_limits=(), order_limits=((2, 0.2),)))
+    monkeypatch.setattr(history, 'ORDER_LIMIT_WINDOWS', [(2, 0.2)])
+    scheduler = Scheduler(api)
+    assert scheduler.lanes['order'] == [api.order_limiter]
+
+    rets, begin = list(), perf_counter()
+    for i in range(5):
+        scheduler.submit(
+            api.send_order, f'order{i}', '8000', '8000000011', 1, '000010', 1, 0, '03', '',
+            lane='order', callback=rets.append
+        )
+    wait(lambda: len(rets) == 5)
+    assert rets == [0] * 5
+    assert perf_counter() - begin >= 0.4
+
+    # Kiwoom.send_order() waits by itself without the scheduler
+    for _ in range(3):
+        assert api.send_order('order', '8000', '8000000011', 1, '000010', 1, 0, '03', '') == 0
+    assert api.order_limiter.waited > 0
@@ -0,0 +1,90 @@
+import pytest
+
+from kiwoom.config import screen
+from kiwoom.config.screen import MAX_SCREEN_COUNT, Screen
+from kiwoom.config.types import ExitType
+
+
+def test_acquire():
+    scr = Screen()
+    assert [scr.acquire() for _ in range(3)] == ['1000', '1001', '1002']
+    assert scr.acquire('real') == '5000' and scr.acquire('order') == '8000'
+
+    # Released ones are reused first in order of release
+    scr.release('1001')
+    scr.release('1000')
+    scr.release('1000')
+    assert [scr.acquire() for _ in range(3)] == ['1001', '1000', '1003']
+    assert scr.usage() == {
+        'used': 6, 'free': {'tr': 0, 'real': 0, 'order': 0}, 'reserved': 0,
+        'acquired': 8, 'reused': 2, 'released': 2, 'peak': 6
+    }
+
+    with pytest.raises(ValueError):
+        scr.acquire('chart')
+
+
+def test_skip():
+    # Numbers of TR codes are never given out by the pool
+    scr = Screen()
+    scr.update('opt99999', '1000')
+    scr_no = scr('opt10081')
+    assert scr.acquire() == '1001'
+
+    # Released numbers taken by a TR code in the meantime are skipped
+    scr.release('1001')
+    scr.update('opt99998', '1001')
+    scr('opt99998')
+    assert scr.acquire() == '1002'
+    assert scr_no == '4160'
+
+
+def test_reserve():
+    scr = Screen()
+    assert scr.reserve('rq1') == scr.reserve('rq1') == '1000'
+    assert scr.reserve('rq2') == '1001'
+    assert scr.usage()['reserved'] == 2
+
+    # By key or by number
+    scr.release('rq1')
+    scr.release('1001')
+    assert scr.usage()['reserved'] == 0 and scr.usage()['used'] == 0
+    assert scr.reserve('rq3') == '1000'
+
+
+def test_hold():
+    scr = Screen()
+    with pytest.raises(KeyError):
+        with scr.hold('real') as scr_no:
+            assert scr_no == '5000' and scr.usage()['used'] == 1
+            raise KeyError
+    assert scr.usage()['used'] == 0 and scr.usage()['free']['real'] == 1
+
+
+def test_limit(monkeypatch):
+    monkeypatch.setattr(screen, 'MAX_SCREEN_COUNT', 3)
+    scr = Screen()
+    scr('opt10081')
+    scr.acquire()
+    scr.acquire('real')
+    with pytest.raises(RuntimeError):
+        scr.acquire()
+
+    # Reuse doesn't add any
+    scr.release('1000')
+    assert scr.acquire() == '1000'
+    assert MAX_SCREEN_COUNT == 200
+
+
+@pytest.mark.parametrize('concurrency', [1, 3])
+def test_histories(bot, tmp_path, capsys, concurrency):
+    # Screens in use are bounded by downloads at the same time, not by requests
+    result = bot.histories(market='0', period='tick', path=str(tmp_path), concurrency=concurrency)
+    capsys.readouterr()
+    assert result == ExitType.SUCCESS
+
+    usage = bot.scr.usage()
+    assert usage['used'] == 0 and usage['reserved'] == 0
+    assert usage['acquired'] == usage['released'] == 3
+    assert usage['peak'] == concurrency
+    assert bot.api.simulator.reals == {}
@@ -0,0 +1,77 @@
+from datetime import date
+
+import pytest
+
+from kiwoom import config
+from kiwoom.config import history
+from kiwoom.config.types import ExitType
+from kiwoom.core.shard import Orchestrator
+from kiwoom.wrapper.sim import Simulator, attach
+
+
+# Workers are spawned, so that they log in by functions of this module and not by fixtures
+def simulator():
+    return Simulator(rows=500, tr_limits=(), ncodes=4, today=date(2024, 11, 15))
+
+
+def login(bot, wid):
+    config.MUTE = True
+    history.REQUEST_LIMIT_TIME = 0
+    history.REQUEST_LIMIT_WINDOWS = []
+    attach(bot.api, simulator())
+    bot.login()
+
+
+def exhausted(bot, wid):
+    # Session 0 reaches the request limit at once and hands its shard back
+    login(bot, wid)
+    if wid == 0:
+        bot.histories = lambda **kwargs: (0, None)
+
+
+def failed(bot, wid):
+    raise RuntimeError('Login failed.')
+
+
+def files(path):
+    return {file.name: file.read_bytes() for file in path.iterdir()}
+
+
+@pytest.fixture
+def expected(bot, tmp_path, capsys):
+    # Files downloaded by a single session
+    attach(bot.api, simulator())
+    bot.login()
+    assert bot.histories(market='0', period='day', path=str(tmp_path / 'single')) == ExitType.SUCCESS
+    capsys.readouterr()
+    return files(tmp_path / 'single')
+
+
+def test_run(expected, tmp_path, capsys):
+    orchestrator = Orchestrator(sessions=2, login=login, size=1)
+    assert orchestrator.run(market='0', period='day', path=str(tmp_path / 'shard')) == ExitType.SUCCESS
+    capsys.readouterr()
+
+    assert files(tmp_path / 'shard') == expected
+    assert sorted(orchestrator.downloaded) == sorted(name[:-4] for name in expected)
+    assert len(orchestrator.shards) == 4
+
+
+def test_exhausted(expected, tmp_path, capsys):
+    # Handed back without counting as a retry, as the shard didn't fail
+    orchestrator = Orchestrator(sessions=2, login=exhausted, size=2, retries=0)
+    codes = sorted(name[:-4] for name in expected)
+    assert orchestrator.run(codes=codes, period='day', path=str(tmp_path / 'shard')) == ExitType.SUCCESS
+    capsys.readouterr()
+
+    assert files(tmp_path / 'shard') == expected
+    assert set(orchestrator.downloaded.values()) == {1}
+
+
+def test_no_session(app, capsys):
+    with pytest.raises(RuntimeError):
+        Orchestrator(sessions=1, login=failed).run(market='0', period='day')
+    capsys.readouterr()
+
+    with pytest.raises(ValueError):
+        Orchestrator(sessions=0)
@@ -0,0 +1,95 @@
+from os import listdir
+
+import pandas as pd
+import pytest
+
+from kiwoom import Kiwoom, config
+from kiwoom.config import history
+from kiwoom.wrapper.sim import PAGE_SIZE, Simulator, attach
+
+
+def request(api, wait, prev_next='0', rq_name='rq', code='000010'):
+    events = list()
+    api.connect('on_receive_tr_data', slot=lambda *args: events.append(args), key=rq_name)
+    api.set_input_value('종목코드', code)
+    assert api.comm_rq_data(rq_name, 'opt10081', prev_next, '0001') == 0
+    wait(lambda: events)
+    return events[0]
+
+
+def test_login(api, wait):
+    events = list()
+    api.connect('on_event_connect', slot=lambda err: events.append(err))
+    api.comm_connect()
+    wait(lambda: events)
+
+    assert events == [0]
+    assert api.get_connect_state() == 1
+    assert api.get_login_info('ACCNO') == '8000000011;'
+
+
+def test_pages(api, wait):
+    # Pages of 900 rows from the newest to the oldest, continued with prev_next=2
+    dates, prev_next = list(), '0'
+    while True:
+        _, _, _, _, prev_next = request(api, wait, prev_next)
+        cnt = api.get_repeat_cnt('opt10081', 'rq')
+        assert cnt == min(PAGE_SIZE, 2000 - len(dates))
+        dates += [api.get_comm_data('opt10081', 'rq', i, '일자') for i in range(cnt)]
+        if prev_next != '2':
+            break
+
+    assert len(dates) == 2000
+    assert dates[0] == api.simulator.today.strftime('%Y%m%d')
+    assert dates == sorted(dates, reverse=True)
+    assert api.get_comm_data('opt10081', 'rq', 0, '종목코드') == '000010'
+
+
+def test_comm_data_ex(api, wait):
+    request(api, wait)
+    rows = api.get_comm_data_ex('opt10081', 'rq')
+    keys = history.layout('opt10081')
+    assert len(rows) == PAGE_SIZE
+    for i in (0, PAGE_SIZE - 1):
+        # Multi rows have no code, which GetCommData() returns from single data
+        for key, val in zip(keys, rows[i]):
+            if key != '종목코드':
+                assert val == api.get_comm_data('opt10081', 'rq', i, key)
+
+
+def test_reproducible(app, unlimited, wait):
+    pages = list()
+    for _ in range(2):
+        api = Kiwoom()
+        attach(api, Simulator(rows=100, tr_limits=(), seed=7))
+        request(api, wait)
+        pages.append(api.get_comm_data_ex('opt10081', 'rq'))
+    assert pages[0] == pages[1]
+
+
+def test_overflow(app, unlimited):
+    api = Kiwoom()
+    attach(api, Simulator(tr_limits=((2, 60),)))
+    api.set_input_value('종목코드', '000010')
+    assert api.comm_rq_data('a', 'opt10081', '0', '0001') == 0
+    assert api.comm_rq_data('b', 'opt10081', '0', '0002') == 0
+    assert api.comm_rq_data('c', 'opt10081', '0', '0003') == -200
+
+
+def test_codes(api):
+    kospi = api.get_code_list_by_market('0').split(';')[:-1]
+    nxt = api.get_code_list_by_market('NXT').split(';')[:-1]
+    assert len(kospi) == 3
+    assert nxt == kospi[::2]
+
+
+@pytest.mark.parametrize('period', ['tick', 'min', 'day', 'week'])
+def test_history(bot, tmp_path, period):
+    bot.history('000010', period, path=str(tmp_path))
+    assert listdir(tmp_path) == ['000010.csv']
+
+    col = history.get_datetime_column(period)
+    df = pd.read_csv(tmp_path / '000010.csv', index_col=[col], parse_dates=[col], encoding=config.ENCODING)
+    assert len(df) == 2000
+    assert df.index.is_monotonic_increasing
+    assert df.index[-1].date() <= bot.api.simulator.today
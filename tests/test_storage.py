@@ -0,0 +1,254 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from kiwoom.config import history
+from kiwoom.data import storage
+from kiwoom.data.storage import CSV, Feather, Parquet
+
+
+def frame(n=1000, start='2024-11-01 09:00', freq='7s'):
+    index = pd.date_range(start, periods=n, freq=freq, name='체결시간')
+    rnd = np.random.default_rng(n)
+    return pd.DataFrame({
+        '체결가': rnd.integers(9000, 11000, n),
+        '거래량': rnd.integers(-500, 500, n),
+    }, index=index)
+
+
+def download(bot, path, fmt, period):
+    # Download once, then merge twice as the simulator moves to later days
+    today = bot.api.simulator.today
+    for day in (today, date(2024, 11, 20), date(2024, 11, 21)):
+        bot.api.simulator.today = day
+        bot.histories(market='0', period=period, path=str(path), merge=True, fmt=fmt)
+
+
+def test_get():
+    assert isinstance(storage.get(), CSV)
+    assert isinstance(storage.get('Parquet'), Parquet)
+    fmt = Parquet(row_group_size=10)
+    assert storage.get(fmt) is fmt
+    with pytest.raises(ValueError):
+        storage.get('xlsx')
+
+
+@pytest.mark.parametrize('cls', [CSV, Parquet, Feather])
+def test_roundtrip(cls, tmp_path):
+    if cls is not CSV:
+        pytest.importorskip('pyarrow')
+
+    store, df = cls(), frame()
+    file = store.file(str(tmp_path), '005930')
+    assert file.endswith(store.ext)
+
+    store.write(df, file)
+    pd.testing.assert_frame_equal(store.read(file, '체결시간'), df, check_freq=False)
+    assert store.last(file, '체결시간') == df.index[-1]
+    assert store.summary(file, '체결시간') == (df.index[0], df.index[-1], len(df))
+
+
+class TestParquet:
+    @pytest.fixture(autouse=True)
+    def pq(self):
+        return pytest.importorskip('pyarrow.parquet')
+
+    @pytest.fixture
+    def file(self, tmp_path):
+        file = str(tmp_path / '005930.parquet')
+        Parquet(row_group_size=100).write(frame(), file)
+        return file
+
+    def test_header(self, file):
+        assert Parquet().header(file) == ['체결시간', '체결가', '거래량']
+
+    @pytest.mark.parametrize('side', ['left', 'right'])
+    @pytest.mark.parametrize('pos', [0, 1, 99, 100, 101, 550, 999])
+    def test_locate(self, file, side, pos):
+        index = frame().index
+        ts = index[pos]
+        offset, equal, last = Parquet().locate(file, ts, side)
+        assert offset == index.searchsorted(ts, side=side)
+        assert equal and last == index[-1]
+
+        # Between two rows
+        offset, equal, _ = Parquet().locate(file, ts + pd.Timedelta('1s'), side)
+        assert offset == pos + 1 and not equal
+
+    def test_locate_before(self, file):
+        # The whole data follows ts, so nothing can be kept
+        assert Parquet().locate(file, pd.Timestamp('2024-10-01'), 'left') is None
+
+    @pytest.mark.parametrize('pos', [0, 50, 100, 450, 999, 1000])
+    def test_append(self, pq, file, pos):
+        # New data from the row at pos, or right after the last row
+        df = frame()
+        start = df.index[pos] if pos < len(df) else df.index[-1] + pd.Timedelta('7s')
+        new = frame(300, start, '5s')
+
+        store = Parquet(row_group_size=100)
+        offset, _, _ = store.locate(file, new.index[0], 'left')
+        dropped = store.append(new, file, offset)
+
+        expected = pd.concat([df.iloc[:offset], new])
+        assert dropped == len(df) - offset
+        pd.testing.assert_frame_equal(store.read(file, '체결시간'), expected, check_freq=False)
+
+        # Row groups stay in order and full-sized except the last one
+        meta = pq.ParquetFile(file).metadata
+        sizes = [meta.row_group(i).num_rows for i in range(meta.num_row_groups)]
+        assert sum(sizes) == len(expected)
+        assert all(size == 100 for size in sizes[:-1])
+
+    def test_append_types(self, file):
+        # Types differ from the file, so it can't be appended
+        new = frame(10, '2024-11-02').astype(str)
+        assert Parquet().append(new, file, Parquet().end(file)) is None
+        assert Parquet().end(file) == 1000
+
+    @pytest.mark.filterwarnings('ignore::UserWarning')
+    @pytest.mark.parametrize('period', ['tick', 'day'])
+    def test_merge(self, bot, tmp_path, monkeypatch, capsys, period):
+        fmt, appended = Parquet(row_group_size=700), list()
+        append = fmt.append
+        monkeypatch.setattr(fmt, 'append', lambda *args: appended.append(args[1]) or append(*args))
+        download(bot, tmp_path / 'incremental', fmt, period)
+        assert appended
+
+        monkeypatch.setattr(history, 'INCREMENTAL_MERGE', False)
+        bot.api.simulator.today = date(2024, 11, 15)
+        download(bot, tmp_path / 'full', fmt, period)
+        capsys.readouterr()
+
+        col = history.get_datetime_column(period)
+        for file in (tmp_path / 'full').iterdir():
+            full = fmt.read(str(file), col)
+            pd.testing.assert_frame_equal(fmt.read(str(tmp_path / 'incremental' / file.name), col), full)
+            assert len(full) > 2000
+
+
+class TestCSV:
+    @pytest.fixture
+    def file(self, tmp_path):
+        file = str(tmp_path / '005930.csv')
+        CSV().write(frame(), file)
+        return file
+
+    @pytest.mark.parametrize('block', [16, 100, 2 ** 16])
+    @pytest.mark.parametrize('side', ['left', 'right'])
+    @pytest.mark.parametrize('pos', [0, 1, 500, 998, 999])
+    def test_locate(self, file, block, side, pos):
+        index = frame().index
+        offset, equal, last = CSV().locate(file, index[pos], side, block)
+        assert equal and last == index[-1]
+
+        # Offset is the start of the line of the boundary
+        with open(file, 'rb') as f:
+            lines = f.readlines()
+        start = index.searchsorted(index[pos], side=side)
+        assert offset == sum(len(line) for line in lines[:1 + start])
+
+    def test_locate_before(self, file):
+        assert CSV().locate(file, pd.Timestamp('2024-10-01'), 'left') is None
+        assert CSV().locate(file, pd.Timestamp('2024-10-01'), 'right') is not None
+
+    def test_locate_broken(self, file):
+        # No new line at the end
+        with open(file, 'ab') as f:
+            f.write(b'2024-11-02 09:00:00,1,1')
+        assert CSV().locate(file, frame().index[500]) is None
+
+    def test_locate_empty(self, tmp_path):
+        file = str(tmp_path / 'empty.csv')
+        CSV().write(frame().iloc[:0], file)
+        offset, equal, last = CSV().locate(file, pd.Timestamp('2024-11-01'))
+        assert (offset, equal, last) == (CSV().end(file), False, None)
+
+    @pytest.mark.parametrize('pos', [0, 1, 500, 999, 1000])
+    def test_append(self, tmp_path, file, pos):
+        # Byte-identical to writing the merged frame at once
+        df = frame()
+        start = df.index[pos] if pos < len(df) else df.index[-1] + pd.Timedelta('7s')
+        new = frame(300, start, '5s')
+
+        offset = CSV().locate(file, new.index[0], 'left')[0] if pos < len(df) else CSV().end(file)
+        dropped = CSV().append(new, file, offset)
+        assert dropped == len(df) - pos
+
+        full = str(tmp_path / 'full.csv')
+        CSV().write(pd.concat([df.iloc[:pos], new]), full)
+        with open(file, 'rb') as a, open(full, 'rb') as b:
+            assert a.read() == b.read()
+
+    @pytest.mark.filterwarnings('ignore::UserWarning')
+    @pytest.mark.parametrize('period', ['tick', 'min', 'day'])
+    def test_merge(self, bot, tmp_path, monkeypatch, capsys, period):
+        # Files merged incrementally are byte-identical to those merged in full
+        appended, append = list(), CSV.append
+        monkeypatch.setattr(CSV, 'append', lambda *args: appended.append(args[2]) or append(*args))
+        download(bot, tmp_path / 'incremental', None, period)
+        assert appended
+        monkeypatch.setattr(history, 'INCREMENTAL_MERGE', False)
+        bot.api.simulator.today = date(2024, 11, 15)
+        download(bot, tmp_path / 'full', None, period)
+        capsys.readouterr()
+
+        files = sorted(file.name for file in (tmp_path / 'full').iterdir())
+        assert files == sorted(file.name for file in (tmp_path / 'incremental').iterdir())
+        for name in files:
+            assert (tmp_path / 'incremental' / name).read_bytes() == (tmp_path / 'full' / name).read_bytes()
+
+
+class TestLast:
+    @pytest.mark.parametrize('block', [1, 7, 64, 2 ** 12])
+    def test_csv(self, tmp_path, block):
+        file = str(tmp_path / '005930.csv')
+        df = frame(50)
+        CSV().write(df, file)
+        assert CSV().last(file, '체결시간', block) == df.index[-1]
+
+        # Blank lines at the end are skipped
+        with open(file, 'ab') as f:
+            f.write(b'\n\r\n')
+        assert CSV().last(file, '체결시간', block) == df.index[-1]
+
+    def test_csv_empty(self, tmp_path):
+        file = str(tmp_path / '005930.csv')
+        CSV().write(frame().iloc[:0], file)
+        assert CSV().last(file, '체결시간') is None
+        assert CSV().summary(file, '체결시간') == (None, None, 0)
+
+    @pytest.mark.parametrize('period, start', [('tick', '20241116'), ('min', '20241116'), ('day', '20241115')])
+    def test_history(self, bot, tmp_path, monkeypatch, capsys, period, start):
+        # Merge starts from the last timestamp probed without reading the whole file
+        bot.history('000010', period, path=str(tmp_path))
+        capsys.readouterr()
+
+        monkeypatch.setattr(CSV, 'read', lambda *args: pytest.fail('The whole file is read.'))
+        bot.history('000010', period, path=str(tmp_path), warning=False)
+        assert f"start='{start}'" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'parquet'])
+def test_merge_missing(bot, tmp_path, monkeypatch, fmt):
+    # Rows with missing values are dropped from the tail appended as well as in full merge
+    def frames():
+        df = frame(300).astype(float)
+        yield df.iloc[:100]
+        for start in (80, 180):
+            part = df.iloc[start:start + 120].copy()
+            part.iloc[[3, 50, 110], 0] = np.nan
+            yield part
+
+    store = storage.get(fmt)
+    for merge in ('incremental', 'full'):
+        monkeypatch.setattr(history, 'INCREMENTAL_MERGE', merge == 'incremental')
+        for df in frames():
+            bot.server.history_to_file(df, '000010', str(tmp_path / merge), merge=True, fmt=fmt)
+
+    full = store.read(store.file(str(tmp_path / 'full'), '000010'), '체결시간')
+    incremental = store.read(store.file(str(tmp_path / 'incremental'), '000010'), '체결시간')
+    pd.testing.assert_frame_equal(incremental, full)
+    assert len(full) == 300 - 5 and not full.isna().any().any()
@@ -0,0 +1,129 @@
+import os
+import time
+from datetime import date
+from threading import Thread
+
+import pytest
+from PyQt5.QtTest import QTest
+
+from kiwoom import config
+from kiwoom.config import history
+from kiwoom.config.types import ExitType
+from kiwoom.core.supervisor import Heartbeat, Supervisor, _SEQ
+from kiwoom.wrapper.sim import Simulator, attach
+
+
+# Children are spawned, so that they log in by functions of this module and not by fixtures
+def login(bot):
+    config.MUTE = True
+    history.REQUEST_LIMIT_TIME = 0
+    history.REQUEST_LIMIT_WINDOWS = []
+    attach(bot.api, Simulator(rows=500, tr_limits=(), ncodes=3, today=date(2024, 11, 15)))
+    bot.login()
+
+
+def frozen(bot):
+    # The first child freezes as given by KIWOOM_TEST_FREEZE, either without any beat or response
+    marker = os.environ['KIWOOM_TEST_MARKER']
+    if os.path.exists(marker):
+        return login(bot)
+
+    open(marker, 'w').close()
+    login(bot)
+    if os.environ['KIWOOM_TEST_FREEZE'] == 'beat':
+        time.sleep(60)
+    else:
+        bot.api.simulator.latency = 600000
+
+
+@pytest.fixture
+def heartbeat():
+    heartbeat = Heartbeat()
+    yield heartbeat
+    heartbeat.close()
+
+
+def test_pulse(bot, heartbeat, tmp_path, capsys):
+    # A child opens the block by name and publishes to the supervisor
+    child, downloaded = Heartbeat(heartbeat.name), bot.downloaded
+    assert heartbeat.read().pid == 0
+
+    child.attach(bot, interval=0.01)
+    pulse = heartbeat.read()
+    assert pulse.pid == os.getpid() and pulse.nrq == pulse.nrs == pulse.cnt == 0
+
+    bot.histories(codes=['000010', '000020'], period='day', path=str(tmp_path))
+    capsys.readouterr()
+    pulse = heartbeat.read()
+    assert pulse.nrq == pulse.nrs == 6 and pulse.cnt == 2  # 3 pages for each item
+    assert pulse.code == '000020'
+    assert time.time() - pulse.busy < 5
+
+    # Beats as long as the event loop runs
+    beat = pulse.beat
+    QTest.qWait(50)
+    assert heartbeat.read().beat > beat
+
+    # Detached with the bot restored
+    child.detach()
+    assert 'comm_rq_data' not in vars(bot.api) and 'comm_kw_rq_data' not in vars(bot.api)
+    assert bot.downloaded == downloaded
+    assert bot.api.observers('on_receive_tr_data') == ()
+    child.close()
+
+    heartbeat.reset()
+    assert heartbeat.read().pid == 0
+
+
+def test_seqlock(heartbeat):
+    # Readers never see a pulse being written, i.e. fields of different writes
+    writer = Heartbeat(heartbeat.name)
+    writer._pulse = [1, 0.0, 0.0, 0, 0, 0, b'']
+    stop = False
+
+    def write():
+        n = 0
+        while not stop:
+            n += 1
+            writer._pulse = [1, float(n), float(n), n, n, n, str(n).encode()]
+            writer._publish()
+
+    thread = Thread(target=write)
+    thread.start()
+    try:
+        for _ in range(2000):
+            pulse = heartbeat.read()
+            assert pulse.beat == pulse.busy == pulse.nrq == pulse.nrs == pulse.cnt
+            assert pulse.code == ('' if pulse.cnt == 0 else str(pulse.cnt))
+    finally:
+        stop = True
+        thread.join()
+        writer.close()
+
+    # Bounded retries even if a writer died while writing
+    _SEQ.pack_into(heartbeat.shm.buf, 0, 1)
+    assert heartbeat.read().pid == 1
+
+
+def test_run(app, tmp_path, capsys):
+    supervisor = Supervisor(login=login, timeout=30, interval=0.1, rest=0)
+    assert supervisor.run(codes=['000010', '000030'], period='day', path=str(tmp_path)) == ExitType.SUCCESS
+    capsys.readouterr()
+    assert sorted(file.name for file in tmp_path.iterdir()) == ['000010.csv', '000030.csv']
+    assert (supervisor.spawns, supervisor.kills) == (1, 0)
+
+
+@pytest.mark.parametrize('freeze', ['beat', 'response'])
+def test_freeze(app, tmp_path, monkeypatch, capsys, freeze):
+    # A frozen child is killed and a new one resumes with jobs
+    monkeypatch.setenv('KIWOOM_TEST_MARKER', str(tmp_path / 'marker'))
+    monkeypatch.setenv('KIWOOM_TEST_FREEZE', freeze)
+    supervisor = Supervisor(login=frozen, timeout=1, interval=0.1, rest=0)
+    result = supervisor.run(
+        codes=['000010', '000020'], period='day', path=str(tmp_path / 'day'), jobs=str(tmp_path / 'jobs.db')
+    )
+    out = capsys.readouterr().out
+    assert result == ExitType.SUCCESS
+    assert (supervisor.spawns, supervisor.kills) == (2, 1)
+    assert ('no beat' if freeze == 'beat' else 'no response') in out
+    assert sorted(file.name for file in (tmp_path / 'day').iterdir()) == ['000010.csv', '000020.csv']
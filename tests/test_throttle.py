@@ -0,0 +1,84 @@
+import pytest
+
+from kiwoom.config import history
+from kiwoom.utils.throttle import Throttle
+from kiwoom.wrapper.sim import Simulator, attach
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def test_increase(clock):
+    # Additive increase of the rate for each response in time, up to the bound
+    throttle = Throttle(interval=1, bounds=(0.2, 10), increase=0.5, clock=clock)
+    throttle.success(0.1)
+    assert throttle.rate == pytest.approx(1.5)
+    throttle.success(5)  # slow response keeps the rate
+    assert throttle.rate == pytest.approx(1.5)
+    for _ in range(20):
+        throttle.success()
+    assert throttle.interval == pytest.approx(0.2)
+
+
+def test_decrease(clock):
+    # Multiplicative decrease, once per interval, down to the bound
+    throttle = Throttle(interval=0.5, bounds=(0.2, 3), decrease=0.5, clock=clock)
+    throttle.overload()
+    assert throttle.interval == pytest.approx(1)
+    throttle.overload()  # the same overload, ex) -200 and its message
+    assert throttle.interval == pytest.approx(1) and throttle.overloads == 1
+
+    for _ in range(5):
+        clock.now += throttle.interval
+        throttle.overload()
+    assert throttle.interval == pytest.approx(3) and throttle.overloads == 6
+
+
+def test_bounds():
+    assert Throttle(interval=0, bounds=(0.2, 10)).interval == pytest.approx(0.2)
+    assert Throttle(interval=60, bounds=(0.2, 10)).interval == pytest.approx(10)
+
+
+def test_observers(clock):
+    throttle = Throttle(interval=1, increase=1, latency=1, keywords=('과부하',), clock=clock)
+    throttle.sent('a', 0)
+    clock.now += 0.5
+    throttle.received('a')
+    assert throttle.rate == pytest.approx(2)
+
+    # Slow or unknown responses keep the rate
+    throttle.sent('b', 0)
+    clock.now += 2
+    throttle.received('b')
+    throttle.received('c')
+    assert throttle.rate == pytest.approx(2)
+
+    throttle.sent('d', -200)
+    assert throttle.rate == pytest.approx(1) and throttle.overloads == 1
+    clock.now += 10
+    throttle.message('조회 과부하입니다.')
+    throttle.message('조회가 완료되었습니다.')
+    assert throttle.rate == pytest.approx(0.5) and throttle.overloads == 2
+
+
+def test_adaptive(bot, tmp_path, monkeypatch, capsys):
+    # Bot.histories() backs off and retries when the server is overloaded
+    attach(bot.api, Simulator(rows=2000, tr_limits=((2, 0.5),), ncodes=3, today=bot.api.simulator.today))
+    bot.login()
+    monkeypatch.setattr(history, 'ADAPTIVE', True)
+
+    bot.histories(market='0', period='day', path=str(tmp_path))
+    capsys.readouterr()
+    assert len(list(tmp_path.iterdir())) == 3
+    assert bot.api.throttle.overloads > 0
+    assert bot.api.throttle.interval > 0.2
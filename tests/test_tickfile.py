@@ -0,0 +1,128 @@
+from collections import namedtuple
+from datetime import datetime
+from os import listdir
+from os.path import getsize, join
+
+import numpy as np
+import pytest
+
+from kiwoom.config import real
+from kiwoom.data import tickfile
+from kiwoom.data.ring import TICK, TickStore
+from kiwoom.data.tickfile import HEADER, TickFile, TickRecorder, read
+
+# Record of '주식체결' decoded with TICK_FIDS
+Record = namedtuple('Record', ['체결시간', '현재가', '거래량', '누적거래량'])
+
+
+def items(n, start=0):
+    return [(90000 + i, 10000 + i, i, 1 if i % 2 else -1, i * 10) for i in range(start, start + n)]
+
+
+def test_append(tmp_path):
+    path = str(tmp_path / '000010.tick')
+    file = TickFile(path, chunk=4)
+    for item in items(10):
+        file.append(item)
+
+    # Readers see ticks flushed only
+    assert len(read(path)) == 0
+    assert file.capacity == 12 and len(file) == 10
+    file.flush()
+    assert read(path).tolist() == items(10)
+
+    file.finalize()
+    assert getsize(path) == HEADER.size + 10 * TICK.itemsize
+    assert HEADER.unpack_from(open(path, 'rb').read())[1] == 1  # final
+
+    # Appended after the ticks in the file
+    file = TickFile(path, chunk=4)
+    for item in items(3, 10):
+        file.append(item)
+    file.finalize()
+    file.finalize()
+    assert read(path).tolist() == items(13)
+
+
+def test_invalid(tmp_path):
+    path = tmp_path / 'other.tick'
+    path.write_bytes(b'x' * 100)
+    with pytest.raises(ValueError):
+        read(str(path))
+    with pytest.raises(ValueError):
+        TickFile(str(path))
+
+
+def test_recorder(api, tmp_path):
+    # The same ticks as TickStore, in a file for each code and day
+    recorder = TickRecorder(api, str(tmp_path), interval=60000, close_at='')
+    store = TickStore(api)
+    api.simulator.set_real_reg('1000', '000010;000020', '20;10;15;13', '0')
+    for _ in range(10):
+        api.simulator.tick()
+
+    recorder.flush()
+    assert len(read(join(recorder.path, '000010.tick'))) == 5
+    assert recorder.timer is not None
+
+    # Finalized once flushed after the time to close
+    recorder.close_at = '000000'
+    recorder.flush()
+    assert recorder.timer is None
+    assert sorted(listdir(recorder.path)) == ['000010.tick', '000020.tick']
+    for code in ('000010', '000020'):
+        ticks = read(join(recorder.path, f'{code}.tick'))
+        assert np.array_equal(ticks, store.view(code))
+
+    api.simulator.tick()
+    assert len(read(join(recorder.path, '000010.tick'))) == 5
+    store.close()
+    assert api.observers('on_receive_real_data') == ()
+
+
+def test_mapped(tmp_path):
+    # Grows even if the file can't be resized, as on Windows while readers map it
+    class Locked:
+        def __init__(self, fp):
+            self.fp = fp
+
+        def __getattr__(self, name):
+            return getattr(self.fp, name)
+
+        def truncate(self, size):
+            raise OSError('The requested operation cannot be performed on a file with a user-mapped section open')
+
+    path = str(tmp_path / '000010.tick')
+    file = TickFile(path, chunk=4)
+    file._fp = Locked(file._fp)
+    for item in items(10):
+        file.append(item)
+    assert file.capacity == 12 and getsize(path) == HEADER.size + 12 * TICK.itemsize
+
+    file.finalize()
+    assert read(path).tolist() == items(10)
+
+
+def test_session(api, tmp_path, monkeypatch):
+    # Files of the day are finalized once ticks of the next session come
+    class Now:
+        day = datetime(2024, 11, 15, 16)
+
+        @classmethod
+        def now(cls):
+            return cls.day
+    monkeypatch.setattr(tickfile, 'datetime', Now)
+
+    recorder = TickRecorder(api, str(tmp_path), interval=60000)
+    assert recorder.close_at is None
+    recorder.on_tick('000010', '주식체결', Record('155959', 10000, 1, 1))
+    first = recorder.files['000010']
+
+    Now.day = datetime(2024, 11, 18, 9)
+    recorder.on_tick('000010', '주식체결', Record('090001', 10100, 2, 2))
+    recorder.flush()
+    assert first._fp is None
+    assert recorder.close_at == real.MARKET_CLOSE
+    assert read(str(tmp_path / '20241115' / '000010.tick'))['time'].tolist() == [155959]
+    assert read(str(tmp_path / '20241118' / '000010.tick'))['time'].tolist() == [90001]
+    recorder.close()
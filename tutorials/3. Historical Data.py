@@ -46,14 +46,13 @@ config.MARKET_GUBUNS = {
 
 
 import sys
-import time
 from datetime import datetime
-from multiprocessing import Process, Manager
 
 from PyQt5.QtWidgets import QApplication
 
 from kiwoom import Bot, config
-from kiwoom.config.types import ExitType
+from kiwoom.core.supervisor import Supervisor
+from kiwoom.data.jobs import DONE, JobQueue
 from kiwoom.utils import clock
 
 
@@ -70,6 +69,10 @@ class MyBot(Bot):
         # 경고 메세지 제거
         config.MUTE = True
 
+        # 다운받은 파일 정보를 저장위치마다 manifest.json 파일로 기록 (선택, 기본값 False)
+        #  - 저장위치에 manifest.json 및 lock 파일이 생성되며, 병합 시 마지막 시간을 파일 대신 manifest에서 확인
+        # config.history.MANIFEST = True
+
         # 로그인 요청
         self.login()
 
@@ -84,7 +87,9 @@ class MyBot(Bot):
             # 4) 병합 - 다운받은 데이터와 기존에 존재하는 csv 파일의 병합여부
             'merge': True,
             # 5) 경고 - 경고 메세지 출력 여부
-            'warning': False
+            'warning': False,
+            # 6) 파일형식 - 'csv'(기본), 'parquet', 'feather' (parquet, feather는 pyarrow 설치 필요)
+            'fmt': 'csv'
         } if kwargs is None else kwargs
 
         # 다운로드 시작
@@ -94,6 +99,7 @@ class MyBot(Bot):
         # 1) 0 = ExitCode.SUCCESS : 완전히 다 받은 경우
         # 2) 1 = ExitCode.FAILURE : 다운 요청 중 오류가 난 경우
         # 3) slice = (from, to)   : 다운 완료 된 항목 제외 후 다시 시작할 위치
+        # 4) 1 = ExitCode.RESTART : jobs 사용 시 다운 받을 항목이 큐에 남아있는 경우
         print(f'다운로드 결과 = {result}')
 
         # 결과 반환
@@ -117,35 +123,23 @@ if __name__ == '__main__':
 
 """
 Multi-processing을 활용하여 24시간 다운로드 받을 수 있는 버전
-"""
 
+Supervisor가 자식 프로세스에서 로그인 및 다운로드를 실행하고, 자식 프로세스는 공유메모리에
+heartbeat, 요청/응답 횟수, 현재 종목코드를 기록한다. 이벤트 루프가 멈추거나 요청에 대한 응답이
+timeout 초 동안 없으면, Supervisor가 즉시 프로세스를 종료하고 새로 시작한다.
+"""
 
-# 24시간 끊기지 않는 버전
-def run_24(kwargs, share):
-    # To make process stable
-    time.sleep(5)
 
+# 자식 프로세스에서 실행되는 로그인 함수
+def login(bot):
     # To suppress warning messages
     config.MUTE = True
 
-    # 초기화 및 로그인
-    app = QApplication(sys.argv)
-    bot = MyBot()
-    bot.login()
-
-    """
-    Hidden
-    """
-
-    # 다운로드 시작
-    result = bot.histories(**kwargs)
-
-    # 결과 저장 및 공유
-    share['result'] = result
-    share['complete'] = True
+    # 요청 속도 자동 조절 (과부하 응답에 따라 요청 간격을 조절하므로 slice 재시작이 필요 없음)
+    config.history.adapt()
 
-    # Bot 실행 종료
-    app.exit()
+    # 로그인
+    bot.login()
 
 
 # 24시간 끊기지 않는 버전 실행 스크립트
@@ -163,80 +157,26 @@ if __name__ == '__main__':
         'end': '20250801',
         'merge': True,
         'warning': False,
-        'path': 'C:/Data/market/NXT/tick'
+        'path': 'C:/Data/market/NXT/tick',
+        # 진행상황을 SQLite 파일에 저장하여, 프로세스가 재시작되어도 멈춘 곳부터 이어서 다운로드
+        'jobs': 'C:/Data/market/NXT/jobs.db'
     }
 
-    # Variables to set
-    ntry, maxtry = 0, 2
-
-    # Share data between processes
-    share = Manager().dict()
-    share['complete'] = False
-    share['impossible'] = False
-
-    # Loop start
-    while True:
-        # Print time
-        print(f"[{clock()}] Starting a new loop!")
-
-        # Variables
-        share['complete'] = False
-
-        # Spawning a process
-        p = Process(target=run_24, args=(kwargs, share), daemon=True)
-        p.start()
-        p.join()
-
-        # 1) Download done
-        if share['result'] == ExitType.SUCCESS:
-            print(f"[{clock()}] Download done for {config.MARKETS[kwargs['market']]}!")
-            time.sleep(1)
-            break
-
-        # 2) Download failed by local errors
-        elif share['result'] == ExitType.FAILURE:
-            # If maximum try, stop
-            if ntry == maxtry:
-                print(f'[{clock()}] Max tryout reached, stop downloading.')
-                break
-            # Else, try again
-            ntry += 1
-            time.sleep(1)
-            print(f'[{clock()}] Retry downloading due to local errors.')
-
-        # 3) Process killed due to no response from the server
-        elif not share['complete']:
-            print(f'[{clock()}] Take a 10 minute break for server to response.')
-            time.sleep(10 * 60)
-
-        # 4) Not allowed
-        else:
-            raise RuntimeError(f'[{clock()}] Download failed.')
-
-    """
-        # Hidden Case
-        # 4) When script re-start is needed
-        else:
-            # In case, we have to slow down for the next run
-            if share['result'] == ExitType.IMPOSSIBLE:
-                share['impossible'] = True
-
-            # Otherwise, speeding again
-            else:
-                # Update kwargs for restarting
-                #  - Note that 'slice' and 'code' can't be used together
-                kwargs['slice'] = share['result']
-                if 'code' in kwargs:
-                    del kwargs['code']
-                
-                # Update share
-                share['impossible'] = False
-
-                # Print result
-                print(f"\n[{clock()}] Restart with slice={share['result']} in the next loop.")
-
-        time.sleep(1)
-    """
+    # 감시 설정 (초 단위)
+    # 1) timeout  : 이벤트 루프가 멈추거나 요청에 응답이 없는 시간이 넘으면 재시작
+    # 2) interval : heartbeat 기록 및 확인 간격
+    # 3) rest     : 서버로부터 응답을 하나도 받지 못하고 종료된 경우 쉬는 시간
+    # 4) maxtry   : 로컬 오류로 실패한 경우 재시도 횟수
+    supervisor = Supervisor(factory=MyBot, login=login, timeout=60, interval=1, rest=10 * 60, maxtry=2)
+
+    # 매일 최신 데이터를 병합하는 경우, 이전에 완료된 작업을 다시 대기 상태로 변경
+    #  - 완료된 작업은 같은 인자로 다시 추가되지 않으므로, 하루의 첫 실행 전에 한 번만 호출
+    daily = False
+    if daily:
+        JobQueue(kwargs['jobs']).reset(DONE)
+
+    # 다운로드 완료 또는 최대 재시도 횟수까지 반복
+    result = supervisor.run(**kwargs)
 
     # Script done
-    print(f'[{clock()}] Script All Finished.')
+    print(f'[{clock()}] Script All Finished with {result}.')